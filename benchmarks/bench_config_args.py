@@ -0,0 +1,111 @@
+"""
+Бенчмарк подстановки плейсхолдеров в аргументы winws (utils/config_loader.py).
+
+Сравнивает прежнюю цепочку .replace() с очисткой ",," и "--key=" и рендеринг
+заранее скомпилированных шаблонов ArgTemplate для всех файлов config/,
+с включённым и выключенным Game Filter. Заодно проверяет, что результаты совпадают
+(списки портов сравниваются после нормализации: шаблоны сводят пересечения
+с Game Filter к минимальной записи).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_config_args
+"""
+import argparse
+import glob
+import os
+import time
+
+from utils.config_loader import load_config
+from utils.port_set import normalize_ports
+from utils.winws_profile import PORT_LIST_OPTIONS
+
+BASE_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ZAPRET_FOLDER = os.path.join(BASE_FOLDER, "zapret")
+BLACKLIST_FOLDER = os.path.join(BASE_FOLDER, "black")
+BLACKLIST_FILES = [
+    os.path.join(BLACKLIST_FOLDER, name)
+    for name in ("russia-blacklist.txt", "disk-youtube-blacklist.txt", "universal.txt")
+]
+
+
+def _placeholders(game_filter_ports: str):
+    placeholders = {
+        "ZAPRET_FOLDER": ZAPRET_FOLDER,
+        "BLACKLIST_FOLDER": BLACKLIST_FOLDER,
+        "BASE_FOLDER": BASE_FOLDER,
+        "GAME_FILTER": game_filter_ports,
+    }
+    for index, path in enumerate(BLACKLIST_FILES):
+        placeholders[f"BLACKLIST_FILES_{index}"] = path
+    return placeholders
+
+
+def _replace_chain(args, game_filter_ports: str):
+    """Прежняя реализация из load_script_options."""
+    args = [
+        arg.replace('{ZAPRET_FOLDER}', ZAPRET_FOLDER)
+           .replace('{BLACKLIST_FOLDER}', BLACKLIST_FOLDER)
+           .replace('{BLACKLIST_FILES_0}', BLACKLIST_FILES[0])
+           .replace('{BLACKLIST_FILES_1}', BLACKLIST_FILES[1])
+           .replace('{BLACKLIST_FILES_2}', BLACKLIST_FILES[2])
+           .replace('{BASE_FOLDER}', BASE_FOLDER)
+           .replace('{GAME_FILTER}', game_filter_ports)
+           .replace(',,', ',')
+           .rstrip(';,').lstrip(',')
+        for arg in args
+    ]
+    return [arg for arg in args if arg and not arg.endswith('=')]
+
+
+def _normalized(args):
+    result = []
+    for arg in args:
+        name, sep, value = arg.partition("=")
+        result.append(name + sep + normalize_ports(value) if sep and name in PORT_LIST_OPTIONS else arg)
+    return result
+
+
+def _render(section, placeholders):
+    return section.render_args(placeholders)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    options = parser.parse_args()
+
+    documents = [load_config(path) for path in sorted(glob.glob(os.path.join(BASE_FOLDER, "config", "*.ini")))]
+    sections = [section for document in documents for section in document.script_sections]
+    total_args = sum(len(section.raw_args) for section in sections)
+
+    for ports in ("", "1024-65535"):
+        placeholders = _placeholders(ports)
+        mismatches = sum(
+            1 for section in sections
+            if _normalized(_replace_chain(section.raw_args, ports)) != _render(section, placeholders)
+        )
+
+        raw = [section.raw_args for section in sections]
+        started = time.perf_counter()
+        for _ in range(options.rounds):
+            for args in raw:
+                _replace_chain(args, ports)
+        replace_us = (time.perf_counter() - started) / options.rounds * 1e6
+
+        for section in sections:
+            section.templates  # компиляция не входит в замер рендеринга
+        started = time.perf_counter()
+        for _ in range(options.rounds):
+            for section in sections:
+                _render(section, placeholders)
+        render_us = (time.perf_counter() - started) / options.rounds * 1e6
+
+        print(
+            f"Game Filter {'вкл' if ports else 'выкл'}: {len(documents)} файлов, {len(sections)} секций, "
+            f"{total_args} аргументов; .replace() {replace_us:.0f} мкс, шаблоны {render_us:.0f} мкс "
+            f"(x{replace_us / render_us:.1f}), расхождений {mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
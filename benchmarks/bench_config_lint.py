@@ -0,0 +1,60 @@
+"""
+Бенчмарк линтера конфигураций (utils/config_lint.py).
+
+Проверяет все файлы config/ так же, как программа при загрузке конфигурации:
+разбор из кэша загрузчика, подстановка плейсхолдеров и один проход линтера
+по всем секциям. Линтер запускается при каждой загрузке, поэтому время
+прогона по всему каталогу должно оставаться в пределах миллисекунд.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_config_lint
+    python -m benchmarks.bench_config_lint --show    # вывести находки
+"""
+import argparse
+import glob
+import os
+import time
+
+from benchmarks.bench_config_args import BASE_FOLDER, _placeholders
+from utils.config_lint import lint_options
+from utils.config_loader import invalidate, load_config
+
+
+def _lint_all(paths, placeholders):
+    return {path: lint_options(load_config(path).script_options(placeholders)) for path in paths}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--show", action="store_true")
+    options = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(BASE_FOLDER, "config", "*.ini")))
+    placeholders = _placeholders("1024-65535")
+
+    invalidate()
+    started = time.perf_counter()
+    results = _lint_all(paths, placeholders)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(options.rounds):
+        _lint_all(paths, placeholders)
+    warm = (time.perf_counter() - started) / options.rounds
+
+    total = sum(len(findings) for findings in results.values())
+    print(f"файлов: {len(paths)}, находок: {total}")
+    print(f"первый прогон (с разбором файлов): {cold * 1000:.2f} мс")
+    print(f"повторный прогон (файлы из кэша):  {warm * 1000:.2f} мс")
+
+    if options.show:
+        for path, findings in results.items():
+            for finding in findings:
+                profile = f" профиль {finding.profile}" if finding.profile is not None else ""
+                print(f"{os.path.basename(path)} [{finding.section}]{profile} "
+                      f"{finding.cost.name} {finding.code}: {finding.message.format(**finding.params)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Бенчмарк индекса доменов (utils/domain_index.py).
+
+Для каждого hostlist из black/ измеряет время сборки индекса, время
+повторного открытия без пересборки и среднее время поиска по суффиксу
+в сравнении с линейным проходом по файлу.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_domain_index
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from utils.domain_index import DomainIndex, normalize_entry
+
+BLACK_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "black")
+HOSTLISTS = ["russia-blacklist.txt", "universal.txt", "disk-youtube-blacklist.txt"]
+
+
+def _linear_lookup(path: str, host: str) -> bool:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parsed = normalize_entry(line)
+            if parsed and (host == parsed[0] or host.endswith("." + parsed[0])):
+                return True
+    return False
+
+
+def _queries(path: str, count: int):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        hosts = [parsed[0] for parsed in map(normalize_entry, f) if parsed]
+    rng = random.Random(42)
+    hits = [f"www.{rng.choice(hosts)}" for _ in range(count // 2)]
+    misses = [f"host{i}.not-in-list-{rng.randint(0, 10**6)}.org" for i in range(count - len(hits))]
+    return hits + misses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--linear-queries", type=int, default=20)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in HOSTLISTS:
+            source = os.path.join(BLACK_FOLDER, name)
+            if not os.path.exists(source):
+                continue
+            index_path = os.path.join(tmp_dir, name + ".idx")
+
+            started = time.perf_counter()
+            DomainIndex.build(source, index_path).close()
+            build_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index = DomainIndex.load(source, index_path)
+            open_time = time.perf_counter() - started
+
+            queries = _queries(source, options.queries)
+            started = time.perf_counter()
+            hits = sum(1 for host in queries if index.covers(host))
+            lookup_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+            sample = queries[:options.linear_queries // 2] + queries[-(options.linear_queries // 2):]
+            started = time.perf_counter()
+            for host in sample:
+                _linear_lookup(source, host)
+            linear_us = (time.perf_counter() - started) / max(len(sample), 1) * 1e6
+            index.close()
+
+            print(
+                f"{name}: {len(index)} записей, сборка {build_time * 1000:.0f} мс, "
+                f"открытие {open_time * 1000:.2f} мс, поиск {lookup_us:.1f} мкс "
+                f"(линейно {linear_us / 1000:.1f} мс), совпадений {hits}/{len(queries)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк поиска адресов в ipset (utils/ipset_utils.py, IpsetTree).
+
+Измеряет время построения дерева, повторной загрузки из кэша и среднее
+время поиска самого длинного префикса в сравнении с линейным проходом
+по списку сетей ipaddress.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_ipset_lookup
+"""
+import argparse
+import ipaddress
+import os
+import random
+import time
+
+from utils.ipset_utils import IpsetTree
+
+BLACK_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "black")
+IPSETS = ["ipset-discord.txt"]
+
+
+def _queries(tree: IpsetTree, count: int):
+    rng = random.Random(42)
+    networks = [ipaddress.ip_network(prefix) for prefix in tree.prefixes]
+    hits = [
+        str(net.network_address + rng.randrange(net.num_addresses))
+        for net in (rng.choice(networks) for _ in range(count // 2))
+    ]
+    misses = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(count - len(hits))]
+    return hits + misses, networks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--linear-queries", type=int, default=200)
+    options = parser.parse_args()
+
+    for name in IPSETS:
+        path = os.path.join(BLACK_FOLDER, name)
+        if not os.path.exists(path):
+            continue
+
+        IpsetTree._cache.pop(os.path.abspath(path), None)
+        started = time.perf_counter()
+        tree = IpsetTree.load(path)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        IpsetTree.load(path)
+        cached_us = (time.perf_counter() - started) * 1e6
+
+        queries, networks = _queries(tree, options.queries)
+        started = time.perf_counter()
+        hits = sum(1 for match in tree.lookup_many(queries) if match)
+        lookup_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        sample = queries[:options.linear_queries]
+        started = time.perf_counter()
+        for address in sample:
+            ip = ipaddress.ip_address(address)
+            any(ip in net for net in networks)
+        linear_us = (time.perf_counter() - started) / max(len(sample), 1) * 1e6
+
+        print(
+            f"{name}: {len(tree)} префиксов, {tree.node_count} узлов, сборка {build_time * 1000:.0f} мс, "
+            f"из кэша {cached_us:.0f} мкс, поиск {lookup_us:.1f} мкс (линейно {linear_us:.0f} мкс), "
+            f"совпадений {hits}/{len(queries)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк загрузчика обновлений на локальном HTTP-сервере.
+
+Сравнивает последовательные requests.get (как раньше в update_blacklists)
+с DownloadEngine (общая сессия + параллельные задачи).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_update_downloads
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.update_utils import DownloadEngine
+
+# Имя источника -> (задержка ответа в секундах, размер тела в байтах)
+SOURCES = {
+    "russia-blacklist": (0.40, 1_900_000),
+    "universal": (0.35, 1_900_000),
+    "disk-youtube-blacklist": (0.10, 1_000),
+    "ipset-discord": (0.15, 80_000),
+    "zapret": (0.30, 600_000),
+    "config": (0.05, 8_000),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, size = SOURCES.get(self.path.strip("/"), (0.0, 0))
+        time.sleep(delay)
+        body = b"x" * size
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _sequential(base_url: str) -> float:
+    started = time.perf_counter()
+    for name in SOURCES:
+        response = requests.get(f"{base_url}/{name}", timeout=10)
+        response.raise_for_status()
+        _ = response.content
+    return time.perf_counter() - started
+
+
+def _engine(base_url: str) -> float:
+    with DownloadEngine() as engine:
+        started = time.perf_counter()
+        jobs = {name: (lambda n=name: engine.get(f"{base_url}/{n}", timeout=10).content) for name in SOURCES}
+        results = engine.run(jobs)
+        elapsed = time.perf_counter() - started
+    failed = [name for name, result in results.items() if not result.ok]
+    if failed:
+        raise RuntimeError(f"Ошибки загрузки: {failed}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    slowest = max(delay for delay, _ in SOURCES.values())
+    total = sum(delay for delay, _ in SOURCES.values())
+    print(f"Источников: {len(SOURCES)}, самый медленный: {slowest:.2f} с, сумма задержек: {total:.2f} с")
+    try:
+        for i in range(1, options.rounds + 1):
+            seq = _sequential(base_url)
+            par = _engine(base_url)
+            print(f"[{i}] последовательно: {seq:.3f} с | DownloadEngine: {par:.3f} с | ускорение x{seq / par:.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
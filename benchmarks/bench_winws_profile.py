@@ -0,0 +1,49 @@
+"""
+Бенчмарк разбора аргументов winws на профили (utils/winws_profile.py).
+
+Разбирает все секции всех файлов config/, проверяет обратную сборку
+аргументов байт в байт и выводит время разбора всего каталога.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_winws_profile
+"""
+import argparse
+import glob
+import os
+import time
+
+from utils.config_loader import load_config
+from utils.winws_profile import WinwsCommand
+
+BASE_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    options = parser.parse_args()
+
+    sections = [
+        section
+        for path in sorted(glob.glob(os.path.join(BASE_FOLDER, "config", "*.ini")))
+        for section in load_config(path).script_sections
+    ]
+
+    for section in sections:
+        command = WinwsCommand.parse(section.raw_args)
+        round_trip = command.to_args() == section.raw_args
+        print(
+            f"[{section.name}] профилей {len(command)}, списков {len(command.lists)}, "
+            f"обратная сборка {'совпадает' if round_trip else 'РАСХОДИТСЯ'}"
+        )
+
+    started = time.perf_counter()
+    for _ in range(options.rounds):
+        for section in sections:
+            WinwsCommand.parse(section.raw_args)
+    elapsed_us = (time.perf_counter() - started) / options.rounds * 1e6
+    print(f"Разбор {len(sections)} секций config/: {elapsed_us:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
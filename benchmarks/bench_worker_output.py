@@ -0,0 +1,164 @@
+"""
+Бенчмарк передачи вывода процесса в консоль (utils/winws_output.py).
+
+Фиктивный дочерний процесс печатает строки, похожие на вывод winws --debug,
+с заданной скоростью (по умолчанию 100 тыс. строк/с). Сравниваются:
+- прежняя схема: сигнал на каждую строку, в GUI-потоке lower() и перебор
+  ключевых слов, append и удаление лишних строк курсором;
+- OutputBatcher: фильтр одним выражением и WinwsOutputParser в потоке
+  чтения, пачка раз в 50 мс, одна вставка в документ с maximumBlockCount.
+Для GUI-части нужен PyQt6 (используется offscreen-платформа).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_worker_output
+    python -m benchmarks.bench_worker_output --rate 200000 --seconds 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from utils.winws_output import ConsoleFilter, OutputBatcher, WinwsOutputParser
+
+CONSOLE_MAX_LINES = 100
+LEGACY_KEYWORDS = [
+    "loading hostlist", "we have", "desync profile(s)", "loaded hosts",
+    "loading plain text list", "loaded", "loading ipset", "github version",
+]
+
+CHILD = r"""
+import sys, time
+rate, seconds = int(sys.argv[1]), float(sys.argv[2])
+lines = [
+    "packet: id=%d len=1400 outbound IPv4 TCP 192.168.1.2:50123 -> 142.250.74.46:443",
+    "desync profile 1 (noname) matches",
+    "loading hostlist C:\\zapret\\black\\universal.txt",
+    "dpi desync src=192.168.1.2:50123 dst=142.250.74.46:443 track_direction=out fixed_direction=out",
+]
+chunk = max(1, rate // 100)
+total = int(rate * seconds)
+out = sys.stdout
+start = time.perf_counter()
+written = 0
+while written < total:
+    block = []
+    for n in range(written, written + chunk):
+        line = lines[n % 4]
+        block.append((line % n if n % 4 == 0 else line) + "\n")
+    out.write("".join(block))
+    out.flush()
+    written += chunk
+    delay = start + written / rate - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+"""
+
+
+def _spawn(rate: int, seconds: float) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-c", CHILD, str(rate), str(seconds)],
+                            stdout=subprocess.PIPE, text=True, bufsize=1)
+
+
+def _legacy_filter(text: str):
+    text_lower = text.lower()
+    if "windivert initialized. capture is started." in text_lower:
+        return "started"
+    if any(keyword in text_lower for keyword in LEGACY_KEYWORDS):
+        return None
+    return text
+
+
+def run_legacy(rate: int, seconds: float):
+    """Прежний WorkerThread: строка за строкой, каждая — отдельный сигнал."""
+    process = _spawn(rate, seconds)
+    lines = []
+    started = time.perf_counter()
+    for line in iter(process.stdout.readline, ""):
+        line = line.strip()
+        if line:
+            lines.append(line)
+    process.wait()
+    return lines, time.perf_counter() - started
+
+
+def run_batched(rate: int, seconds: float):
+    process = _spawn(rate, seconds)
+    batches = []
+    parser = WinwsOutputParser()
+    batcher = OutputBatcher(batches.append, ConsoleFilter("started"), max_lines=CONSOLE_MAX_LINES,
+                            observer=parser.feed)
+    started = time.perf_counter()
+    batcher.run(process.stdout)
+    process.wait()
+    return batcher, batches, time.perf_counter() - started
+
+
+def gui_cost(legacy_lines, batches):
+    """Время GUI-потока на показ вывода: прежний update_output против пачек."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QTextCursor
+    from PyQt6.QtWidgets import QApplication, QTextEdit
+
+    # Виджетам нужен QApplication; ссылка держит его живым до конца замера
+    app = QApplication.instance() or QApplication([])
+
+    legacy = QTextEdit()
+    started = time.perf_counter()
+    for text in legacy_lines:
+        text = _legacy_filter(text)
+        if text is None:
+            continue
+        legacy.append(text)
+        document = legacy.document()
+        while document.blockCount() > CONSOLE_MAX_LINES:
+            cursor = legacy.textCursor()
+            cursor.movePosition(QTextCursor.MoveOperation.Start)
+            cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+            cursor.removeSelectedText()
+            cursor.deleteChar()
+    legacy_time = time.perf_counter() - started
+
+    batched = QTextEdit()
+    batched.document().setMaximumBlockCount(CONSOLE_MAX_LINES)
+    started = time.perf_counter()
+    for lines in batches:
+        cursor = QTextCursor(batched.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not batched.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText("\n".join(lines))
+    batched_time = time.perf_counter() - started
+
+    if legacy.toPlainText().splitlines()[-CONSOLE_MAX_LINES:] != batched.toPlainText().splitlines():
+        print("ВНИМАНИЕ: содержимое консоли различается")
+    del app
+    return legacy_time, batched_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=100_000, help="строк в секунду от дочернего процесса")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--no-gui", action="store_true", help="не измерять GUI-часть (без PyQt6)")
+    options = parser.parse_args()
+
+    legacy_lines, legacy_elapsed = run_legacy(options.rate, options.seconds)
+    batcher, batches, batched_elapsed = run_batched(options.rate, options.seconds)
+
+    print(f"дочерний процесс: {options.rate} строк/с в течение {options.seconds} с")
+    print(f"прежняя схема:  строк {len(legacy_lines)}, сигналов {len(legacy_lines)}, "
+          f"{len(legacy_lines) / legacy_elapsed:,.0f} строк/с")
+    print(f"пачки:          строк {batcher.lines_read}, сигналов {batcher.batches}, "
+          f"{batcher.lines_read / batched_elapsed:,.0f} строк/с, не показано {batcher.lines_dropped}")
+
+    if not options.no_gui:
+        legacy_time, batched_time = gui_cost(legacy_lines, batches)
+        print(f"GUI-поток, прежний update_output: {legacy_time * 1000:.0f} мс "
+              f"({legacy_time / options.seconds * 100:.0f}% времени работы процесса)")
+        print(f"GUI-поток, вставка пачек:         {batched_time * 1000:.0f} мс "
+              f"({batched_time / options.seconds * 100:.1f}% времени работы процесса)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import re
 import logging
 
 from PyQt6.QtGui import QGuiApplication
@@ -10,6 +9,8 @@ from qfluentwidgets import PushButton, TextEdit, LineEdit, ComboBox
 
 from utils.utils import tr, settings, BASE_FOLDER
 from utils import theme_utils
+from utils.bat_converter import ConvertError, convert_command, format_section
+from utils.config_loader import SCRIPT_OPTIONS_SECTION
 
 class ConfigConverterDialog(QDialog):
     def __init__(self, parent=None):
@@ -81,7 +82,12 @@ class ConfigConverterDialog(QDialog):
         command = self.input_text.toPlainText()
 
         self.logger.info(f"Конвертация команды для конфигурации '{config_name}' с методом '{method}'")
-        converted_config = self._convert_command_to_config(command, config_name, method, add_script_options)
+        try:
+            converted_config = self._convert_command_to_config(command, config_name, method, add_script_options)
+        except ConvertError as e:
+            self.logger.warning(f"Не удалось конвертировать команду: {e}")
+            QMessageBox.warning(self, tr("Ошибка"), tr("Не удалось конвертировать команду: {error}").format(error=e))
+            return
         self.output_text.setPlainText(converted_config)
 
     def copy_to_clipboard(self):
@@ -113,12 +119,6 @@ class ConfigConverterDialog(QDialog):
                 QMessageBox.warning(self, tr("Ошибка"), tr("Не удалось сохранить файл!"))
 
     def _convert_command_to_config(self, command: str, config_name: str, method: str, add_script_options: bool) -> str:
-        # Очистка команды
-        command = re.sub(r'start.*?winws\.exe', '', command, flags=re.IGNORECASE).strip()
-        command = command.replace('"', '').replace('^', '').strip()
-
-        args = [arg.strip() for arg in re.split(r'\s+--', command) if arg.strip()]
-
         # Определение переменной hostlist в зависимости от метода
         method_map = {
             tr("Общий метод"): "{BLACKLIST_FILES_2}",
@@ -127,35 +127,13 @@ class ConfigConverterDialog(QDialog):
         }
         hostlist_var = method_map.get(method, "{BLACKLIST_FILES_2}")
 
-        variables = {
-            "%~dp0": "{ZAPRET_FOLDER}\\",
-            "%~dp0ipset-discord.txt": "{BLACKLIST_FOLDER}\\ipset-discord.txt",
-            "%~dp0tls_clienthello_www_google_com.bin": "{ZAPRET_FOLDER}\\tls_clienthello_www_google_com.bin",
-            "%~dp0quic_initial_www_google_com.bin": "{ZAPRET_FOLDER}\\quic_initial_www_google_com.bin",
-        }
-
-        formatted_args = []
-        for arg in args:
-            if not arg.startswith("--"):
-                arg = f"--{arg}"
-
-            if arg.startswith("--hostlist"):
-                arg = f"--hostlist={hostlist_var};"
-            else:
-                if arg.startswith("--ipset"):
-                    arg = arg.replace("%~dp0", "{BLACKLIST_FOLDER}\\")
-                else:
-                    for key, value in variables.items():
-                        arg = arg.replace(key, value)
-
-            formatted_args.append(f"    {arg};")
+        section = convert_command(command, config_name, hostlist_var)
+        for warning in section.warnings:
+            self.logger.warning(f"Конвертация '{config_name}': {warning}")
 
         config_lines = []
         if add_script_options:
-            config_lines.append("[SCRIPT_OPTIONS]\n")
-        config_lines.append(f"[{config_name}]")
-        config_lines.append("executable = {ZAPRET_FOLDER}\\winws.exe")
-        config_lines.append("args =")
-        config_lines.extend(formatted_args)
+            config_lines.append(f"[{SCRIPT_OPTIONS_SECTION}]\n")
+        config_lines.append(format_section(config_name, section.args))
 
-        return "\n".join(config_lines)
\ No newline at end of file
+        return "\n".join(config_lines)
@@ -1,11 +1,13 @@
-import configparser
+import html
+import ipaddress
 import logging
 import os
-from typing import List, Optional
+import time
+from typing import List, Optional, Tuple
 
 from PyQt6 import QtCore, QtGui, QtWidgets
-from PyQt6.QtCore import pyqtSlot, QTimer
-from PyQt6.QtGui import QAction, QIcon, QTextCursor
+from PyQt6.QtCore import pyqtSlot, QFileSystemWatcher, QTimer
+from PyQt6.QtGui import QAction, QIcon, QTextBlockFormat, QTextCharFormat, QTextCursor
 from PyQt6.QtWidgets import (
     QCheckBox,
     QFileDialog,
@@ -21,11 +23,23 @@ from PyQt6.QtWidgets import (
     QGridLayout,
 )
 
-from qfluentwidgets import ComboBox as QFComboBox, PushButton, TextEdit, FluentIcon
-
+from qfluentwidgets import ComboBox as QFComboBox, PushButton, TextEdit, LineEdit, FluentIcon
+
+from utils.config_library import ConfigLibrary, validate_document
+from utils.config_lint import Cost, lint_options
+from utils.domain_index import HostlistIndexes
+from utils.ipset_utils import IpsetTree
+from utils.port_set import PortSet
+from utils.profile_dedup import args_diff, dedup_profiles
+from utils.args_file import args_file_command
+from utils.winws_filter import compile_capture_filter
+from utils.winws_profile import WinwsCommand
 from utils.update_utils import UpdateChecker
 from utils.utils import (
     BASE_FOLDER,
+    BLACKLIST_FILES,
+    CACHE_FOLDER,
+    IPSET_FILES,
     CURRENT_VERSION,
     ZAPRET_FOLDER,
     CONFIG_VERSION,
@@ -39,6 +53,7 @@ from utils.utils import (
     enable_autostart,
     is_autostart_enabled,
     load_script_options,
+    read_config,
     open_path,
     set_language,
     tr,
@@ -49,11 +64,23 @@ from gui.updater_manager import SettingsDialog
 from gui.proxy_window import ProxySettingsDialog
 from gui.converter import ConfigConverterDialog
 
-from utils.process_utils import WorkerThread
+from utils.process_utils import STOP_TIMEOUT, WorkerThread, stop_workers
+from utils.supervisor import Supervisor
+from utils.winws_metrics import WinwsMetrics
+from utils.winws_output import ConsoleFilter, WinwsEvent, WinwsOutputParser
 from utils.service_utils import stop_service
 
 # Путь к иконке приложения
 TRAY_ICON_PATH = os.path.join(BASE_FOLDER, "resources", "icon", "newicon.ico")
+# Задержка перед перезагрузкой изменённой конфигурации, мс
+CONFIG_RELOAD_DELAY_MS = 500
+# Сколько замечаний линтера выводить в консоль; полный список пишется в лог
+LINT_CONSOLE_LIMIT = 10
+LINT_COST_LABELS = {Cost.HIGH: "высокая", Cost.MEDIUM: "средняя", Cost.LOW: "низкая"}
+# Консоль хранит не больше стольких строк; лишние удаляет сам документ
+CONSOLE_MAX_LINES = 100
+# Общий срок остановки при выходе: процессы, потоки и служба WinDivert, сек
+SHUTDOWN_TIMEOUT = 10.0
 
 logger = logging.getLogger("dpipenguin")
 
@@ -64,23 +91,53 @@ class UpdateBlacklistsThread(QtCore.QThread):
         self.success = False
 
     def run(self):
-        update_checker = UpdateChecker()
-        self.success = update_checker.update_blacklists()
+        with UpdateChecker() as update_checker:
+            self.success = update_checker.update_blacklists()
 
 class CheckUpdatesThread(QtCore.QThread):
     updates_available_signal = QtCore.pyqtSignal(bool)
 
     def run(self):
-        update_checker = UpdateChecker()
-        update_checker.get_local_versions()
-        update_checker.get_remote_versions()
-        updates_available = any([
-            update_checker.is_update_available('ver_programm'),
-            update_checker.is_update_available('zapret'),
-            update_checker.is_update_available('config')
-        ])
+        with UpdateChecker() as update_checker:
+            update_checker.get_local_versions()
+            update_checker.get_remote_versions()
+            updates_available = any([
+                update_checker.is_update_available('ver_programm'),
+                update_checker.is_update_available('zapret'),
+                update_checker.is_update_available('config')
+            ])
         self.updates_available_signal.emit(updates_available)
 
+class DomainCheckThread(QtCore.QThread):
+    result_signal = QtCore.pyqtSignal(str, dict)
+
+    def __init__(self, indexes: HostlistIndexes, host: str, parent=None):
+        super().__init__(parent)
+        self.indexes = indexes
+        self.host = host
+
+    def run(self):
+        try:
+            if self.is_ip_address(self.host):
+                result = {
+                    path: IpsetTree.load(path).lookup(self.host)
+                    for path in IPSET_FILES if os.path.exists(path)
+                }
+            else:
+                result = self.indexes.check(self.host)
+        except Exception as e:
+            logger.exception(f"Ошибка проверки домена {self.host}: {e}")
+            result = {}
+        self.result_signal.emit(self.host, result)
+
+    @staticmethod
+    def is_ip_address(text: str) -> bool:
+        try:
+            ipaddress.ip_address(text)
+            return True
+        except ValueError:
+            return False
+
 class DPIPenguin(QtWidgets.QMainWindow):
     """
     Главное окно приложения DPI Penguin.
@@ -110,11 +167,38 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         self.main_worker_thread: Optional[WorkerThread] = None
         self.winws_worker_thread: Optional[WorkerThread] = None
+        # Секция и итоговая команда запущенного обхода: по ним решается, нужен ли перезапуск
+        self.running_section: Optional[str] = None
+        self.running_command: Optional[List[str]] = None
+        # Команда, которой обход запущен фактически (с учётом файла аргументов): по ней он перезапускается
+        self.running_launch_command: Optional[List[str]] = None
+        self.supervisor = Supervisor()
+        # Число профилей, размеры и время загрузки списков из вывода winws
+        self.winws_metrics = WinwsMetrics()
+        # Момент завершения упавшего процесса и назначенная задержка перезапуска
+        self.pending_restart: Optional[Tuple[float, float]] = None
+        self.hostlist_indexes = HostlistIndexes(BLACKLIST_FILES, os.path.join(CACHE_FOLDER, "index"))
+        self.config_library = ConfigLibrary(
+            [os.path.join(BASE_FOLDER, "config")] + settings.value("config_library_dirs", [], type=list),
+            os.path.join(CACHE_FOLDER, "config_library.json"),
+        )
 
         # Инициализация интерфейса и трей-иконки
         self.init_ui()
         self.init_tray_icon()
 
+        # Слежение за файлом конфигурации: перезагрузка откладывается, пока файл сохраняется
+        self.config_reload_timer = QTimer(self)
+        self.config_reload_timer.setSingleShot(True)
+        self.config_reload_timer.setInterval(CONFIG_RELOAD_DELAY_MS)
+        self.config_reload_timer.timeout.connect(self.on_config_reload_timeout)
+        self.restart_timer = QTimer(self)
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self.restart_bypass)
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
+        self.watch_current_config()
+
         # Обработка ошибок конфигурации
         if self.config_error:
             self.console_output.append(self.config_error)
@@ -123,6 +207,8 @@ class DPIPenguin(QtWidgets.QMainWindow):
             self.run_button.setEnabled(False)
             self.stop_close_button.setEnabled(False)
             self.update_config_button.setEnabled(True)
+        else:
+            self.report_config_lint()
 
         # Запуск дополнительных задач
         if settings.value("update_blacklists_on_start", False, type=bool):
@@ -143,6 +229,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
     def on_update_blacklists_finished(self):
         success = self.update_blacklists_thread.success
+        self.hostlist_indexes.invalidate()
         if not self.update_blacklists_thread.silent:
             if success:
                 QMessageBox.information(self, tr("Обновление"), tr("Черные списки успешно обновлены"))
@@ -287,6 +374,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
         tab_widget = QTabWidget(self)
         tab_widget.addTab(self.create_process_tab(), tr("Основное"))
         tab_widget.addTab(self.create_settings_tab(), tr("Настройки"))
+        tab_widget.addTab(self.create_diagnostics_tab(), tr("Диагностика"))
         tab_widget.addTab(self.create_info_tab(), tr("О программе"))
         return tab_widget
 
@@ -308,7 +396,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         self.update_config_button = self.create_button(
             text="...",
-            func=self.load_config_via_dialog,
+            func=self.show_config_library_menu,
             layout=script_layout,
             icon=FluentIcon.FOLDER,
             icon_size=(16, 16),
@@ -330,6 +418,11 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         process_layout.addLayout(script_layout)
 
+        self.capture_size_label = QLabel()
+        process_layout.addWidget(self.capture_size_label)
+        self.selected_script.currentIndexChanged.connect(self.update_capture_size_label)
+        self.update_capture_size_label()
+
         buttons_layout = QHBoxLayout()
         self.run_button = self.create_button(tr("Запустить"), self.run_exe, buttons_layout)
         self.stop_close_button = self.create_button(
@@ -342,6 +435,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         self.console_output = TextEdit(self)
         self.console_output.setReadOnly(True)
+        self.console_output.document().setMaximumBlockCount(CONSOLE_MAX_LINES)
         process_layout.addWidget(self.console_output)
 
         log_and_config_layout = QHBoxLayout()
@@ -377,6 +471,32 @@ class DPIPenguin(QtWidgets.QMainWindow):
         Включает или отключает Game Filter и сохраняет настройку.
         """
         settings.setValue("game_filter_enabled", checked)
+        self.update_capture_size_label()
+
+    def toggle_narrow_capture_filter(self, checked: bool) -> None:
+        """
+        Включает или отключает автоматическое сужение --wf-tcp/--wf-udp.
+        """
+        settings.setValue("narrow_capture_filter", checked)
+        self.update_capture_size_label()
+
+    def toggle_dedup_profiles(self, checked: bool) -> None:
+        """
+        Включает или отключает объединение эквивалентных профилей при запуске.
+        """
+        settings.setValue("dedup_profiles", checked)
+
+    def toggle_args_file_mode(self, checked: bool) -> None:
+        """
+        Включает или отключает передачу аргументов winws через файл (@file).
+        """
+        settings.setValue("args_file_mode", checked)
+
+    def toggle_auto_restart(self, checked: bool) -> None:
+        """
+        Включает или отключает автоматический перезапуск обхода после падения.
+        """
+        settings.setValue("auto_restart", checked)
 
     def open_converter(self):
         self.converter_window = ConfigConverterDialog(self)
@@ -496,6 +616,30 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         autostart_layout.addWidget(self.game_filter_checkbox)
 
+        self.narrow_capture_filter_checkbox = QCheckBox(tr("Сужать перехват WinDivert до портов профилей"))
+        self.narrow_capture_filter_checkbox.setChecked(settings.value("narrow_capture_filter", False, type=bool))
+        self.narrow_capture_filter_checkbox.toggled.connect(self.toggle_narrow_capture_filter)
+        self.narrow_capture_filter_checkbox.setFont(font)
+        autostart_layout.addWidget(self.narrow_capture_filter_checkbox)
+
+        self.dedup_profiles_checkbox = QCheckBox(tr("Объединять одинаковые профили winws при запуске"))
+        self.dedup_profiles_checkbox.setChecked(settings.value("dedup_profiles", False, type=bool))
+        self.dedup_profiles_checkbox.toggled.connect(self.toggle_dedup_profiles)
+        self.dedup_profiles_checkbox.setFont(font)
+        autostart_layout.addWidget(self.dedup_profiles_checkbox)
+
+        self.args_file_checkbox = QCheckBox(tr("Передавать аргументы winws через файл"))
+        self.args_file_checkbox.setChecked(settings.value("args_file_mode", False, type=bool))
+        self.args_file_checkbox.toggled.connect(self.toggle_args_file_mode)
+        self.args_file_checkbox.setFont(font)
+        autostart_layout.addWidget(self.args_file_checkbox)
+
+        self.auto_restart_checkbox = QCheckBox(tr("Перезапускать обход при аварийном завершении"))
+        self.auto_restart_checkbox.setChecked(settings.value("auto_restart", False, type=bool))
+        self.auto_restart_checkbox.toggled.connect(self.toggle_auto_restart)
+        self.auto_restart_checkbox.setFont(font)
+        autostart_layout.addWidget(self.auto_restart_checkbox)
+
         font = self.tray_checkbox.font()
         font.setPointSize(9)
         self.tray_checkbox.setFont(font)
@@ -572,6 +716,80 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         return settings_tab
 
+    def create_diagnostics_tab(self) -> QWidget:
+        """
+        Создаёт вкладку "Диагностика" с проверкой покрытия домена списками.
+        """
+        diagnostics_tab = QWidget()
+        diagnostics_layout = QVBoxLayout(diagnostics_tab)
+
+        self.domain_check_group = QGroupBox(tr("Проверка домена"))
+        domain_check_layout = QVBoxLayout()
+        self.domain_check_group.setLayout(domain_check_layout)
+
+        input_layout = QHBoxLayout()
+        self.domain_check_input = LineEdit(self)
+        self.domain_check_input.setPlaceholderText(tr("Введите домен или IP, например youtube.com"))
+        self.domain_check_input.returnPressed.connect(self.check_domain)
+        input_layout.addWidget(self.domain_check_input)
+
+        self.domain_check_button = self.create_button(
+            text=tr("Проверить"),
+            func=self.check_domain,
+            layout=input_layout,
+            icon=FluentIcon.SEARCH,
+            icon_size=(16, 16)
+        )
+        domain_check_layout.addLayout(input_layout)
+
+        self.domain_check_result = QLabel(tr("Покажет, в каких черных списках и ipset есть домен или адрес"))
+        self.domain_check_result.setWordWrap(True)
+        domain_check_layout.addWidget(self.domain_check_result)
+
+        diagnostics_layout.addWidget(self.domain_check_group)
+
+        self.winws_metrics_group = QGroupBox(tr("Загрузка списков winws"))
+        winws_metrics_layout = QVBoxLayout()
+        self.winws_metrics_group.setLayout(winws_metrics_layout)
+        self.winws_metrics_label = QLabel()
+        self.winws_metrics_label.setWordWrap(True)
+        winws_metrics_layout.addWidget(self.winws_metrics_label)
+        self.update_winws_metrics_display()
+
+        diagnostics_layout.addWidget(self.winws_metrics_group)
+        diagnostics_layout.addStretch(1)
+        return diagnostics_tab
+
+    def check_domain(self) -> None:
+        """
+        Запускает проверку домена по индексам черных списков или IP-адреса по ipset.
+        """
+        host = self.domain_check_input.text().strip()
+        if not host or not self.domain_check_button.isEnabled():
+            return
+        self.domain_check_button.setEnabled(False)
+        self.domain_check_result.setText(tr("Проверка..."))
+        self.domain_check_thread = DomainCheckThread(self.hostlist_indexes, host, self)
+        self.domain_check_thread.result_signal.connect(self.on_domain_checked)
+        self.domain_check_thread.start()
+
+    def on_domain_checked(self, host: str, result: dict) -> None:
+        """
+        Отображает результат проверки домена.
+        """
+        self.domain_check_button.setEnabled(True)
+        if not result:
+            self.domain_check_result.setText(tr("Не удалось проверить домен. Проверьте логи для подробностей."))
+            return
+        lines = []
+        for source, entry in result.items():
+            name = os.path.basename(source)
+            if entry:
+                lines.append(f"✅ {name}: {entry}")
+            else:
+                lines.append(f"❌ {name}")
+        self.domain_check_result.setText(f"<b>{html.escape(host)}</b><br>" + "<br>".join(lines))
+
     def change_language(self) -> None:
         """
         Обработчик изменения языка приложения.
@@ -605,6 +823,29 @@ class DPIPenguin(QtWidgets.QMainWindow):
             index = self.selected_script.findData(current_data)
             if index >= 0:
                 self.selected_script.setCurrentIndex(index)
+        self.update_capture_size_label()
+
+    def update_capture_size_label(self) -> None:
+        """
+        Показывает, сколько портов TCP/UDP перехватит WinDivert для выбранной секции.
+        """
+        selected_option = self.selected_script.currentData()
+        if self.config_error or selected_option not in self.script_options:
+            self.capture_size_label.clear()
+            return
+
+        script_options, config_error = load_script_options(self.current_config_path)
+        if config_error or selected_option not in script_options:
+            script_options = self.script_options
+        plan = compile_capture_filter(WinwsCommand.parse(script_options[selected_option][1]))
+        if plan.skipped or not plan.filters:
+            self.capture_size_label.clear()
+            return
+
+        sizes = plan.capture_size(narrowed=settings.value("narrow_capture_filter", False, type=bool))
+        self.capture_size_label.setText(
+            tr("Перехват WinDivert: TCP {tcp} портов, UDP {udp} портов").format(tcp=sizes["tcp"], udp=sizes["udp"])
+        )
 
     def create_info_tab(self) -> QWidget:
         """
@@ -774,44 +1015,34 @@ class DPIPenguin(QtWidgets.QMainWindow):
 
         settings.setValue("last_selected_script", selected_option)
 
-        executable, args = self.script_options[selected_option]
-
-        game_filter_enabled = settings.value("game_filter_enabled", False, type=bool)
-        game_filter_ports = settings.value("game_filter_ports", "1024-65535", type=str).strip()
-        if game_filter_enabled and not game_filter_ports:
-            logger.error("Game Filter включён, но порты не заданы")
-            self.console_output.append(tr("Ошибка: Порты для Game Filter не заданы"))
+        command, messages, error_msg = self.build_command(self.current_config_path, selected_option)
+        if error_msg:
+            self.logger.error(error_msg)
+            self.console_output.append(error_msg)
             return
 
-        modified_args = []
-        for arg in args:
-            if "{GAME_FILTER}" in arg:
-                if game_filter_enabled and game_filter_ports:
-                    new_arg = arg.replace("{GAME_FILTER}", game_filter_ports)
-                else:
-                    new_arg = ""  # Пропускаем аргумент, если Game Filter выключен
-            else:
-                new_arg = arg
-            if new_arg:
-                modified_args.append(new_arg)
-        args = modified_args
-
-        if not self.is_executable_available(executable, selected_option):
+        if not self.is_executable_available(command[0], selected_option):
             return
 
+        launch_command = self.apply_args_file(command)
+
         translated_option = tr(selected_option)
         clear_console_text = tr("Установка: {option} запущена...").format(option=translated_option)
 
-        command = [executable] + args
-
         try:
             self.start_main_process(
-                command,
+                launch_command,
                 selected_option,
                 disable_run=True,
                 clear_console_text=clear_console_text,
                 capture_output=True
             )
+            for message in messages:
+                self.console_output.append(message)
+            self.running_section = selected_option
+            self.running_command = command
+            self.running_launch_command = launch_command
+            self.supervisor.reset()
 
             winws_path = os.path.join(ZAPRET_FOLDER, "winws.exe")
             self.start_winws(winws_path)
@@ -824,6 +1055,80 @@ class DPIPenguin(QtWidgets.QMainWindow):
         if auto_run:
             settings.setValue("last_config_path", self.current_config_path)
 
+    def build_command(
+        self, config_path: str, section: str
+    ) -> Tuple[Optional[List[str]], List[str], Optional[str]]:
+        """
+        Собирает итоговую команду секции под текущие настройки (Game Filter,
+        сужение перехвата, объединение профилей).
+        Возвращает (команда, сообщения для консоли, ошибка).
+        """
+        game_filter_enabled = settings.value("game_filter_enabled", False, type=bool)
+        game_filter_ports = settings.value("game_filter_ports", "1024-65535", type=str).strip()
+        if game_filter_enabled and not game_filter_ports:
+            logger.error("Game Filter включён, но порты не заданы")
+            return None, [], tr("Ошибка: Порты для Game Filter не заданы")
+        if game_filter_enabled:
+            try:
+                PortSet.parse(game_filter_ports)
+            except ValueError as e:
+                return None, [], tr("Ошибка: Некорректные порты Game Filter: {error}").format(error=e)
+
+        # Аргументы рендерятся из скомпилированных шаблонов под текущие настройки Game Filter;
+        # для неизменённого файла это один stat и поиск в кэше
+        script_options, config_error = load_script_options(config_path)
+        if config_error:
+            return None, [], config_error
+        if section not in script_options:
+            return None, [], tr("Ошибка: неизвестный вариант скрипта {option}.").format(option=section)
+        executable, args = script_options[section]
+
+        args, filter_messages = self.apply_capture_filter(args)
+        args, dedup_messages = self.apply_profile_dedup(args)
+        return [executable] + args, filter_messages + dedup_messages, None
+
+    def is_running_command_unchanged(self, config_path: str) -> bool:
+        """
+        Проверяет, что у запущенной секции в конфигурации config_path
+        итоговая команда та же, с которой она была запущена.
+        """
+        if self.main_worker_thread is None or self.running_command is None:
+            return False
+        command, _messages, error_msg = self.build_command(config_path, self.running_section)
+        return error_msg is None and command == self.running_command
+
+    def stop_worker_threads(self) -> None:
+        """
+        Останавливает процесс обхода и поток winws.exe.
+        """
+        # Сигналы отключаются заранее: запоздалый finished_signal старого потока
+        # не должен сбросить поток, запущенный сразу после остановки
+        workers = [worker for worker in (self.main_worker_thread, self.winws_worker_thread) if worker is not None]
+        for worker in workers:
+            self.disconnect_worker(worker)
+        self.restart_timer.stop()
+        self.pending_restart = None
+        stop_workers(workers)
+        self.main_worker_thread = None
+        self.winws_worker_thread = None
+
+        self.running_section = None
+        self.running_command = None
+        self.running_launch_command = None
+
+    @staticmethod
+    def disconnect_worker(worker: WorkerThread) -> None:
+        """
+        Отключает сигналы потока перед остановкой: запоздалые сигналы старого
+        потока не должны попасть в обработчики нового.
+        """
+        for signal in (worker.output_signal, worker.output_batch_signal, worker.event_signal,
+                       worker.started_signal, worker.finished_signal, worker.error_signal):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass
+
     def is_executable_available(self, executable, selected_option):
         """
         Проверяет доступность исполняемого файла.
@@ -838,36 +1143,109 @@ class DPIPenguin(QtWidgets.QMainWindow):
             return False
         return True
 
+    def apply_capture_filter(self, args: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Сравнивает --wf-tcp/--wf-udp с портами профилей. Возвращает аргументы
+        (суженные, если включена настройка) и сообщения для консоли.
+        """
+        command = WinwsCommand.parse(args)
+        plan = compile_capture_filter(command)
+        if plan.skipped:
+            self.logger.info(f"Анализ фильтра WinDivert пропущен: {plan.skipped}")
+            return args, []
+
+        messages = []
+        for protocol, excess in plan.excess.items():
+            message = tr(
+                "Внимание: WinDivert перехватывает порты {protocol}, которые не обрабатывает ни один профиль: "
+                "{ports} ({count} портов)"
+            ).format(protocol=protocol.upper(), ports=excess, count=len(excess))
+            self.logger.warning(message)
+            messages.append(message)
+
+        if messages and settings.value("narrow_capture_filter", False, type=bool):
+            args = plan.narrow(command)
+            message = tr("Перехват WinDivert сужен до портов профилей")
+            self.logger.info(message)
+            messages.append(message)
+        return args, messages
+
+    def apply_profile_dedup(self, args: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Объединяет эквивалентные профили winws, если включена настройка.
+        Возвращает аргументы и сообщения для консоли; diff пишется в лог.
+        """
+        if not settings.value("dedup_profiles", False, type=bool):
+            return args, []
+
+        command, report = dedup_profiles(WinwsCommand.parse(args))
+        if not report.merged:
+            return args, []
+
+        new_args = command.to_args()
+        self.logger.debug("Объединение профилей winws:\n" + "\n".join(args_diff(args, new_args)))
+        message = tr("Объединено профилей winws: {merged} из {total}").format(
+            merged=report.merged, total=report.total
+        )
+        self.logger.info(message)
+        return new_args, [message]
+
+    def apply_args_file(self, command: List[str]) -> List[str]:
+        """
+        Если включена настройка, передаёт аргументы через файл в кэше (@file):
+        в командной строке остаётся только путь к нему.
+        """
+        if not settings.value("args_file_mode", False, type=bool):
+            return command
+        try:
+            launch_command = args_file_command(command, os.path.join(CACHE_FOLDER, "args"))
+        except OSError as e:
+            self.logger.warning(f"Не удалось записать файл аргументов, аргументы передаются в командной строке: {e}")
+            return command
+        if launch_command is command:
+            self.logger.info("Аргументы содержат кавычки или переводы строк, файл аргументов не используется")
+        return launch_command
+
     def start_main_process(
         self,
         command: List[str],
         process_name: str,
         disable_run: bool = False,
         clear_console_text: Optional[str] = None,
-        capture_output: bool = True
+        capture_output: bool = True,
+        started_slot=None
     ) -> None:
         """
-        Запускает основной процесс через WorkerThread.
+        Запускает основной процесс через WorkerThread. started_slot вызывается,
+        когда процесс создан.
         """
         if clear_console_text:
             self.clear_console(clear_console_text)
 
         try:
             if self.main_worker_thread is not None:
-                self.main_worker_thread.terminate_process()
-                self.main_worker_thread.quit()
-                self.main_worker_thread.wait()
+                self.disconnect_worker(self.main_worker_thread)
+                stop_workers([self.main_worker_thread])
                 self.main_worker_thread = None
 
             self.main_worker_thread = WorkerThread(
                 command=command,
                 process_name=process_name,
-                capture_output=capture_output
+                capture_output=capture_output,
+                line_filter=ConsoleFilter(tr("Ваша конфигурация выполняется")),
+                max_batch_lines=CONSOLE_MAX_LINES,
+                output_parser=WinwsOutputParser() if capture_output else None
             )
             if capture_output:
                 self.main_worker_thread.output_signal.connect(self.update_output)
+                self.main_worker_thread.output_batch_signal.connect(self.append_output_batch)
+                self.main_worker_thread.event_signal.connect(self.on_winws_event)
+                self.winws_metrics.begin_run()
+                self.update_winws_metrics_display()
             self.main_worker_thread.finished_signal.connect(self.on_finished)
             self.main_worker_thread.error_signal.connect(self.handle_error)
+            if started_slot is not None:
+                self.main_worker_thread.started_signal.connect(started_slot)
 
             self.main_worker_thread.start()
 
@@ -883,63 +1261,145 @@ class DPIPenguin(QtWidgets.QMainWindow):
         """
         Обновляет консоль вывода.
         """
-        ignore_keywords = [
-            "loading hostlist",
-            "we have",
-            "desync profile(s)",
-            "loaded hosts",
-            "loading plain text list",
-            "loaded",
-            "loading ipset",
-            "github version"
-        ]
+        self.console_output.append(text)
 
-        text_lower = text.lower()
+    @pyqtSlot(list)
+    def append_output_batch(self, lines: List[str]) -> None:
+        """
+        Добавляет пачку уже отфильтрованных строк вывода одной вставкой.
+        """
+        scrollbar = self.console_output.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.console_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not self.console_output.document().isEmpty():
+            cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+        cursor.insertText("\n".join(lines), QTextCharFormat())
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
-        if "windivert initialized. capture is started." in text_lower:
-            self.console_output.append(tr("Ваша конфигурация выполняется"))
-        elif any(keyword in text_lower for keyword in ignore_keywords):
+    @pyqtSlot(object)
+    def on_winws_event(self, event: WinwsEvent) -> None:
+        """
+        Сохраняет событие из вывода winws в метриках и обновляет вкладку диагностики.
+        """
+        self.winws_metrics.record(event)
+        self.update_winws_metrics_display()
+
+    def update_winws_metrics_display(self) -> None:
+        """
+        Показывает число профилей, размер и время загрузки списков последнего запуска.
+        """
+        metrics = self.winws_metrics
+        if metrics.profiles is None and not metrics.lists and not metrics.errors:
+            self.winws_metrics_label.setText(tr("Появится после запуска обхода"))
             return
-        else:
-            self.console_output.append(text)
 
-        max_lines = 100
-        document = self.console_output.document()
-        while document.blockCount() > max_lines:
-            cursor = self.console_output.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.Start)
-            cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
-            cursor.removeSelectedText()
-            cursor.deleteChar()
+        lines = []
+        if metrics.profiles is not None:
+            lines.append(tr("Профилей: {count}").format(count=metrics.profiles))
+        if metrics.lists:
+            lines.append(tr("Списков: {lists}, записей: {entries}, загрузка: {duration} сек").format(
+                lists=len(metrics.lists), entries=metrics.total_entries, duration=f"{metrics.total_load_time:.2f}"
+            ))
+        for item in sorted(metrics.lists.values(), key=lambda item: item.duration or 0.0, reverse=True):
+            duration = tr("{duration} мс").format(duration=f"{item.duration * 1000:.0f}") if item.duration is not None else "—"
+            lines.append(f"{html.escape(item.name)}: {item.entries} · {duration}")
+        if metrics.startup is not None:
+            lines.append(tr("Перехват запущен через {duration} сек").format(duration=f"{metrics.startup:.2f}"))
+        lines.extend(f"❌ {html.escape(message)}" for message in metrics.errors)
+        self.winws_metrics_label.setText("<br>".join(lines))
 
     @pyqtSlot(str)
     def on_finished(self, process_name: str) -> None:
         """
         Обработчик завершения процесса.
         """
-        if process_name in self.script_options or process_name == "winws.exe":
-            if process_name != "winws.exe":
-                self.run_button.setEnabled(True)
-                self.stop_close_button.setEnabled(False)
-                self.console_output.append(tr("Обход блокировки завершен"))
-
-            if process_name == "winws.exe":
-                if self.winws_worker_thread:
-                    try:
-                        self.winws_worker_thread.finished_signal.disconnect(self.on_finished)
-                        self.winws_worker_thread.error_signal.disconnect(self.handle_error)
-                    except TypeError:
-                        pass
-                    self.winws_worker_thread = None
-            else:
-                if self.main_worker_thread:
-                    try:
-                        self.main_worker_thread.output_signal.disconnect(self.update_output)
-                        self.main_worker_thread.finished_signal.disconnect(self.on_finished)
-                        self.main_worker_thread.error_signal.disconnect(self.handle_error)
-                    except TypeError:
-                        pass
-                    self.main_worker_thread = None
+        if process_name == "winws.exe":
+            if self.winws_worker_thread:
+                try:
+                    self.winws_worker_thread.finished_signal.disconnect(self.on_finished)
+                    self.winws_worker_thread.error_signal.disconnect(self.handle_error)
+                except TypeError:
+                    pass
+                self.winws_worker_thread = None
+            return
+
+        if process_name not in self.script_options:
+            return
+
+        worker = self.main_worker_thread
+        if worker:
+            try:
+                worker.output_signal.disconnect(self.update_output)
+                worker.output_batch_signal.disconnect(self.append_output_batch)
+                worker.event_signal.disconnect(self.on_winws_event)
+                worker.finished_signal.disconnect(self.on_finished)
+                worker.error_signal.disconnect(self.handle_error)
+            except TypeError:
+                pass
+            self.main_worker_thread = None
+
+        if self.schedule_restart(worker):
+            return
+
+        self.run_button.setEnabled(True)
+        self.stop_close_button.setEnabled(False)
+        self.console_output.append(tr("Обход блокировки завершен"))
+        self.running_section = None
+        self.running_command = None
+        self.running_launch_command = None
+
+    def schedule_restart(self, worker: Optional[WorkerThread]) -> bool:
+        """
+        Если процесс обхода завершился сам и включён автоперезапуск, назначает
+        перезапуск той же команды с задержкой от супервизора. False — перезапуска не будет.
+        """
+        if (worker is None or worker.stop_requested or self.running_launch_command is None
+                or not settings.value("auto_restart", False, type=bool)):
+            return False
+
+        delay = self.supervisor.on_exit(worker.returncode, worker.uptime)
+        if delay is None:
+            self.console_output.append(tr("Обход завершается слишком часто, автоперезапуск остановлен"))
+            self.logger.info("История перезапусков:\n" + "\n".join(self.supervisor.summary()))
+            return False
+
+        self.console_output.append(
+            tr("Обход завершился с кодом {code}, перезапуск через {delay} сек").format(
+                code=worker.returncode, delay=f"{delay:.1f}"
+            )
+        )
+        self.pending_restart = (worker.exited_at or time.monotonic(), delay)
+        self.restart_timer.start(int(delay * 1000))
+        return True
+
+    def restart_bypass(self) -> None:
+        """
+        Перезапускает упавший обход той же командой, без повторной сборки аргументов.
+        """
+        if self.running_launch_command is None or self.pending_restart is None:
+            return
+        if self.running_launch_command != self.running_command:
+            # Файл аргументов мог быть удалён очисткой кэша: он записывается заново
+            # (имя — хэш содержимого, поэтому путь не меняется)
+            self.running_launch_command = self.apply_args_file(self.running_command)
+        self.start_main_process(
+            self.running_launch_command,
+            self.running_section,
+            disable_run=True,
+            capture_output=True,
+            started_slot=self.on_bypass_restarted,
+        )
+
+    @pyqtSlot(str)
+    def on_bypass_restarted(self, _process_name: str) -> None:
+        if self.pending_restart is None or self.main_worker_thread is None:
+            return
+        exited_at, delay = self.pending_restart
+        self.pending_restart = None
+        started_at = self.main_worker_thread.started_at or time.monotonic()
+        self.supervisor.on_restarted(max(0.0, started_at - exited_at - delay))
 
     @pyqtSlot(str)
     def handle_error(self, error_message: str) -> None:
@@ -953,27 +1413,19 @@ class DPIPenguin(QtWidgets.QMainWindow):
         """
         Завершает все запущенные процессы и закрывает приложение.
         """
-        if self.main_worker_thread is not None:
-            self.main_worker_thread.terminate_process()
-            self.main_worker_thread.quit()
-            if not self.main_worker_thread.wait(5000):
-                self.logger.warning(tr("Основной WorkerThread не завершился в течение 5 секунд. Принудительно заверяем"))
-                self.main_worker_thread.terminate()
-                self.main_worker_thread.wait()
-            self.main_worker_thread = None
-
-        if self.winws_worker_thread is not None:
-            self.winws_worker_thread.terminate_process()
-            self.winws_worker_thread.quit()
-            if not self.winws_worker_thread.wait(5000):
-                self.logger.warning(tr("WorkerThread для winws.exe не завершился в течение 5 секунд. Принудительно заверяем"))
-                self.winws_worker_thread.terminate()
-                self.main_worker_thread.wait()
-            self.winws_worker_thread = None
+        # Процессы завершаются одновременно, служба получает остаток общего срока
+        started = time.monotonic()
+        self.restart_timer.stop()
+        stop_workers([self.main_worker_thread, self.winws_worker_thread], timeout=STOP_TIMEOUT)
+        self.main_worker_thread = None
+        self.winws_worker_thread = None
+        self.running_section = None
+        self.running_command = None
+        self.running_launch_command = None
 
         service_name = "WinDivert"
         try:
-            stop_service(service_name)
+            stop_service(service_name, timeout=max(1.0, SHUTDOWN_TIMEOUT - (time.monotonic() - started)))
         except Exception as e:
             self.logger.error(tr(f"Ошибка при остановке службы '{service_name}': {e}"))
             QMessageBox.warning(
@@ -981,6 +1433,7 @@ class DPIPenguin(QtWidgets.QMainWindow):
                 tr("Ошибка"),
                 tr(f"Не удалось остановить службу '{service_name}'. Подробнее в логах."),
             )
+        self.logger.info(f"Остановка при выходе заняла {(time.monotonic() - started) * 1000:.0f} мс")
 
     def clear_console(self, initial_text: str = "") -> None:
         """
@@ -990,9 +1443,37 @@ class DPIPenguin(QtWidgets.QMainWindow):
         if initial_text:
             self.console_output.append(initial_text)
 
+    def show_config_library_menu(self) -> None:
+        """
+        Показывает меню с конфигурациями из индекса библиотеки. Индекс
+        обновляется инкрементально: разбираются только изменившиеся файлы.
+        """
+        self.config_library.refresh()
+        menu = QMenu(self)
+        menu.setToolTipsVisible(True)
+
+        for entry in self.config_library.sorted_entries():
+            action = QAction(f"{entry.name} ({len(entry.sections)})", menu)
+            action.setCheckable(True)
+            action.setChecked(os.path.abspath(self.current_config_path) == entry.path)
+            if entry.valid:
+                action.setToolTip("\n".join(tr(name) for name in entry.sections))
+                action.triggered.connect(lambda _checked, path=entry.path: self.load_config_file(path))
+            else:
+                action.setEnabled(False)
+                action.setToolTip(tr(entry.error).format(**entry.error_args))
+            menu.addAction(action)
+
+        menu.addSeparator()
+        browse_action = QAction(tr("Обзор..."), menu)
+        browse_action.triggered.connect(self.load_config_via_dialog)
+        menu.addAction(browse_action)
+        menu.exec(self.update_config_button.mapToGlobal(self.update_config_button.rect().bottomLeft()))
+
     def load_config_via_dialog(self) -> None:
         """
         Открывает диалог выбора файла конфигурации и загружает выбранную конфигурацию.
+        Каталог выбранного файла добавляется в библиотеку конфигураций.
         """
         dialog = QFileDialog(self)
         dialog.setOption(QFileDialog.Option.ReadOnly, True)
@@ -1005,18 +1486,17 @@ class DPIPenguin(QtWidgets.QMainWindow):
         )
 
         if file_path:
-            if self.main_worker_thread is not None:
-                self.main_worker_thread.terminate_process()
-                self.main_worker_thread.quit()
-                self.main_worker_thread.wait()
-                self.main_worker_thread = None
-
-            if self.winws_worker_thread is not None:
-                self.winws_worker_thread.terminate_process()
-                self.winws_worker_thread.quit()
-                self.winws_worker_thread.wait()
-                self.winws_worker_thread = None
+            directory = os.path.dirname(os.path.abspath(file_path))
+            if self.config_library.add_directory(directory):
+                library_dirs = settings.value("config_library_dirs", [], type=list)
+                settings.setValue("config_library_dirs", library_dirs + [directory])
+            self.load_config_file(file_path)
 
+    def load_config_file(self, file_path: str) -> None:
+        """
+        Останавливает запущенные процессы и загружает конфигурацию из файла.
+        """
+        if file_path:
             validation_error = self.validate_config_file(file_path)
             if validation_error:
                 self.console_output.append(validation_error)
@@ -1031,19 +1511,61 @@ class DPIPenguin(QtWidgets.QMainWindow):
                 QMessageBox.critical(self, tr("Ошибка загрузки конфигурации"), new_config_error)
                 return
 
+            # Если в новом файле у запущенной секции та же итоговая команда, обход не прерывается
+            keep_running = self.is_running_command_unchanged(file_path)
+            if not keep_running:
+                self.stop_worker_threads()
+
             self.script_options = new_script_options
             self.config_error = None
             self.current_config_path = file_path
+            self.watch_current_config()
             self.console_output.append(tr("Конфигурация успешно загружена"))
+            self.report_config_lint()
 
             self.update_script_options_display()
             self.selected_script.setEnabled(True)
-            self.run_button.setEnabled(True)
-            self.stop_close_button.setEnabled(False)
+            self.run_button.setEnabled(not keep_running)
+            self.stop_close_button.setEnabled(keep_running)
 
             if self.autorun_with_last_config:
                 settings.setValue("last_config_path", file_path)
 
+    def report_config_lint(self) -> None:
+        """
+        Проверяет все секции загруженной конфигурации линтером и выводит
+        замечания с оценкой стоимости в консоль. Справочные замечания (log_only)
+        пишутся только в лог.
+        """
+        if not self.script_options:
+            return
+        started = time.perf_counter()
+        findings = lint_options(self.script_options)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(f"Проверка конфигурации: замечаний {len(findings)} за {elapsed_ms:.1f} мс")
+        for finding in findings:
+            self.logger.log(
+                logging.INFO if finding.log_only else logging.WARNING,
+                f"{finding.code}: [{finding.section}] {finding.message.format(**finding.params)}"
+            )
+
+        shown = [finding for finding in findings if not finding.log_only]
+        if not shown:
+            return
+        self.console_output.append(
+            tr("Проверка конфигурации: найдено замечаний: {count}").format(count=len(shown))
+        )
+        for finding in shown[:LINT_CONSOLE_LIMIT]:
+            self.console_output.append(tr("[{section}] {message} (стоимость: {cost})").format(
+                section=tr(finding.section),
+                message=tr(finding.message).format(**finding.params),
+                cost=tr(LINT_COST_LABELS[finding.cost]),
+            ))
+        if len(shown) > LINT_CONSOLE_LIMIT:
+            self.console_output.append(
+                tr("... и ещё {count}, подробности в логе").format(count=len(shown) - LINT_CONSOLE_LIMIT)
+            )
+
     def validate_config_file(self, file_path: str) -> Optional[str]:
         """
         Валидирует файл конфигурации.
@@ -1058,33 +1580,17 @@ class DPIPenguin(QtWidgets.QMainWindow):
             self.logger.error(error_msg)
             return error_msg
 
-        config = configparser.ConfigParser()
-        try:
-            config.read(file_path, encoding='utf-8')
-        except Exception as e:
-            error_msg = f"{tr('Ошибка при чтении файла INI')}: {e}"
-            self.logger.error(error_msg)
-            return error_msg
-
-        if 'SCRIPT_OPTIONS' not in config.sections():
-            error_msg = tr("Ошибка: Отсутствует секция [SCRIPT_OPTIONS] в конфигурационном файле")
-            self.logger.error(error_msg)
+        document, error_msg = read_config(file_path)
+        if error_msg:
             return error_msg
 
-        script_sections = [section for section in config.sections() if section != 'SCRIPT_OPTIONS']
-        if not script_sections:
-            error_msg = tr("Ошибка: В секции [SCRIPT_OPTIONS] отсутствуют настройки скриптов")
+        problem = validate_document(document)
+        if problem:
+            template, params = problem
+            error_msg = tr(template).format(**params)
             self.logger.error(error_msg)
             return error_msg
 
-        required_keys = ['executable', 'args']
-        for section in script_sections:
-            for key in required_keys:
-                if key not in config[section]:
-                    error_msg = f"{tr('Ошибка')}: {tr('В секции')} [{section}] {tr('отсутствует ключ')} '{key}'"
-                    self.logger.error(error_msg)
-                    return error_msg
-
         return None
 
     def open_settings_dialog(self) -> None:
@@ -1106,29 +1612,74 @@ class DPIPenguin(QtWidgets.QMainWindow):
         """
         Перезагружает конфигурацию после обновления.
         """
-        if self.main_worker_thread is not None:
-            self.main_worker_thread.terminate_process()
-            self.main_worker_thread.quit()
-            self.main_worker_thread.wait()
-            self.main_worker_thread = None
+        self.apply_config_reload()
+        QMessageBox.information(self, tr("Обновление"), tr("Конфигурация обновлена и перезагружена"))
 
-        if self.winws_worker_thread is not None:
-            self.winws_worker_thread.terminate_process()
-            self.winws_worker_thread.quit()
-            self.winws_worker_thread.wait()
-            self.winws_worker_thread = None
+    def apply_config_reload(self) -> None:
+        """
+        Перечитывает текущую конфигурацию и обновляет интерфейс. Запущенный
+        обход перезапускается, только если итоговая команда его секции изменилась.
+        """
+        script_options, config_error = load_script_options(self.current_config_path)
+        if config_error:
+            # Работающий обход не трогаем: он продолжает работать с прежними аргументами
+            self.config_error = config_error
+            self.console_output.append(config_error)
+            self.logger.error(config_error)
+            if self.main_worker_thread is None:
+                self.selected_script.setEnabled(False)
+                self.run_button.setEnabled(False)
+            return
 
-        self.script_options, self.config_error = load_script_options(self.current_config_path)
-        if self.config_error:
-            self.console_output.append(self.config_error)
-            self.logger.error(self.config_error)
-            self.selected_script.setEnabled(False)
-            self.run_button.setEnabled(False)
+        self.script_options, self.config_error = script_options, None
+        self.update_script_options_display()
+        self.selected_script.setEnabled(True)
+        self.report_config_lint()
+
+        if self.main_worker_thread is None or self.running_command is None:
+            self.run_button.setEnabled(True)
+            return
+
+        if self.is_running_command_unchanged(self.current_config_path):
+            self.logger.info(f"Аргументы секции {self.running_section} не изменились, перезапуск не требуется")
+            return
+
+        section = self.running_section
+        self.logger.info(f"Аргументы секции {section} изменились, перезапуск обхода")
+        self.stop_worker_threads()
+        index = self.selected_script.findData(section)
+        if index >= 0:
+            self.selected_script.setCurrentIndex(index)
+            self.run_exe()
         else:
-            self.update_script_options_display()
-            self.selected_script.setEnabled(True)
             self.run_button.setEnabled(True)
-        QMessageBox.information(self, tr("Обновление"), tr("Конфигурация обновлена и перезагружена"))
+            self.stop_close_button.setEnabled(False)
+            self.console_output.append(
+                tr("Секция {option} удалена из конфигурации, обход остановлен").format(option=tr(section))
+            )
+
+    def watch_current_config(self) -> None:
+        """
+        Следит за файлом текущей конфигурации. Редакторы часто заменяют файл
+        целиком, поэтому путь добавляется заново после каждого изменения.
+        """
+        watched = self.config_watcher.files()
+        if watched:
+            self.config_watcher.removePaths(watched)
+        if os.path.exists(self.current_config_path):
+            self.config_watcher.addPath(self.current_config_path)
+
+    def on_config_file_changed(self, _path: str) -> None:
+        """
+        Откладывает перезагрузку: серия изменений при сохранении даёт одну перезагрузку.
+        """
+        self.config_reload_timer.start()
+
+    def on_config_reload_timeout(self) -> None:
+        self.watch_current_config()
+        if os.path.exists(self.current_config_path):
+            self.logger.info(f"Файл конфигурации изменён: {self.current_config_path}")
+            self.apply_config_reload()
 
     def start_winws(self, winws_path: str, args: Optional[List[str]] = None) -> None:
         """
@@ -53,6 +53,8 @@ class SettingsDialog(QDialog):
         self.update_checker.get_local_versions()
         self.update_checker.get_remote_versions()
         self.update_checker.config_updated_signal.connect(self.on_config_updated)
+        # Соединения сессии загрузок закрываются вместе с диалогом
+        self.finished.connect(self.update_checker.close)
 
         self.check_for_updates()
 
@@ -61,8 +63,14 @@ class SettingsDialog(QDialog):
         """Обработчик кнопки обновления компонентов."""
         self.logger.info("Нажата кнопка 'Обновить компоненты'")
         try:
-            for component in ('zapret', 'config'):
-                self.update_component(component)
+            components = [c for c in ('zapret', 'config') if self.update_checker.is_update_available(c)]
+            self.logger.info(f"Компоненты для обновления: {components}")
+            results = self.update_checker.update_components(components, dialog=self)
+            failed = [name for name, ok in results.items() if not ok]
+            if failed:
+                error_msg = f"Не удалось скачать и обновить {failed}"
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
 
             self.logger.info("Обновление компонентов выполнено успешно")
             QMessageBox.information(self, tr("Обновление"), tr("Обновление выполнено успешно!"))
@@ -73,17 +81,6 @@ class SettingsDialog(QDialog):
             QMessageBox.critical(self, tr("Ошибка обновления"), tr(f"Ошибка обновления: {e}"))
             self.close_and_open_main_window()
 
-    def update_component(self, component: str) -> None:
-        """Проверяет и обновляет указанный компонент, если доступно обновление."""
-        self.logger.info(f"Проверка обновления для компонента '{component}'")
-        if self.update_checker.is_update_available(component):
-            self.logger.info(f"Доступно обновление для '{component}', начинаю загрузку")
-            if not self.update_checker.download_and_update(component, dialog=self):
-                error_msg = f"Не удалось скачать и обновить '{component}'"
-                self.logger.error(error_msg)
-                raise Exception(error_msg)
-            self.logger.info(f"Компонент '{component}' успешно обновлён")
-
     def check_for_updates(self) -> None:
         """Проверяет наличие обновлений и обновляет интерфейс."""
         self.logger.info("Проверка наличия обновлений")
@@ -0,0 +1,46 @@
+import pytest
+
+from utils.bat_converter import ConvertError, convert_command
+
+GENERAL_BAT = r"""@echo off
+chcp 65001 > nul
+:: upstream general.bat
+set "BIN=%~dp0bin\"
+start "zapret" /min "%BIN%winws.exe" --wf-tcp=80,443 --wf-udp=443,%GameFilter% ^
+--filter-tcp=443 --hostlist="%~dp0lists\list-general.txt" --dpi-desync=fake ^
+--dpi-desync-fake-tls "%BIN%tls_clienthello.bin" --new ^
+--filter-udp=%GameFilter% --ipset="%~dp0lists\ipset-all.txt" --dpi-desync=fake
+"""
+
+
+def test_convert_upstream_script():
+    section = convert_command(GENERAL_BAT, "general", source="general.bat")
+    assert section.args == [
+        "--wf-tcp=80,443",
+        "--wf-udp=443,{GAME_FILTER}",
+        "--filter-tcp=443",
+        "--hostlist={BLACKLIST_FILES_2}",
+        "--dpi-desync=fake",
+        "--dpi-desync-fake-tls={ZAPRET_FOLDER}\\tls_clienthello.bin",
+        "--new",
+        "--filter-udp={GAME_FILTER}",
+        "--ipset={BLACKLIST_FOLDER}\\ipset-all.txt",
+        "--dpi-desync=fake",
+    ]
+    assert section.warnings == []
+
+
+def test_convert_bare_arguments():
+    section = convert_command("--filter-tcp=443 --hostlist=list.txt --dpi-desync=split2",
+                              "pasted", hostlist="{BLACKLIST_FILES_0}")
+    assert section.args == ["--filter-tcp=443", "--hostlist={BLACKLIST_FILES_0}", "--dpi-desync=split2"]
+
+
+def test_unknown_variable_warns():
+    section = convert_command('winws.exe --dpi-desync-fake-tls="%%TLS%%"', "x")
+    assert section.warnings
+
+
+def test_no_winws():
+    with pytest.raises(ConvertError):
+        convert_command("@echo off\nping -n 1 127.0.0.1\n", "x")
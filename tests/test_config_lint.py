@@ -0,0 +1,28 @@
+from utils.config_lint import shadows
+from utils.winws_filter import profile_ports
+from utils.winws_profile import WinwsCommand
+
+
+def pair(args):
+    first, second = list(WinwsCommand.parse(args))
+    return first, second, profile_ports(first), profile_ports(second)
+
+
+def test_wider_profile_shadows_narrower():
+    assert shadows(*pair(["--filter-tcp=80,443", "--dpi-desync=fake", "--new",
+                          "--filter-tcp=443", "--hostlist=a.txt", "--dpi-desync=split"]))
+
+
+def test_narrower_profile_does_not_shadow():
+    assert not shadows(*pair(["--filter-tcp=443", "--hostlist=a.txt", "--dpi-desync=split", "--new",
+                              "--filter-tcp=80,443", "--dpi-desync=fake"]))
+
+
+def test_disjoint_ports_do_not_shadow():
+    assert not shadows(*pair(["--filter-tcp=80", "--dpi-desync=fake", "--new",
+                              "--filter-tcp=443", "--dpi-desync=split"]))
+
+
+def test_other_protocol_does_not_shadow():
+    assert not shadows(*pair(["--filter-tcp=443", "--dpi-desync=fake", "--new",
+                              "--filter-udp=443", "--dpi-desync=fake"]))
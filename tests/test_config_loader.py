@@ -0,0 +1,56 @@
+import pytest
+
+from utils.config_loader import ConfigError, parse_config
+
+OPTIONS = "[SCRIPT_OPTIONS]\n"
+
+
+def test_extends_and_append_args():
+    document = parse_config(OPTIONS + """
+[base]
+executable = winws.exe
+args = --wf-tcp=443; --dpi-desync=fake;
+
+[child]
+extends = base
+append_args = --dpi-desync-ttl=4;
+
+[own]
+extends = base
+args = --dpi-desync=split2;
+""")
+    child = document.sections["child"]
+    assert child.executable == "winws.exe"
+    assert child.raw_args == ["--wf-tcp=443", "--dpi-desync=fake", "--dpi-desync-ttl=4"]
+    assert document.sections["own"].raw_args == ["--dpi-desync=split2"]
+
+
+def test_block_reference():
+    document = parse_config(OPTIONS + """
+[@fake]
+args = --dpi-desync=fake; --dpi-desync-repeats=6;
+
+[youtube]
+executable = winws.exe
+args = --filter-tcp=443; @fake; --new;
+""")
+    assert document.sections["youtube"].raw_args == [
+        "--filter-tcp=443", "--dpi-desync=fake", "--dpi-desync-repeats=6", "--new",
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "[a]\nextends = b\n\n[b]\nextends = a\n",
+    "[a]\nextends = a\n",
+    "[@x]\nargs = @y;\n\n[@y]\nargs = @x;\n",
+    "[a]\nextends = missing\n",
+    "[a]\nargs = @missing;\n",
+])
+def test_invalid_references(text):
+    with pytest.raises(ConfigError):
+        parse_config(OPTIONS + text)
+
+
+def test_cycle_message_names_chain():
+    with pytest.raises(ConfigError, match="циклическое наследование: a -> b -> a"):
+        parse_config(OPTIONS + "[a]\nextends = b\n\n[b]\nextends = a\n")
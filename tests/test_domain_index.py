@@ -0,0 +1,68 @@
+import os
+import struct
+
+import pytest
+
+from utils.domain_index import DomainIndex, HostlistIndexes
+
+HOSTS = "example.com\n^exact.org\n# comment\nSub.Example.net\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "list.txt"
+    path.write_text(HOSTS, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("example.com", "example.com"),
+    ("a.b.example.com", "example.com"),
+    ("exact.org", "exact.org"),
+    ("www.exact.org", None),
+    ("SUB.example.net.", "sub.example.net"),
+    ("example.net", None),
+    ("", None),
+])
+def test_lookup(tmp_path, source, host, expected):
+    with DomainIndex.build(str(source), str(tmp_path / "list.idx")) as index:
+        assert index.lookup(host) == expected
+
+
+def test_truncated_index_is_closed(tmp_path, source, monkeypatch):
+    index_path = tmp_path / "list.idx"
+    DomainIndex.build(str(source), str(index_path)).close()
+    data = index_path.read_bytes()
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        f = open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr("utils.domain_index.open", tracking_open, raising=False)
+    # Обрезан заголовок; обрезаны ключи
+    for size in (20, len(data) - 1 - len("sub.example.net")):
+        index_path.write_bytes(data[:size])
+        with pytest.raises((ValueError, struct.error)):
+            DomainIndex(str(index_path))
+    assert len(opened) == 2 and all(f.closed for f in opened)
+
+    # Повреждённый индекс пересобирается
+    with DomainIndex.load(str(source), str(index_path)) as index:
+        assert index.covers("www.example.com")
+
+
+def test_indexes_reopen_only_changed_lists(tmp_path, source):
+    indexes = HostlistIndexes([str(source)], str(tmp_path / "index"))
+    assert indexes.check("example.com") == {str(source): "example.com"}
+    opened = indexes._indexes[str(source)]
+
+    indexes.check("exact.org")
+    assert indexes._indexes[str(source)] is opened
+
+    source.write_text(HOSTS + "new.example\n", encoding="utf-8")
+    os.utime(source, ns=(1, 1))
+    assert indexes.check("new.example") == {str(source): "new.example"}
+    assert indexes._indexes[str(source)] is not opened
+    indexes.close()
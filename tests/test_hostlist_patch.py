@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import utils.file_utils
+from utils.hostlist_patch import PatchError, apply_patch, canonical_lines, file_sha256, make_patch
+
+OLD = ["youtube.com", "discord.com", "www.example.org", "example.org"]
+NEW = ["youtube.com", "discord.gg", "example.org", "twitch.tv"]
+
+
+def write_list(path, lines):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.writelines(line + "\n" for line in lines)
+
+
+def test_apply_patch_produces_target(tmp_path):
+    path = tmp_path / "list.txt"
+    write_list(path, canonical_lines(OLD))
+    target = apply_patch(str(path), make_patch(OLD, NEW))
+
+    assert path.read_text(encoding="utf-8").splitlines() == canonical_lines(NEW)
+    assert file_sha256(str(path)) == target
+
+
+def test_source_closed_before_replace(tmp_path, monkeypatch):
+    # На Windows открытый через open() файл нельзя заменить os.replace
+    path = tmp_path / "list.txt"
+    write_list(path, canonical_lines(OLD))
+    opened = []
+    replaced = []
+    real_replace = os.replace
+
+    def tracking_open(*args, **kwargs):
+        f = open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    def checked_replace(src, dst):
+        assert opened and all(f.closed for f in opened)
+        replaced.append(dst)
+        real_replace(src, dst)
+
+    monkeypatch.setattr("utils.hostlist_patch.open", tracking_open, raising=False)
+    monkeypatch.setattr(utils.file_utils.os, "replace", checked_replace)
+    apply_patch(str(path), make_patch(OLD, NEW))
+    assert replaced == [str(path)]
+
+
+def test_apply_patch_rejects_other_base(tmp_path):
+    path = tmp_path / "list.txt"
+    write_list(path, canonical_lines(NEW))
+    before = path.read_bytes()
+
+    with pytest.raises(PatchError):
+        apply_patch(str(path), make_patch(OLD, NEW))
+    assert path.read_bytes() == before
+
+
+def test_target_mismatch_keeps_file(tmp_path):
+    path = tmp_path / "list.txt"
+    write_list(path, canonical_lines(OLD))
+    before = path.read_bytes()
+    patch = make_patch(OLD, NEW).replace("+twitch.tv", "+twitch.tw")
+
+    with pytest.raises(PatchError):
+        apply_patch(str(path), patch)
+    # Исходный список не тронут, временных файлов не осталось
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == ["list.txt"]
+
+
+@pytest.mark.parametrize("patch", [
+    "",
+    "not a patch\n",
+    "# dpipenguin hostlist patch v1\n+a.com\n",
+    "# dpipenguin hostlist patch v1\nbase 0\ntarget 0\n+b.com\n+a.com\n",
+])
+def test_malformed_patch(tmp_path, patch):
+    path = tmp_path / "list.txt"
+    write_list(path, [])
+    with pytest.raises(PatchError):
+        apply_patch(str(path), patch)
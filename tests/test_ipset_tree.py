@@ -0,0 +1,56 @@
+import pytest
+
+from utils.ipset_utils import IpsetTree
+
+LINES = [
+    "10.0.0.0/8",
+    "10.1.0.0/16",
+    "10.1.2.0/24",
+    "192.168.0.1",
+    "2001:db8::/32",
+    "2001:db8:1::/48",
+    "# comment",
+    "bad line",
+]
+
+
+@pytest.fixture
+def tree():
+    return IpsetTree.from_lines(LINES)
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("10.200.0.1", "10.0.0.0/8"),
+    ("10.1.200.1", "10.1.0.0/16"),
+    ("10.1.2.3", "10.1.2.0/24"),
+    ("192.168.0.1", "192.168.0.1/32"),
+    ("192.168.0.2", None),
+    ("11.0.0.1", None),
+    ("2001:db8:1::5", "2001:db8:1::/48"),
+    ("2001:db8:2::5", "2001:db8::/32"),
+    ("2001:db9::1", None),
+])
+def test_longest_prefix_match(tree, address, expected):
+    assert tree.lookup(address) == expected
+
+
+def test_families_are_separate():
+    # ::a00:1 численно равен 10.0.0.1, но IPv6-адрес не попадает в IPv4-префикс
+    tree = IpsetTree.from_lines(["10.0.0.0/8"])
+    assert not tree.contains("::a00:1")
+
+
+def test_lookup_many_skips_invalid(tree):
+    assert tree.lookup_many(["10.1.2.3", "not-an-ip", "8.8.8.8"]) == ["10.1.2.0/24", None, None]
+
+
+def test_load_cache(tmp_path):
+    path = tmp_path / "ipset.txt"
+    path.write_text("10.0.0.0/8\n", encoding="utf-8")
+    tree = IpsetTree.load(str(path))
+    assert IpsetTree.load(str(path)) is tree
+
+    path.write_text("10.0.0.0/8\n172.16.0.0/12\n", encoding="utf-8")
+    reloaded = IpsetTree.load(str(path))
+    assert reloaded is not tree
+    assert reloaded.contains("172.16.5.5")
@@ -0,0 +1,59 @@
+import ipaddress
+
+import pytest
+
+from utils.ipset_utils import merge_ranges, optimize_ipset, parse_entry, range_to_prefixes
+
+
+def v4(address):
+    return int(ipaddress.IPv4Address(address))
+
+
+def test_merge_overlapping_and_adjacent():
+    ranges = [
+        (4, v4("10.0.0.0"), v4("10.0.0.255")),
+        (4, v4("10.0.1.0"), v4("10.0.1.255")),
+        (4, v4("10.0.0.128"), v4("10.0.0.200")),
+        (4, v4("192.168.0.0"), v4("192.168.0.255")),
+    ]
+    assert merge_ranges(ranges) == [
+        (4, v4("10.0.0.0"), v4("10.0.1.255")),
+        (4, v4("192.168.0.0"), v4("192.168.0.255")),
+    ]
+
+
+def test_merge_keeps_families_apart():
+    # Числовые значения IPv4 и IPv6 пересекаются, но семейства не сливаются
+    ranges = [(6, 0, 255), (4, 0, 255), (4, 256, 511)]
+    assert merge_ranges(ranges) == [(4, 0, 511), (6, 0, 255)]
+
+
+@pytest.mark.parametrize("first, last, expected", [
+    ("10.0.0.0", "10.0.0.255", ["10.0.0.0/24"]),
+    ("10.0.0.1", "10.0.0.6", ["10.0.0.1/32", "10.0.0.2/31", "10.0.0.4/31", "10.0.0.6/32"]),
+    ("0.0.0.0", "255.255.255.255", ["0.0.0.0/0"]),
+])
+def test_range_to_prefixes_v4(first, last, expected):
+    prefixes = range_to_prefixes(4, v4(first), v4(last))
+    assert [f"{ipaddress.IPv4Address(a)}/{n}" for a, n in prefixes] == expected
+
+
+def test_range_to_prefixes_matches_ipaddress():
+    start, end = int(ipaddress.IPv6Address("2001:db8::3")), int(ipaddress.IPv6Address("2001:db8::1:7"))
+    expected = ipaddress.summarize_address_range(ipaddress.IPv6Address(start), ipaddress.IPv6Address(end))
+    assert range_to_prefixes(6, start, end) == [(int(n.network_address), n.prefixlen) for n in expected]
+
+
+def test_parse_entry():
+    assert parse_entry("# comment") is None
+    assert parse_entry("  ") is None
+    assert parse_entry("10.0.0.1-10.0.0.3") == (4, v4("10.0.0.1"), v4("10.0.0.3"))
+    assert parse_entry("10.0.0.5/30") == (4, v4("10.0.0.4"), v4("10.0.0.7"))
+    with pytest.raises(ValueError):
+        parse_entry("10.0.0.9-10.0.0.1")
+
+
+def test_optimize_keeps_invalid_lines():
+    lines, stats = optimize_ipset(["10.0.0.0/25", "10.0.0.128/25", "not-an-ip", "10.0.0.7"])
+    assert lines == ["10.0.0.0/24", "not-an-ip"]
+    assert (stats.input_entries, stats.output_entries, stats.invalid) == (3, 1, 1)
@@ -0,0 +1,26 @@
+import pytest
+
+from utils.port_set import PortSet
+
+
+def test_parse_and_format():
+    ports = PortSet.parse("443,80,50000-50100,81,,")
+    assert str(ports) == "80-81,443,50000-50100"
+    assert len(ports) == 2 + 1 + 101
+    assert 50050 in ports
+    assert 82 not in ports
+
+
+@pytest.mark.parametrize("spec", ["-1", "65536", "100-10", "http", "1-2-3"])
+def test_parse_invalid(spec):
+    with pytest.raises(ValueError):
+        PortSet.parse(spec)
+
+
+def test_operations():
+    web = PortSet.parse("80,443")
+    high = PortSet.parse("443-1024")
+    assert web | high == PortSet.parse("80,443-1024")
+    assert web & high == PortSet.parse("443")
+    assert web - high == PortSet.parse("80")
+    assert len(PortSet.all() - web) == 65535 - 2
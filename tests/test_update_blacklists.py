@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+# UpdateChecker зависит от winreg и PyQt6 (через utils.utils)
+update_utils = pytest.importorskip("utils.update_utils")
+
+BODY = b"discord.com\nyoutube.com\n"
+OLD_MTIME_NS = 1_600_000_000 * 10**9
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def iter_content(self, chunk_size=1):
+        yield self.body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(self.status_code)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs.get("headers", {})))
+        return self.response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    black = tmp_path / "black"
+    black.mkdir()
+    path = black / "universal.txt"
+    path.write_bytes(BODY)
+    os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+    meta_path = black / ".blacklists_meta.json"
+    meta = {"universal": {"etag": '"v1"', "last_modified": None, "sha256": hashlib.sha256(BODY).hexdigest()}}
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    os.utime(meta_path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+    monkeypatch.setattr(update_utils.UpdateChecker, "BLACKLISTS", [
+        {"name": "universal", "url": "https://example.invalid/universal.txt", "output_file": str(path)},
+    ])
+    monkeypatch.setattr(update_utils.UpdateChecker, "BLACKLISTS_META_FILE", str(meta_path))
+    with update_utils.UpdateChecker() as checker:
+        yield checker
+
+
+def list_files(checker):
+    black = os.path.dirname(checker.BLACKLISTS_META_FILE)
+    return {name: os.stat(os.path.join(black, name)).st_mtime_ns for name in os.listdir(black)}
+
+
+def test_not_modified_leaves_files_untouched(checker):
+    session = checker.engine.session = FakeSession(FakeResponse(304))
+    before = list_files(checker)
+
+    assert checker.update_blacklists()
+    assert session.requests[0][1].get("If-None-Match") == '"v1"'
+    assert list_files(checker) == before
+
+
+def test_same_hash_does_not_rewrite_list(checker):
+    checker.engine.session = FakeSession(FakeResponse(200, BODY, {"ETag": '"v2"'}))
+    list_path = checker.BLACKLISTS[0]["output_file"]
+
+    assert checker.update_blacklists()
+    assert os.stat(list_path).st_mtime_ns == OLD_MTIME_NS
+    assert sorted(list_files(checker)) == [".blacklists_meta.json", "universal.txt"]
+    with open(checker.BLACKLISTS_META_FILE, encoding="utf-8") as f:
+        assert json.load(f)["universal"]["etag"] == '"v2"'
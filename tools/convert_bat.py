@@ -0,0 +1,103 @@
+"""
+Пакетное преобразование .bat-стратегий zapret в один файл конфигурации (utils/bat_converter.py).
+
+Каждый скрипт становится секцией с именем файла; скрипты без запуска winws
+(service.bat и т.п.) пропускаются с сообщением. Файлы разбираются параллельно
+в нескольких процессах, результат проверяется загрузчиком конфигураций.
+Если записать файл в config/, он появится в библиотеке конфигураций программы.
+
+Запуск из корня репозитория:
+    python -m tools.convert_bat path/to/zapret-strategies -o config/upstream.ini
+    python -m tools.convert_bat a.bat b.bat -o out.ini --hostlist "{BLACKLIST_FILES_1}" --jobs 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Union
+
+from utils.bat_converter import DEFAULT_HOSTLIST, ConvertError, ConvertedSection, convert_file, format_config
+from utils.config_library import validate_document
+from utils.config_loader import ConfigError, parse_config
+from utils.file_utils import atomic_write
+
+
+def collect_scripts(paths: List[str], recursive: bool) -> List[str]:
+    scripts: List[str] = []
+    for path in paths:
+        if not os.path.isdir(path):
+            scripts.append(path)
+            continue
+        if recursive:
+            for root, _dirs, files in os.walk(path):
+                scripts.extend(os.path.join(root, name) for name in files if name.lower().endswith(".bat"))
+        else:
+            scripts.extend(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".bat")
+            )
+    return sorted(dict.fromkeys(scripts), key=lambda p: p.lower())
+
+
+def convert_one(job: Tuple[str, str]) -> Union[ConvertedSection, str]:
+    """Выполняется в рабочем процессе; ошибка возвращается строкой, чтобы не прерывать пакет."""
+    path, hostlist = job
+    try:
+        return convert_file(path, hostlist)
+    except (OSError, ConvertError) as e:
+        return str(e)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="файлы .bat или каталоги с ними")
+    parser.add_argument("-o", "--output", required=True, help="файл конфигурации .ini")
+    parser.add_argument("--hostlist", default=DEFAULT_HOSTLIST, help="значение для --hostlist (по умолчанию %(default)s)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="число рабочих процессов")
+    parser.add_argument("--recursive", action="store_true", help="искать .bat во вложенных каталогах")
+    options = parser.parse_args()
+
+    scripts = collect_scripts(options.paths, options.recursive)
+    if not scripts:
+        print("Файлы .bat не найдены", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    jobs = [(path, options.hostlist) for path in scripts]
+    if options.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+            results = list(executor.map(convert_one, jobs, chunksize=max(1, len(jobs) // (options.jobs * 4))))
+    else:
+        results = [convert_one(job) for job in jobs]
+
+    sections: List[ConvertedSection] = []
+    for path, result in zip(scripts, results):
+        if isinstance(result, str):
+            print(f"{path}: пропущен: {result}", file=sys.stderr)
+            continue
+        for warning in result.warnings:
+            print(f"{path}: {warning}", file=sys.stderr)
+        sections.append(result)
+
+    if not sections:
+        print("Ни один скрипт не удалось преобразовать", file=sys.stderr)
+        return 1
+
+    text = format_config(sections)
+    try:
+        problem = validate_document(parse_config(text, options.output))
+    except ConfigError as e:
+        problem = (str(e), {})
+    if problem:
+        template, params = problem
+        print(f"Результат не прошёл проверку: {template.format(**params)}", file=sys.stderr)
+        return 1
+
+    atomic_write(options.output, text, newline="\n")
+    elapsed = time.perf_counter() - started
+    print(f"{options.output}: секций {len(sections)} из {len(scripts)} файлов за {elapsed:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
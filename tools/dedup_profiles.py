@@ -0,0 +1,44 @@
+"""
+Пробный прогон объединения эквивалентных профилей winws (utils/profile_dedup.py).
+
+Для каждой секции показывает, сколько профилей можно объединить и почему,
+и выводит unified diff аргументов. Файлы конфигурации не изменяются.
+
+Запуск из корня репозитория:
+    python -m tools.dedup_profiles config/default.ini
+    python -m tools.dedup_profiles config/*.ini --quiet      # только итоги
+"""
+import argparse
+import sys
+
+from utils.config_loader import ConfigError, load_config
+from utils.profile_dedup import args_diff, dedup_profiles
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--quiet", action="store_true", help="не выводить diff аргументов")
+    options = parser.parse_args()
+
+    status = 0
+    for path in options.paths:
+        try:
+            document = load_config(path)
+        except (OSError, ConfigError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        for section in document.script_sections:
+            command, report = dedup_profiles(section.command)
+            print(f"{path} [{section.name}]: профилей {report.total} -> {report.remaining}")
+            for merge in report.merges:
+                print(f"  профиль {merge.removed} -> {merge.kept} ({merge.reason})")
+            if report.merged and not options.quiet:
+                for line in args_diff(section.raw_args, command.to_args(), section.name):
+                    print(f"  {line}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Генератор дельта-патчей для больших hostlist-файлов.
+
+Строит патч между старой и новой версией списка и сохраняет его
+под именем <base>.patch, где base — хеш канонического вида старой версии.
+Именно по этому имени UpdateChecker ищет патч (см. patch_url в BLACKLISTS).
+
+Запуск из корня репозитория:
+    python -m tools.make_hostlist_patch old.txt new.txt -o black/patches/universal
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from utils.hostlist_patch import apply_patch, canonical_lines, make_patch, parse_patch
+
+
+def _read_lines(path: str):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.readlines()
+
+
+def _verify(old_lines, patch_text: str) -> None:
+    """Проверяет, что патч, применённый к канонической старой версии, даёт target."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_path = os.path.join(tmp_dir, "base.txt")
+        with open(base_path, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(host + "\n" for host in canonical_lines(old_lines))
+        apply_patch(base_path, patch_text)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", help="предыдущая версия списка")
+    parser.add_argument("new", help="новая версия списка")
+    parser.add_argument("-o", "--output-dir", required=True, help="каталог для <base>.patch")
+    parser.add_argument("--canonical-out", help="дополнительно сохранить канонический вид новой версии")
+    options = parser.parse_args()
+
+    old_lines = _read_lines(options.old)
+    new_lines = _read_lines(options.new)
+    patch_text = make_patch(old_lines, new_lines)
+    _verify(old_lines, patch_text)
+
+    base, target, removed, added = parse_patch(patch_text)
+    os.makedirs(options.output_dir, exist_ok=True)
+    patch_path = os.path.join(options.output_dir, f"{base}.patch")
+    with open(patch_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(patch_text)
+
+    if options.canonical_out:
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="\n", delete=False) as f:
+            f.writelines(host + "\n" for host in canonical_lines(new_lines))
+        shutil.move(f.name, options.canonical_out)
+
+    full_size = os.path.getsize(options.new)
+    patch_size = len(patch_text.encode("utf-8"))
+    print(f"base   {base}")
+    print(f"target {target}")
+    print(f"-{len(removed)} / +{len(added)} строк, патч {patch_size} байт против {full_size} байт полного списка")
+    print(f"Сохранено: {patch_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Оптимизация ipset-файлов: сворачивает пересекающиеся и соседние префиксы.
+
+Запуск из корня репозитория:
+    python -m tools.optimize_ipset black/ipset-discord.txt           # оптимизировать на месте
+    python -m tools.optimize_ipset black/ipset-discord.txt --check   # только проверить
+"""
+import argparse
+import sys
+
+from utils.ipset_utils import address_counts, optimize_file, optimize_ipset, verify_equivalent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--check", action="store_true",
+                        help="не записывать файл, только показать экономию и проверить эквивалентность")
+    options = parser.parse_args()
+
+    status = 0
+    for path in options.paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            original = f.readlines()
+        optimized, stats = optimize_ipset(original)
+        equivalent = verify_equivalent(original, optimized)
+        counts = address_counts(optimized)
+        print(
+            f"{path}: {stats.input_entries} -> {stats.output_entries} префиксов "
+            f"(-{stats.saved}, некорректных строк {stats.invalid}), "
+            f"адресов IPv4 {counts[4]}, IPv6 {counts[6]}, покрытие {'совпадает' if equivalent else 'ИЗМЕНИЛОСЬ'}"
+        )
+        if not equivalent:
+            status = 1
+        elif not options.check:
+            optimize_file(path)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import os
+from typing import List, Optional, Sequence
+
+from utils.file_utils import atomic_write
+
+logger = logging.getLogger("dpipenguin")
+
+ARGS_FILE_SUFFIX = ".args"
+# Сколько последних файлов аргументов хранить в кэше
+ARGS_FILE_KEEP = 16
+
+
+def _quote(arg: str) -> str:
+    return f'"{arg}"' if any(ch.isspace() for ch in arg) else arg
+
+
+def format_args_file(args: Sequence[str]) -> Optional[str]:
+    """
+    Текст файла аргументов для winws (@file): по одному аргументу на строку,
+    аргументы с пробелами — в кавычках. None, если аргументы нельзя записать
+    без потерь (кавычки или перевод строки внутри аргумента).
+    """
+    if any('"' in arg or "\n" in arg or "\r" in arg for arg in args):
+        return None
+    return "".join(_quote(arg) + "\n" for arg in args)
+
+
+def args_file_path(directory: str, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return os.path.join(directory, digest[:32] + ARGS_FILE_SUFFIX)
+
+
+def write_args_file(args: Sequence[str], directory: str) -> Optional[str]:
+    """
+    Записывает аргументы в файл, имя которого — хэш содержимого, и возвращает
+    путь. Для неизменённых аргументов используется уже записанный файл.
+    None — аргументы нельзя передать через файл.
+    """
+    text = format_args_file(args)
+    if text is None:
+        return None
+    path = args_file_path(directory, text)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    atomic_write(path, text, newline="\n")
+    logger.info(f"Записан файл аргументов winws: {path}")
+    _prune(directory, keep=path)
+    return path
+
+
+def _prune(directory: str, keep: str) -> None:
+    """Удаляет старые файлы аргументов сверх ARGS_FILE_KEEP."""
+    try:
+        entries = [
+            entry for entry in os.scandir(directory)
+            if entry.name.endswith(ARGS_FILE_SUFFIX) and entry.path != keep
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in entries[ARGS_FILE_KEEP - 1:]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.warning(f"Не удалось очистить каталог файлов аргументов: {e}")
+
+
+def args_file_command(command: List[str], directory: str) -> List[str]:
+    """
+    Команда запуска с аргументами из файла: [исполняемый файл, "@путь"].
+    Если аргументы нельзя записать в файл, команда возвращается без изменений.
+    """
+    path = write_args_file(command[1:], directory)
+    if path is None:
+        return command
+    return [command[0], "@" + path]
@@ -0,0 +1,263 @@
+import ntpath
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.config_loader import SCRIPT_OPTIONS_SECTION
+from utils.winws_profile import HOSTLIST_OPTIONS, IPSET_OPTIONS
+
+DEFAULT_EXECUTABLE = "{ZAPRET_FOLDER}\\winws.exe"
+DEFAULT_HOSTLIST = "{BLACKLIST_FILES_2}"
+WINWS_NAMES = ("winws.exe", "winws")
+
+# Каталог скрипта (%~dp0) после раскрытия переменных; по этому маркеру
+# аргумент распознаётся как путь к файлу из комплекта стратегии
+SCRIPT_DIR = "\x00dp0\\"
+# Переменные, которые upstream-скрипты получают извне (service.bat)
+KNOWN_VARIABLES = {"gamefilter": "{GAME_FILTER}"}
+# Списки (кроме основного --hostlist) берутся из папки черных списков
+LIST_FOLDER_OPTIONS = frozenset(HOSTLIST_OPTIONS[1:]) | frozenset(IPSET_OPTIONS)
+
+_VARIABLE_RE = re.compile(r"%%|%~([a-z]*)([0-9])|%([^%\r\n]+)%", re.IGNORECASE)
+_SET_RE = re.compile(r'^set\s+(?:"([^=]+)=([^"]*)"|([^=\s]+)=(.*))$', re.IGNORECASE)
+_COMMAND_SEPARATORS = frozenset("&|")
+_REDIRECTS = frozenset("<>")
+
+
+class ConvertError(Exception):
+    """Скрипт не удалось преобразовать в секцию конфигурации."""
+
+
+@dataclass
+class ConvertedSection:
+    """Результат преобразования одного скрипта или команды."""
+    name: str
+    args: List[str]
+    source: str = ""
+    warnings: List[str] = field(default_factory=list)
+
+
+def logical_lines(text: str) -> List[str]:
+    """
+    Строки скрипта с учётом переноса "^" в конце строки: как и cmd.exe,
+    перенос склеивает строку со следующей.
+    """
+    lines: List[str] = []
+    pending = ""
+    for line in text.splitlines():
+        stripped = line.rstrip()
+        if stripped.endswith("^") and not stripped.endswith("^^"):
+            pending += stripped[:-1]
+            continue
+        lines.append(pending + line)
+        pending = ""
+    if pending:
+        lines.append(pending)
+    return lines
+
+
+def expand_variables(line: str, variables: Dict[str, str], script_name: str = "") -> str:
+    """
+    Раскрывает %VAR%, %%, %~dp0/%~n0/%~nx0 как cmd.exe при разборе строки.
+    Неизвестная переменная, как и в bat-файле, раскрывается в пустую строку.
+    """
+    def replace(match: "re.Match[str]") -> str:
+        text = match.group(0)
+        if text == "%%":
+            return "%"
+        modifiers = match.group(1)
+        if modifiers is not None:
+            if match.group(2) != "0":
+                return ""
+            modifiers = modifiers.lower()
+            if "d" in modifiers or "p" in modifiers:
+                return SCRIPT_DIR
+            name, ext = os.path.splitext(script_name)
+            if "n" in modifiers:
+                return name + ext if "x" in modifiers else name
+            return script_name
+        return variables.get(match.group(3).lower(), "")
+
+    return _VARIABLE_RE.sub(replace, line)
+
+
+def tokenize(line: str) -> List[str]:
+    """
+    Разбивает команду cmd.exe на аргументы: кавычки группируют и удаляются,
+    "^" экранирует следующий символ, разбор останавливается на &, | и
+    пропускает перенаправления (> файл).
+    """
+    tokens: List[str] = []
+    current: List[str] = []
+    has_token = in_quotes = skip_next = False
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if in_quotes:
+            if ch == '"':
+                in_quotes = False
+            else:
+                current.append(ch)
+        elif ch == '"':
+            in_quotes = has_token = True
+        elif ch == "^" and i + 1 < len(line):
+            i += 1
+            current.append(line[i])
+            has_token = True
+        elif ch.isspace() or ch in _COMMAND_SEPARATORS or ch in _REDIRECTS:
+            if has_token:
+                if not skip_next:
+                    tokens.append("".join(current))
+                skip_next = False
+            current, has_token = [], False
+            if ch in _COMMAND_SEPARATORS:
+                break
+            if ch in _REDIRECTS:
+                skip_next = True
+        else:
+            current.append(ch)
+            has_token = True
+        i += 1
+    if has_token and not skip_next:
+        tokens.append("".join(current))
+    return tokens
+
+
+def _statement(line: str) -> str:
+    line = line.strip()
+    while line.startswith("@"):
+        line = line[1:].lstrip()
+    return line
+
+
+def extract_winws_args(text: str, script_name: str = "") -> Tuple[List[str], List[str]]:
+    """
+    Находит запуск winws в тексте скрипта (или вставленной команде) и
+    возвращает его аргументы с раскрытыми переменными и предупреждения.
+    Если winws.exe в тексте не упоминается, весь текст считается аргументами.
+    """
+    variables = dict(KNOWN_VARIABLES)
+    warnings: List[str] = []
+    found: Optional[List[str]] = None
+    bare_tokens: List[str] = []
+
+    for line in logical_lines(text):
+        statement = _statement(line)
+        lowered = statement.lower()
+        if not statement or lowered.startswith(("::", "rem ", "echo")) or lowered == "rem":
+            continue
+        match = _SET_RE.match(statement)
+        if match:
+            name = match.group(1) or match.group(3)
+            value = match.group(2) if match.group(1) else match.group(4)
+            if name.lower() not in KNOWN_VARIABLES and not name.startswith("/"):
+                variables[name.strip().lower()] = expand_variables(value, variables, script_name)
+            continue
+
+        tokens = tokenize(expand_variables(statement, variables, script_name))
+        for position, token in enumerate(tokens):
+            if ntpath.basename(token.replace(SCRIPT_DIR, "\\")).lower() in WINWS_NAMES:
+                if found is None:
+                    found = tokens[position + 1:]
+                else:
+                    warnings.append("Найдено несколько запусков winws, использован первый")
+                break
+        else:
+            bare_tokens.extend(tokens)
+
+    if found is not None:
+        return found, warnings
+    if bare_tokens and all(token.startswith("--") or not token.startswith("-") for token in bare_tokens) \
+            and bare_tokens[0].startswith("--"):
+        return bare_tokens, warnings
+    raise ConvertError("запуск winws.exe не найден")
+
+
+def _join_values(args: Iterable[str]) -> List[str]:
+    """Собирает "--опция значение" в "--опция=значение", как это делает getopt у winws."""
+    joined: List[str] = []
+    for arg in args:
+        if joined and not arg.startswith("-") and joined[-1].startswith("--") and "=" not in joined[-1]:
+            joined[-1] = f"{joined[-1]}={arg}"
+        else:
+            joined.append(arg)
+    return joined
+
+
+def to_config_args(args: Iterable[str], hostlist: str = DEFAULT_HOSTLIST) -> Tuple[List[str], List[str]]:
+    """
+    Переводит аргументы winws в форму конфигурации: --hostlist заменяется
+    выбранным черным списком, остальные списки берутся из {BLACKLIST_FOLDER},
+    прочие файлы комплекта стратегии — из {ZAPRET_FOLDER}.
+    """
+    result: List[str] = []
+    warnings: List[str] = []
+    for arg in _join_values(args):
+        name, sep, value = arg.partition("=")
+        if name == "--hostlist" and sep:
+            arg = f"--hostlist={hostlist}"
+            if result and result[-1] == arg:
+                continue
+        elif sep and SCRIPT_DIR in value:
+            folder = "{BLACKLIST_FOLDER}" if name in LIST_FOLDER_OPTIONS else "{ZAPRET_FOLDER}"
+            file_name = ntpath.basename(value.replace(SCRIPT_DIR, "\\"))
+            arg = f"{name}={folder}\\{file_name}"
+        elif SCRIPT_DIR in arg:
+            arg = arg.replace(SCRIPT_DIR, "{ZAPRET_FOLDER}\\")
+        if "%" in arg or "!" in arg:
+            warnings.append(f"Аргумент содержит нераскрытую переменную: {arg}")
+        result.append(arg)
+    return result, warnings
+
+
+def convert_command(text: str, name: str, hostlist: str = DEFAULT_HOSTLIST,
+                    source: str = "") -> ConvertedSection:
+    """Преобразует скрипт .bat или вставленную команду запуска winws в секцию."""
+    args, warnings = extract_winws_args(text, os.path.basename(source))
+    config_args, arg_warnings = to_config_args(args, hostlist)
+    if not config_args:
+        raise ConvertError("у winws нет аргументов")
+    return ConvertedSection(name, config_args, source, warnings + arg_warnings)
+
+
+def read_script(path: str) -> str:
+    """Читает .bat: upstream-скрипты в UTF-8 (chcp 65001), старые — в cp866."""
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "cp866"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def convert_file(path: str, hostlist: str = DEFAULT_HOSTLIST) -> ConvertedSection:
+    name = os.path.splitext(os.path.basename(path))[0]
+    return convert_command(read_script(path), name, hostlist, source=path)
+
+
+def section_name(name: str, used: Dict[str, int]) -> str:
+    """Имя секции без недопустимых символов, уникальное в пределах файла."""
+    name = name.replace("[", "(").replace("]", ")").strip().lstrip("@").strip() or "winws"
+    if name == SCRIPT_OPTIONS_SECTION:
+        name = f"{name} (bat)"
+    count = used.get(name, 0) + 1
+    used[name] = count
+    return name if count == 1 else f"{name} ({count})"
+
+
+def format_section(name: str, args: Iterable[str], executable: str = DEFAULT_EXECUTABLE) -> str:
+    lines = [f"[{name}]", f"executable = {executable}", "args ="]
+    lines.extend(f"    {arg};" for arg in args)
+    return "\n".join(lines)
+
+
+def format_config(sections: Iterable[ConvertedSection], script_options: bool = True) -> str:
+    """Собирает секции в один файл конфигурации."""
+    used: Dict[str, int] = {}
+    parts = [f"[{SCRIPT_OPTIONS_SECTION}]\n"] if script_options else []
+    for section in sections:
+        parts.append(format_section(section_name(section.name, used), section.args) + "\n")
+    return "\n".join(parts)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.config_loader import ConfigDocument, ConfigError, parse_config
+from utils.file_utils import atomic_write
+
+logger = logging.getLogger("dpipenguin")
+
+INDEX_VERSION = 1
+
+# Ошибка проверки: (шаблон сообщения для tr(), параметры для format)
+ValidationError = Tuple[str, Dict[str, str]]
+
+
+def validate_document(document: ConfigDocument) -> Optional[ValidationError]:
+    """Проверяет разобранную конфигурацию по тем же правилам, что и окно загрузки."""
+    if document.duplicates:
+        return ("Ошибка: Названия разделов конфигурации не должны повторяться: {duplicates}",
+                {"duplicates": ", ".join(document.duplicates)})
+    if not document.has_script_options:
+        return "Ошибка: Отсутствует секция [SCRIPT_OPTIONS] в конфигурационном файле", {}
+    sections = document.script_sections
+    if not sections:
+        return "Ошибка: В секции [SCRIPT_OPTIONS] отсутствуют настройки скриптов", {}
+    for section in sections:
+        for key in section.missing_keys:
+            return "Ошибка: В секции [{section}] отсутствует ключ '{key}'", {"section": section.name, "key": key}
+    return None
+
+
+@dataclass
+class LibraryEntry:
+    """Запись индекса: файл конфигурации и то, что о нём известно без повторного разбора."""
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str = ""
+    sections: List[str] = field(default_factory=list)
+    lists: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    error_args: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+
+class ConfigLibrary:
+    """
+    Индекс файлов конфигурации из нескольких каталогов, сохраняемый в JSON.
+    refresh() разбирает только новые и изменившиеся (по mtime и размеру) файлы,
+    поэтому список секций и статус проверки доступны без чтения самих конфигураций.
+    """
+
+    def __init__(self, directories: Iterable[str], index_path: str):
+        self.directories = list(dict.fromkeys(os.path.abspath(d) for d in directories))
+        self.index_path = index_path
+        self.entries: Dict[str, LibraryEntry] = self._load_index()
+
+    def _load_index(self) -> Dict[str, LibraryEntry]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+                return {}
+            return {item["path"]: LibraryEntry(**item) for item in data.get("entries", [])}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать индекс конфигураций: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        data: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "entries": [asdict(entry) for entry in self.entries.values()],
+        }
+        try:
+            atomic_write(self.index_path, json.dumps(data, ensure_ascii=False, indent=2))
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить индекс конфигураций: {e}")
+
+    def add_directory(self, directory: str) -> bool:
+        directory = os.path.abspath(directory)
+        if directory in self.directories:
+            return False
+        self.directories.append(directory)
+        return True
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found: Dict[str, os.stat_result] = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as it:
+                    for item in it:
+                        if item.name.lower().endswith(".ini") and item.is_file():
+                            found[os.path.abspath(item.path)] = item.stat()
+            except OSError:
+                continue
+        return found
+
+    @staticmethod
+    def _index_file(path: str, stat: os.stat_result) -> LibraryEntry:
+        entry = LibraryEntry(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        # Разбор без кэша config_loader: иначе в памяти остались бы все файлы библиотеки
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            document = parse_config(data.decode("utf-8-sig"), path=path, digest=hashlib.sha256(data).hexdigest())
+        except (OSError, ConfigError, UnicodeDecodeError) as e:
+            entry.error, entry.error_args = "Ошибка при чтении config.ini: {error}", {"error": str(e)}
+            return entry
+        entry.digest = document.digest
+        entry.sections = [section.name for section in document.script_sections]
+        entry.lists = list(dict.fromkeys(
+            path for section in document.script_sections for path in section.command.lists
+        ))
+        problem = validate_document(document)
+        if problem:
+            entry.error, entry.error_args = problem
+        return entry
+
+    def refresh(self) -> int:
+        """
+        Обновляет индекс по содержимому каталогов. Возвращает число заново
+        разобранных файлов; индекс сохраняется, только если что-то изменилось.
+        """
+        found = self._scan()
+        changed = len(set(self.entries) - set(found))
+        for path in list(self.entries):
+            if path not in found:
+                del self.entries[path]
+
+        for path, stat in found.items():
+            entry = self.entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                continue
+            self.entries[path] = self._index_file(path, stat)
+            changed += 1
+
+        if changed:
+            self._save_index()
+        return changed
+
+    def sorted_entries(self) -> List[LibraryEntry]:
+        return sorted(self.entries.values(), key=lambda entry: (os.path.dirname(entry.path), entry.name.lower()))
+
+    def get(self, path: str) -> Optional[LibraryEntry]:
+        return self.entries.get(os.path.abspath(path))
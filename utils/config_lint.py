@@ -0,0 +1,221 @@
+import os
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from utils.config_loader import SectionOptions
+from utils.port_set import PortSet
+from utils.winws_filter import compile_capture_filter, profile_ports
+from utils.winws_profile import HOSTLIST_OPTIONS, IPSET_OPTIONS, WinwsCommand, WinwsProfile
+
+# --hostlist больше этого размера загружается заметно дольше и занимает память в winws
+LARGE_LIST_BYTES = 1024 * 1024
+# Лишний перехват от этого числа портов считается дорогим
+WIDE_CAPTURE_PORTS = 10000
+
+LIST_OPTIONS = frozenset(HOSTLIST_OPTIONS) | frozenset(IPSET_OPTIONS)
+EXCLUDE_OPTIONS = frozenset({"--hostlist-exclude", "--ipset-exclude"})
+# Прочие фильтры профиля: более ранний профиль перекрывает следующий, только если они совпадают
+MATCH_OPTIONS = frozenset({"--filter-l3", "--hostlist-domains", "--ipset-ip", "--filter-ssid"})
+# Опции desync, которые можно указывать несколько раз (несколько фейков)
+REPEATABLE_DESYNC = frozenset({
+    "--dpi-desync-fake-tls", "--dpi-desync-fake-quic", "--dpi-desync-fake-http",
+    "--dpi-desync-fake-unknown", "--dpi-desync-fake-unknown-udp", "--dpi-desync-fake-syndata",
+})
+FILE_EXTENSIONS = (".txt", ".bin", ".lst", ".gz")
+# Профиль, обрабатывающий веб-порты или общие протоколы, обычно нуждается в большом списке
+WEB_PORTS = (80, 443)
+GENERIC_L7 = frozenset({"http", "tls", "quic", "unknown"})
+
+
+class Cost(IntEnum):
+    """Оценка влияния находки на производительность обхода."""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+@dataclass
+class LintFinding:
+    """
+    Находка линтера. message — шаблон для tr(), params — параметры для format;
+    profile — номер профиля winws в секции, если находка относится к профилю.
+    log_only — справочная находка, которую пользователь не может исправить: только в лог.
+    """
+    section: str
+    code: str
+    cost: Cost
+    message: str
+    params: Dict[str, object] = field(default_factory=dict)
+    profile: Optional[int] = None
+    log_only: bool = False
+
+
+class _FileStats:
+    """Размеры файлов, запрошенные за один прогон: общие списки проверяются один раз."""
+
+    def __init__(self):
+        self._sizes: Dict[str, Optional[int]] = {}
+
+    def size(self, path: str) -> Optional[int]:
+        if path not in self._sizes:
+            try:
+                self._sizes[path] = os.stat(path).st_size
+            except OSError:
+                self._sizes[path] = None
+        return self._sizes[path]
+
+
+def _looks_like_file(value: str) -> bool:
+    return ("\\" in value or "/" in value) and value.lower().endswith(FILE_EXTENSIONS)
+
+
+def _options(profile: WinwsProfile, names: frozenset) -> Set[str]:
+    return {option.raw for option in profile.options if option.name in names}
+
+
+def _lists_cover(earlier: WinwsProfile, later: WinwsProfile) -> bool:
+    """Списки earlier пропускают всё, что пропускают списки later."""
+    if not _options(earlier, EXCLUDE_OPTIONS) <= _options(later, EXCLUDE_OPTIONS):
+        return False
+    earlier_lists = _options(earlier, LIST_OPTIONS - EXCLUDE_OPTIONS)
+    later_lists = _options(later, LIST_OPTIONS - EXCLUDE_OPTIONS)
+    if not earlier_lists:
+        return True
+    kinds = {option.name for option in earlier.options if option.raw in earlier_lists}
+    later_kinds = {option.name for option in later.options if option.raw in later_lists}
+    if earlier_lists == later_lists:
+        return True
+    # Несколько списков одного вида внутри профиля объединяются по "или"
+    return len(kinds) == 1 and kinds == later_kinds and later_lists <= earlier_lists
+
+
+def shadows(earlier: WinwsProfile, later: WinwsProfile,
+            earlier_ports: Dict[str, PortSet], later_ports: Dict[str, PortSet]) -> bool:
+    """earlier совпадает со всем трафиком later, поэтому later недостижим (побеждает первый профиль)."""
+    if any(later_ports[protocol] - earlier_ports[protocol] for protocol in later_ports):
+        return False
+    earlier_l7, later_l7 = set(earlier.l7), set(later.l7)
+    if earlier_l7 and (not later_l7 or not later_l7 <= earlier_l7):
+        return False
+    if _options(earlier, MATCH_OPTIONS) - _options(later, MATCH_OPTIONS):
+        return False
+    return _lists_cover(earlier, later)
+
+
+def _narrowed(profile: WinwsProfile, ports: Optional[Dict[str, PortSet]]) -> bool:
+    """
+    Профиль ограничен конкретным сервисом (--filter-l7 или портами не для веба),
+    поэтому вместо большого общего списка ему, вероятно, хватит меньшего.
+    """
+    if set(profile.l7) - GENERIC_L7:
+        return True
+    if ports is None or not profile.has_port_filter:
+        return False
+    return not any(port in port_set for port_set in ports.values() for port in WEB_PORTS)
+
+
+def _lint_profiles(section: str, command: WinwsCommand, files: _FileStats) -> List[LintFinding]:
+    findings: List[LintFinding] = []
+    earlier: List[Tuple[WinwsProfile, Dict[str, PortSet]]] = []
+    for profile in command:
+        # Профиль только с глобальными опциями (--wf-*) не участвует в сопоставлении
+        if not profile.profile_options:
+            continue
+        try:
+            ports: Optional[Dict[str, PortSet]] = profile_ports(profile)
+        except ValueError:
+            ports = None
+
+        if ports is not None:
+            for previous, previous_ports in earlier:
+                if shadows(previous, profile, previous_ports, ports):
+                    findings.append(LintFinding(
+                        section, "shadowed", Cost.LOW,
+                        "Профиль {profile} недостижим: весь его трафик забирает профиль {previous}",
+                        {"profile": profile.index, "previous": previous.index}, profile.index,
+                    ))
+                    break
+            earlier.append((profile, ports))
+
+        seen: Dict[str, str] = {}
+        for option in profile.desync:
+            if option.name in REPEATABLE_DESYNC:
+                continue
+            if option.name in seen and seen[option.name] != option.raw:
+                findings.append(LintFinding(
+                    section, "conflicting_desync", Cost.LOW,
+                    "Профиль {profile}: {option} задана несколько раз с разными значениями, действует последняя: {value}",
+                    {"profile": profile.index, "option": option.name, "value": option.value or ""}, profile.index,
+                ))
+            seen[option.name] = option.raw
+
+        narrowed = _narrowed(profile, ports)
+        for value in profile.values("--hostlist"):
+            size = files.size(value)
+            if size is not None and size >= LARGE_LIST_BYTES:
+                findings.append(LintFinding(
+                    section, "large_hostlist", Cost.MEDIUM if narrowed else Cost.LOW,
+                    "Профиль {profile}: --hostlist {file} занимает {size} КиБ; "
+                    "если профилю нужны несколько доменов, меньший список загрузится быстрее",
+                    {"profile": profile.index, "file": os.path.basename(value), "size": size // 1024},
+                    profile.index, log_only=not narrowed,
+                ))
+    return findings
+
+
+def _lint_files(section: str, command: WinwsCommand, files: _FileStats, reported: Set[str]) -> List[LintFinding]:
+    """reported — файлы, уже отмеченные в других секциях: общий список сообщается один раз."""
+    findings: List[LintFinding] = []
+    for profile in command:
+        for option in profile.options:
+            value = option.value
+            # Файл --hostlist-auto winws создаёт сам
+            if not value or value in reported or option.name == "--hostlist-auto":
+                continue
+            if option.name in LIST_OPTIONS or _looks_like_file(value):
+                if files.size(value) is None:
+                    reported.add(value)
+                    findings.append(LintFinding(
+                        section, "missing_file", Cost.HIGH,
+                        "Файл не найден: {file} ({option})",
+                        {"file": value, "option": option.name}, profile.index,
+                    ))
+    return findings
+
+
+def _lint_capture(section: str, command: WinwsCommand) -> List[LintFinding]:
+    plan = compile_capture_filter(command)
+    if plan.skipped:
+        return []
+    return [
+        LintFinding(
+            section, "wide_capture", Cost.HIGH if len(excess) >= WIDE_CAPTURE_PORTS else Cost.MEDIUM,
+            "--wf-{protocol} перехватывает {count} портов, которые не обрабатывает ни один профиль: {ports}",
+            {"protocol": protocol, "count": len(excess), "ports": str(excess)},
+        )
+        for protocol, excess in plan.excess.items()
+    ]
+
+
+def lint_options(options: Mapping[str, SectionOptions]) -> List[LintFinding]:
+    """
+    Проверяет все секции конфигурации за один проход. options — секции с
+    подставленными плейсхолдерами (ScriptOptions). Находки отсортированы по
+    убыванию оценки стоимости; отсутствующий файл сообщается один раз для всех секций.
+    """
+    files = _FileStats()
+    reported: Set[str] = set()
+    findings: List[LintFinding] = []
+    for name in options:
+        executable, args = options[name]
+        command = WinwsCommand.parse(args)
+        if executable and executable not in reported and files.size(executable) is None:
+            reported.add(executable)
+            findings.append(LintFinding(name, "missing_file", Cost.HIGH, "Файл не найден: {file} ({option})",
+                                        {"file": executable, "option": "executable"}))
+        findings.extend(_lint_files(name, command, files, reported))
+        findings.extend(_lint_profiles(name, command, files))
+        findings.extend(_lint_capture(name, command))
+    findings.sort(key=lambda finding: finding.cost, reverse=True)
+    return findings
@@ -0,0 +1,386 @@
+import hashlib
+import os
+import re
+import threading
+from collections import abc
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from utils.port_set import normalize_ports
+from utils.winws_profile import PORT_LIST_OPTIONS, WinwsCommand
+
+SCRIPT_OPTIONS_SECTION = "SCRIPT_OPTIONS"
+REQUIRED_KEYS = ("executable", "args")
+
+# [@имя] — именованный блок аргументов; в args на него ссылаются элементом "@имя"
+BLOCK_PREFIX = "@"
+# extends = <секция> — взять недостающие ключи у другой секции;
+# append_args = ... — дописать аргументы после унаследованных
+EXTENDS_KEY = "extends"
+APPEND_ARGS_KEY = "append_args"
+
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z0-9_]+)\}")
+_COMMENT_PREFIXES = ("#", ";")
+
+# Опции секции после подстановки: (путь к исполняемому файлу, список аргументов)
+SectionOptions = Tuple[Optional[str], List[str]]
+
+
+class ConfigError(Exception):
+    """Файл конфигурации не удалось разобрать."""
+
+
+class ArgTemplate:
+    """
+    Аргумент, заранее разбитый на литералы и слоты плейсхолдеров.
+    Для "--key=a,b,{SLOT}" значение хранится поэлементно: пустые после
+    подстановки элементы выпадают вместе со своей запятой, а аргумент
+    с пустым значением ("--key=") не выводится вовсе. Списки портов
+    (--wf-*, --filter-tcp/udp) после подстановки сводятся к минимальной
+    отсортированной записи, так что пересечения с Game Filter не попадают в winws.
+    """
+
+    __slots__ = ("prefix", "items", "static", "ports")
+
+    def __init__(self, raw: str):
+        key, sep, value = raw.partition("=")
+        if sep and "{" not in key:
+            self.prefix: Optional[str] = key + sep
+            pieces = value.split(",")
+        else:
+            self.prefix = None
+            pieces = [raw]
+        self.ports = key in PORT_LIST_OPTIONS and self.prefix is not None
+        # Элемент без слотов хранится строкой, со слотами — списком из re.split:
+        # чётные позиции — литералы, нечётные — имена плейсхолдеров
+        self.items = [piece if "{" not in piece else _PLACEHOLDER_RE.split(piece) for piece in pieces]
+        if any(isinstance(item, list) and len(item) > 1 for item in self.items):
+            self.static: Optional[str] = None
+        else:
+            self.items = ["".join(item) if isinstance(item, list) else item for item in self.items]
+            self.static = self._join(self.items)
+
+    def _join(self, values: List[str]) -> Optional[str]:
+        values = [value for value in values if value]
+        if not values:
+            return None
+        if self.prefix is None:
+            return values[0]
+        if self.ports:
+            return self.prefix + normalize_ports(",".join(values))
+        return self.prefix + ",".join(values)
+
+    def render(self, placeholders: Mapping[str, str]) -> Optional[str]:
+        """Подставляет значения за один проход; None, если аргумент пуст."""
+        if self.static is not None:
+            return self.static
+        values = []
+        for item in self.items:
+            if item.__class__ is not str:
+                parts = item[:]
+                parts[1::2] = [placeholders.get(name, "{" + name + "}") for name in item[1::2]]
+                item = "".join(parts)
+            values.append(item)
+        return self._join(values)
+
+
+@dataclass
+class ConfigSection:
+    """Секция INI в исходном виде, без подстановки плейсхолдеров."""
+    name: str
+    line: int
+    values: Dict[str, str] = field(default_factory=dict)
+    # Аргументы после раскрытия блоков и наследования; заполняет resolve_sections
+    resolved_args: Optional[List[str]] = field(default=None, repr=False)
+
+    @property
+    def executable(self) -> Optional[str]:
+        return self.values.get("executable")
+
+    @property
+    def is_block(self) -> bool:
+        return self.name.startswith(BLOCK_PREFIX)
+
+    @cached_property
+    def raw_args(self) -> List[str]:
+        """Аргументы секции с раскрытыми блоками и наследованием, без подстановки плейсхолдеров."""
+        if self.resolved_args is not None:
+            return self.resolved_args
+        return split_args(self.values.get("args", ""))
+
+    @cached_property
+    def templates(self) -> List[ArgTemplate]:
+        """Аргументы, скомпилированные в шаблоны; компилируются один раз на секцию."""
+        return [ArgTemplate(arg) for arg in self.raw_args]
+
+    @cached_property
+    def command(self) -> WinwsCommand:
+        """Аргументы секции, разобранные на профили winws (без подстановки плейсхолдеров)."""
+        return WinwsCommand.parse(self.raw_args)
+
+    def render_args(self, placeholders: Mapping[str, str]) -> List[str]:
+        args = []
+        for template in self.templates:
+            arg = template.render(placeholders)
+            if arg is not None:
+                args.append(arg)
+        return args
+
+    @property
+    def missing_keys(self) -> List[str]:
+        return [key for key in REQUIRED_KEYS if key not in self.values]
+
+
+@dataclass
+class ConfigDocument:
+    """Результат одного прохода по файлу конфигурации."""
+    path: str
+    digest: str
+    sections: Dict[str, ConfigSection] = field(default_factory=dict)
+    duplicates: List[str] = field(default_factory=list)
+    _expanded: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], SectionOptions] = field(default_factory=dict, repr=False)
+
+    @property
+    def has_script_options(self) -> bool:
+        return SCRIPT_OPTIONS_SECTION in self.sections
+
+    @property
+    def script_sections(self) -> List[ConfigSection]:
+        return [
+            section for name, section in self.sections.items()
+            if name != SCRIPT_OPTIONS_SECTION and not section.is_block
+        ]
+
+    def section_options(self, name: str, placeholders: Mapping[str, str]) -> SectionOptions:
+        """
+        Опции одной секции с подставленными значениями плейсхолдеров.
+        Шаблоны секции компилируются при первом обращении, результат
+        запоминается для каждого набора значений.
+        """
+        key = (name, tuple(sorted(placeholders.items())))
+        options = self._expanded.get(key)
+        if options is None:
+            section = self.sections[name]
+            options = (expand_executable(section.executable, placeholders), section.render_args(placeholders))
+            self._expanded[key] = options
+        return options
+
+    def script_options(self, placeholders: Mapping[str, str]) -> "ScriptOptions":
+        return ScriptOptions(self, placeholders)
+
+
+class ScriptOptions(abc.Mapping):
+    """
+    Опции секций конфигурации как словарь "имя секции -> (executable, args)".
+    Имена берутся из уже разобранного документа, а аргументы секции
+    рендерятся только при обращении к ней.
+    """
+
+    def __init__(self, document: ConfigDocument, placeholders: Mapping[str, str]):
+        self._document = document
+        self._placeholders = dict(placeholders)
+        self._names = dict.fromkeys(section.name for section in document.script_sections)
+
+    def __getitem__(self, name: str) -> SectionOptions:
+        if name not in self._names:
+            raise KeyError(name)
+        return self._document.section_options(name, self._placeholders)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+def split_args(value: str) -> List[str]:
+    """Аргументы, разделённые ';', как они записаны в значении ключа."""
+    if not value:
+        return []
+    return [arg.strip() for arg in " ".join(value.splitlines()).split(";") if arg.strip()]
+
+
+def resolve_sections(document: ConfigDocument) -> None:
+    """
+    Раскрывает ссылки на блоки [@имя] и наследование extends для всех секций.
+    Каждая секция и каждый блок разрешаются один раз; неизвестные ссылки
+    и циклы — ConfigError.
+    """
+    blocks: Dict[str, List[str]] = {}
+    resolved: Dict[str, ConfigSection] = {}
+
+    def block_args(name: str, stack: Tuple[str, ...]) -> List[str]:
+        if name in blocks:
+            return blocks[name]
+        if name in stack:
+            raise ConfigError(f"циклическая ссылка на блок [{name}]: {' -> '.join(stack + (name,))}")
+        block = document.sections.get(name)
+        if block is None or not block.is_block:
+            raise ConfigError(f"неизвестный блок аргументов [{name}]")
+        blocks[name] = expand(split_args(block.values.get("args", "")), stack + (name,))
+        return blocks[name]
+
+    def expand(args: List[str], stack: Tuple[str, ...]) -> List[str]:
+        result: List[str] = []
+        for arg in args:
+            if arg.startswith(BLOCK_PREFIX):
+                result.extend(block_args(arg, stack))
+            else:
+                result.append(arg)
+        return result
+
+    def resolve(section: ConfigSection, stack: Tuple[str, ...]) -> ConfigSection:
+        if section.name in resolved:
+            return section
+        if section.name in stack:
+            raise ConfigError(f"циклическое наследование: {' -> '.join(stack + (section.name,))}")
+        values = section.values
+        own_args = "args" in values
+        args = expand(split_args(values.get("args", "")), stack)
+        parent_name = values.get(EXTENDS_KEY)
+        if parent_name:
+            parent = document.sections.get(parent_name)
+            if parent is None or parent.is_block or parent.name == SCRIPT_OPTIONS_SECTION:
+                raise ConfigError(f"секция [{section.name}] наследует неизвестную секцию [{parent_name}]")
+            resolve(parent, stack + (section.name,))
+            for key, value in parent.values.items():
+                if key not in (EXTENDS_KEY, APPEND_ARGS_KEY):
+                    values.setdefault(key, value)
+            if not own_args:
+                args = list(parent.raw_args)
+        args.extend(expand(split_args(values.get(APPEND_ARGS_KEY, "")), stack))
+        section.resolved_args = args
+        resolved[section.name] = section
+        return section
+
+    for section in document.sections.values():
+        if section.is_block:
+            block_args(section.name, ())
+        elif section.name != SCRIPT_OPTIONS_SECTION:
+            resolve(section, ())
+
+
+def expand_placeholders(text: str, placeholders: Mapping[str, str]) -> str:
+    """Подставляет значения {NAME} за один проход; неизвестные плейсхолдеры остаются как есть."""
+    if "{" not in text:
+        return text
+    return _PLACEHOLDER_RE.sub(lambda m: placeholders.get(m.group(1), m.group(0)), text)
+
+
+def expand_executable(executable: Optional[str], placeholders: Mapping[str, str]) -> Optional[str]:
+    if not executable:
+        return executable
+    executable = expand_placeholders(executable, placeholders)
+    base_folder = placeholders.get("BASE_FOLDER")
+    if base_folder and not os.path.isabs(executable):
+        executable = os.path.join(base_folder, executable)
+    return executable
+
+
+def parse_config(text: str, path: str = "", digest: str = "") -> ConfigDocument:
+    """
+    Разбирает INI за один проход: секции, ключи (key = value и key: value),
+    многострочные значения с отступом, комментарии '#'/';' в начале строки.
+    Затем раскрывает блоки [@имя] и extends (см. resolve_sections).
+    Повторяющиеся секции собираются в duplicates; повторяющийся ключ внутри
+    секции и строки вне секций — ConfigError.
+    """
+    document = ConfigDocument(path=path, digest=digest)
+    section: Optional[ConfigSection] = None
+    key: Optional[str] = None
+    key_indent = 0
+    value_lines: List[str] = []
+
+    def finish_value() -> None:
+        if section is not None and key is not None:
+            section.values[key] = "\n".join(value_lines).strip()
+
+    for number, line in enumerate(text.splitlines(), start=1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(_COMMENT_PREFIXES):
+            # Пустые строки и комментарии внутри многострочного значения не обрывают его
+            continue
+        indent = len(line) - len(line.lstrip())
+
+        if key is not None and indent > key_indent:
+            value_lines.append(stripped)
+            continue
+
+        finish_value()
+        key = None
+
+        if stripped.startswith("[") and stripped.endswith("]"):
+            name = stripped[1:-1]
+            if name in document.sections:
+                if name not in document.duplicates:
+                    document.duplicates.append(name)
+                section = document.sections[name]
+            else:
+                section = ConfigSection(name=name, line=number)
+                document.sections[name] = section
+            continue
+
+        if section is None:
+            raise ConfigError(f"строка {number}: параметр вне секции: {stripped!r}")
+
+        positions = [pos for pos in (stripped.find("="), stripped.find(":")) if pos > 0]
+        if not positions:
+            raise ConfigError(f"строка {number}: ожидалось 'ключ = значение': {stripped!r}")
+        split_at = min(positions)
+        key = stripped[:split_at].strip()
+        if key in section.values and section.name not in document.duplicates:
+            raise ConfigError(f"строка {number}: ключ '{key}' повторяется в секции [{section.name}]")
+        key_indent = indent
+        value_lines = [stripped[split_at + 1:].strip()]
+
+    finish_value()
+    resolve_sections(document)
+    return document
+
+
+@dataclass
+class _CacheEntry:
+    stamp: Tuple[int, int]
+    document: ConfigDocument
+
+
+_cache: Dict[str, _CacheEntry] = {}
+_cache_lock = threading.Lock()
+
+
+def load_config(path: str) -> ConfigDocument:
+    """
+    Загружает конфигурацию с кэшированием по (путь, mtime, размер, хеш содержимого).
+    Если mtime и размер не изменились, стоит один вызов stat. Если изменился
+    только mtime, а содержимое то же, повторного разбора не будет.
+    OSError и ConfigError пробрасываются вызывающему.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is not None and entry.stamp == stamp:
+        return entry.document
+
+    with open(key, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if entry is not None and entry.document.digest == digest:
+        document = entry.document
+    else:
+        document = parse_config(data.decode("utf-8-sig"), path=key, digest=digest)
+
+    with _cache_lock:
+        _cache[key] = _CacheEntry(stamp=stamp, document=document)
+    return document
+
+
+def invalidate(path: Optional[str] = None) -> None:
+    """Сбрасывает кэш для файла или целиком."""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
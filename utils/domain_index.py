@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.file_utils import atomic_open
+
+logger = logging.getLogger("dpipenguin")
+
+# Формат файла индекса (little-endian):
+#   magic[8] | sha256 источника[32] | mtime_ns[8] | size[8] | count[4]
+#   offsets[(count + 1) * 4] | flags[count] | keys
+# keys — отсортированные имена с перевёрнутыми метками ("com.example"),
+# flags — 1 для записей "^domain" (без поддоменов).
+INDEX_MAGIC = b"DPIDX\x00\x01\x00"
+_HEADER = struct.Struct("<8s32sqqI")
+_EXACT_ONLY = 1
+
+
+def reverse_labels(host: str) -> str:
+    """www.example.com -> com.example.www"""
+    return ".".join(reversed(host.split(".")))
+
+
+def normalize_entry(line: str) -> Optional[Tuple[str, bool]]:
+    """
+    Разбирает строку hostlist так же, как winws: регистр не важен,
+    пустые строки и комментарии пропускаются, "^" в начале отключает поддомены.
+    Возвращает (домен, только_точное_совпадение) или None.
+    """
+    host = line.strip().lower()
+    if not host or host.startswith('#'):
+        return None
+    exact = host.startswith('^')
+    if exact:
+        host = host[1:]
+    host = host.rstrip('.')
+    return (host, exact) if host else None
+
+
+def _file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class DomainIndex:
+    """Отображаемый в память индекс hostlist для поиска по суффиксу домена."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = self._flags = None
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        try:
+            magic, self.source_sha256, self.source_mtime_ns, self.source_size, self.count = \
+                _HEADER.unpack_from(self._mm, 0)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"Неизвестный формат индекса: {path}")
+            offsets_start = _HEADER.size
+            flags_start = offsets_start + (self.count + 1) * 4
+            self._keys_start = flags_start + self.count
+            if self._keys_start > len(self._mm):
+                raise ValueError(f"Индекс обрезан: {path}")
+            with memoryview(self._mm) as view:
+                self._offsets = view[offsets_start:flags_start].cast("I")
+                self._flags = view[flags_start:self._keys_start]
+            if self._keys_start + self._offsets[self.count] > len(self._mm):
+                raise ValueError(f"Индекс обрезан: {path}")
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        for view in (self._offsets, self._flags):
+            if view is not None:
+                view.release()
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+
+    def __enter__(self) -> "DomainIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _find(self, key: bytes) -> int:
+        mm, offsets, base = self._mm, self._offsets, self._keys_start
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if mm[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and mm[base + offsets[lo]:base + offsets[lo + 1]] == key:
+            return lo
+        return -1
+
+    def lookup(self, host: str) -> Optional[str]:
+        """
+        Возвращает запись списка, которая покрывает host (самую общую), или None.
+        Семантика как у --hostlist в winws: запись example.com покрывает
+        example.com и все его поддомены, ^example.com — только сам домен.
+        """
+        parsed = normalize_entry(host)
+        if parsed is None:
+            return None
+        labels = parsed[0].split(".")
+        key = ""
+        for depth in range(len(labels) - 1, -1, -1):
+            key = labels[depth] if not key else f"{key}.{labels[depth]}"
+            i = self._find(key.encode("utf-8"))
+            if i >= 0 and (depth == 0 or not self._flags[i] & _EXACT_ONLY):
+                return reverse_labels(key)
+        return None
+
+    def covers(self, host: str) -> bool:
+        return self.lookup(host) is not None
+
+    @classmethod
+    def build(cls, source_path: str, index_path: str) -> "DomainIndex":
+        """Компилирует hostlist в файл индекса и открывает его."""
+        entries: Dict[bytes, int] = {}
+        with open(source_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parsed = normalize_entry(line)
+                if parsed is None:
+                    continue
+                key = reverse_labels(parsed[0]).encode("utf-8")
+                # Обычная запись сильнее "^": она покрывает и сам домен, и поддомены
+                flag = _EXACT_ONLY if parsed[1] else 0
+                entries[key] = entries.get(key, flag) & flag
+
+        keys = sorted(entries)
+        offsets: List[int] = [0]
+        for key in keys:
+            offsets.append(offsets[-1] + len(key))
+
+        stat = os.stat(source_path)
+        header = _HEADER.pack(INDEX_MAGIC, _file_sha256(source_path), stat.st_mtime_ns, stat.st_size, len(keys))
+        with atomic_open(index_path, "wb") as f:
+            f.write(header)
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(bytes(entries[key] for key in keys))
+            f.write(b"".join(keys))
+        return cls(index_path)
+
+    @classmethod
+    def load(cls, source_path: str, index_path: str) -> "DomainIndex":
+        """
+        Открывает индекс, пересобирая его только если изменился хеш источника.
+        Совпадение mtime и размера позволяет не считать хеш вовсе.
+        """
+        stat = os.stat(source_path)
+        if os.path.exists(index_path):
+            try:
+                index = cls(index_path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Индекс {index_path} повреждён, пересборка: {e}")
+            else:
+                if (index.source_mtime_ns, index.source_size) == (stat.st_mtime_ns, stat.st_size):
+                    return index
+                same = index.source_sha256 == _file_sha256(source_path)
+                index.close()
+                if same:
+                    cls._touch(index_path, stat)
+                    return cls(index_path)
+        logger.info(f"Сборка индекса доменов для {source_path}")
+        return cls.build(source_path, index_path)
+
+    @staticmethod
+    def _touch(index_path: str, stat: os.stat_result) -> None:
+        """Обновляет mtime/size источника в заголовке без пересборки."""
+        with open(index_path, "r+b") as f:
+            f.seek(8 + 32)
+            f.write(struct.pack("<qq", stat.st_mtime_ns, stat.st_size))
+
+
+class HostlistIndexes:
+    """
+    Набор индексов для нескольких hostlist-файлов. Индекс списка переоткрывается,
+    только когда у файла меняются mtime или размер; доступ защищён блокировкой,
+    так как проверки идут из рабочих потоков.
+    """
+
+    def __init__(self, sources: Iterable[str], index_dir: str):
+        self.sources = list(sources)
+        self.index_dir = index_dir
+        self._indexes: Dict[str, DomainIndex] = {}
+        self._stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def index_path(self, source_path: str) -> str:
+        return os.path.join(self.index_dir, os.path.basename(source_path) + ".idx")
+
+    def _refresh_stale(self) -> None:
+        for source in self.sources:
+            try:
+                stat = os.stat(source)
+                stamp: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp = None
+            if source in self._stamps and self._stamps[source] == stamp:
+                continue
+            old = self._indexes.pop(source, None)
+            if old is not None:
+                old.close()
+            self._stamps[source] = stamp
+            if stamp is None:
+                continue
+            try:
+                self._indexes[source] = DomainIndex.load(source, self.index_path(source))
+            except Exception as e:
+                logger.exception(f"Не удалось открыть индекс для {source}: {e}")
+
+    def refresh(self) -> None:
+        """Переоткрывает индексы списков, изменившихся с прошлого открытия."""
+        with self._lock:
+            self._refresh_stale()
+
+    def invalidate(self) -> None:
+        """Закрывает все индексы; следующая проверка откроет их заново (после обновления списков)."""
+        with self._lock:
+            self._close()
+
+    def check(self, host: str) -> Dict[str, Optional[str]]:
+        """Для каждого списка возвращает покрывающую запись или None."""
+        with self._lock:
+            self._refresh_stale()
+            return {source: index.lookup(host) for source, index in self._indexes.items()}
+
+    def _close(self) -> None:
+        for index in self._indexes.values():
+            index.close()
+        self._indexes.clear()
+        self._stamps.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
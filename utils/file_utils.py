@@ -0,0 +1,53 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Tuple, Union
+
+
+def remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def open_temp_near(path: str, mode: str = "wb", encoding: Optional[str] = None,
+                   newline: Optional[str] = None) -> Tuple[IO, str]:
+    """
+    Создаёт временный файл .<имя>.*.part в каталоге path (каталог создаётся при
+    необходимости), чтобы os.replace на место path был атомарным.
+    Возвращает открытый файл и путь к нему; удалить или переименовать файл должен вызывающий.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".part")
+    try:
+        return os.fdopen(fd, mode, encoding=None if "b" in mode else encoding, newline=newline), tmp_path
+    except BaseException:
+        os.close(fd)
+        remove_quietly(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str = "utf-8",
+                newline: Optional[str] = None) -> Iterator[IO]:
+    """
+    Файл для записи, который заменяет path только после успешного выхода из with.
+    При исключении внутри блока path не меняется, временный файл удаляется.
+    """
+    f, tmp_path = open_temp_near(path, mode, encoding, newline)
+    try:
+        with f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+
+
+def atomic_write(path: str, data: Union[str, bytes], mode: str = "w", encoding: str = "utf-8",
+                 newline: Optional[str] = None) -> None:
+    """Атомарно записывает data в path (временный файл + os.replace)."""
+    with atomic_open(path, mode, encoding, newline) as f:
+        f.write(data)
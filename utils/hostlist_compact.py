@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from utils.domain_index import normalize_entry
+from utils.file_utils import atomic_open
+
+
+@dataclass
+class CompactStats:
+    """Итог сжатия hostlist."""
+    input_entries: int = 0
+    duplicates: int = 0
+    covered: int = 0
+    output_entries: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.input_entries - self.output_entries
+
+
+def compact_hosts(lines: Iterable[str]) -> Tuple[List[str], CompactStats]:
+    """
+    Нормализует список (регистр, пробелы, точка в конце), убирает дубликаты
+    и поддомены, уже покрытые родительским доменом (winws сравнивает по суффиксу).
+    Записи "^domain" покрывают только сам домен и поддомены не поглощают.
+    Возвращает отсортированный список и статистику.
+    """
+    stats = CompactStats()
+    entries: Dict[str, bool] = {}
+    for line in lines:
+        parsed = normalize_entry(line)
+        if parsed is None:
+            continue
+        stats.input_entries += 1
+        host, exact = parsed
+        if host in entries:
+            stats.duplicates += 1
+            entries[host] = entries[host] and exact
+        else:
+            entries[host] = exact
+
+    result: List[str] = []
+    for host, exact in entries.items():
+        labels = host.split(".")
+        if any(entries.get(".".join(labels[i:])) is False for i in range(1, len(labels))):
+            stats.covered += 1
+            continue
+        result.append(f"^{host}" if exact else host)
+
+    result.sort()
+    stats.output_entries = len(result)
+    return result, stats
+
+
+def compact_file(path: str) -> CompactStats:
+    """Сжимает hostlist на месте: построчное чтение, запись во временный файл и os.replace."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        hosts, stats = compact_hosts(f)
+    with atomic_open(path, newline="\n") as f:
+        for host in hosts:
+            f.write(host + "\n")
+    return stats
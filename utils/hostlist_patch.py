@@ -0,0 +1,119 @@
+import hashlib
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from utils.file_utils import atomic_open
+from utils.hostlist_compact import compact_hosts
+
+PATCH_HEADER = "# dpipenguin hostlist patch v1"
+
+
+class PatchError(Exception):
+    """Патч не подходит к локальному списку или повреждён."""
+
+
+def canonical_lines(lines: Iterable[str]) -> List[str]:
+    """
+    Канонический вид списка — результат compact_hosts: нормализованные,
+    уникальные, без покрытых поддоменов, отсортированные строки.
+    """
+    return compact_hosts(lines)[0]
+
+
+def lines_sha256(lines: Iterable[str]) -> str:
+    """SHA-256 списка в том виде, в котором он записывается на диск."""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_patch(old_lines: Iterable[str], new_lines: Iterable[str]) -> str:
+    """
+    Строит патч между двумя версиями списка.
+    Обе версии приводятся к каноническому виду; base и target — их хеши.
+    """
+    old = canonical_lines(old_lines)
+    new = canonical_lines(new_lines)
+    old_set, new_set = set(old), set(new)
+    removed = [host for host in old if host not in new_set]
+    added = [host for host in new if host not in old_set]
+
+    out = [PATCH_HEADER, f"base {lines_sha256(old)}", f"target {lines_sha256(new)}"]
+    out.extend(f"-{host}" for host in removed)
+    out.extend(f"+{host}" for host in added)
+    return "\n".join(out) + "\n"
+
+
+def parse_patch(text: str) -> Tuple[str, str, Set[str], List[str]]:
+    """Разбирает патч. Возвращает (base, target, удаляемые, отсортированные добавляемые)."""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != PATCH_HEADER:
+        raise PatchError("Неизвестный формат патча")
+    base = target = ""
+    removed: Set[str] = set()
+    added: List[str] = []
+    for line in lines[1:]:
+        if line.startswith('+'):
+            added.append(line[1:])
+        elif line.startswith('-'):
+            removed.add(line[1:])
+        elif line.startswith('base '):
+            base = line[5:].strip()
+        elif line.startswith('target '):
+            target = line[7:].strip()
+        elif line.strip():
+            raise PatchError(f"Некорректная строка патча: {line!r}")
+    if not base or not target:
+        raise PatchError("В патче отсутствуют хеши base/target")
+    if any(added[i] > added[i + 1] for i in range(len(added) - 1)):
+        raise PatchError("Добавляемые строки патча не отсортированы")
+    return base, target, removed, added
+
+
+def merge_lines(base: Iterable[str], removed: Set[str], added: List[str]) -> Iterator[str]:
+    """
+    Линейное слияние отсортированного списка с отсортированными добавлениями
+    и удалениями. Повторной сортировки всего списка не происходит.
+    """
+    i, n = 0, len(added)
+    for host in base:
+        while i < n and added[i] < host:
+            yield added[i]
+            i += 1
+        if i < n and added[i] == host:
+            i += 1
+        if host not in removed:
+            yield host
+    while i < n:
+        yield added[i]
+        i += 1
+
+
+def apply_patch(path: str, patch_text: str) -> str:
+    """
+    Применяет патч к файлу списка и атомарно заменяет его.
+    Возвращает хеш нового содержимого; при несовпадении base/target бросает PatchError.
+    """
+    base, target, removed, added = parse_patch(patch_text)
+    if file_sha256(path) != base:
+        raise PatchError("Хеш локального списка не совпадает с base патча")
+
+    # Список читается целиком до записи: на Windows файл, открытый через open(),
+    # нельзя заменить os.replace, пока дескриптор не закрыт
+    with open(path, "r", encoding="utf-8") as src:
+        merged = list(merge_lines((line.rstrip("\n") for line in src), removed, added))
+    if lines_sha256(merged) != target:
+        raise PatchError("Хеш результата не совпадает с target патча")
+
+    with atomic_open(path, newline="\n") as dst:
+        dst.writelines(host + "\n" for host in merged)
+    return target
@@ -0,0 +1,344 @@
+import bisect
+import ipaddress
+import os
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.file_utils import atomic_open
+
+# Диапазон адресов одного семейства: (версия IP, первый адрес, последний адрес)
+IpRange = Tuple[int, int, int]
+
+_BITS = {4: 32, 6: 128}
+
+
+@dataclass
+class IpsetStats:
+    """Итог оптимизации ipset. Некорректные строки сохраняются в файле как есть."""
+    input_entries: int = 0
+    output_entries: int = 0
+    invalid_lines: List[str] = field(default_factory=list)
+
+    @property
+    def invalid(self) -> int:
+        return len(self.invalid_lines)
+
+    @property
+    def saved(self) -> int:
+        return self.input_entries - self.output_entries
+
+
+def parse_entry(line: str) -> Optional[IpRange]:
+    """
+    Разбирает строку ipset: адрес, префикс CIDR или диапазон "a-b".
+    Пустые строки и комментарии дают None, некорректные строки — ValueError.
+    """
+    entry = line.strip()
+    if not entry or entry.startswith('#'):
+        return None
+    if '-' in entry:
+        first, last = (ipaddress.ip_address(part.strip()) for part in entry.split('-', 1))
+        if first.version != last.version or int(first) > int(last):
+            raise ValueError(f"Некорректный диапазон: {entry}")
+        return first.version, int(first), int(last)
+    network = ipaddress.ip_network(entry, strict=False)
+    start = int(network.network_address)
+    return network.version, start, start + network.num_addresses - 1
+
+
+def merge_ranges(ranges: Iterable[IpRange]) -> List[IpRange]:
+    """Объединяет пересекающиеся и соседние диапазоны. Результат отсортирован."""
+    merged: List[IpRange] = []
+    for version, start, end in sorted(ranges):
+        if merged:
+            last_version, last_start, last_end = merged[-1]
+            if last_version == version and start <= last_end + 1:
+                if end > last_end:
+                    merged[-1] = (version, last_start, end)
+                continue
+        merged.append((version, start, end))
+    return merged
+
+
+def range_to_prefixes(version: int, start: int, end: int) -> List[Tuple[int, int]]:
+    """Минимальный набор префиксов (адрес, длина), точно покрывающий диапазон."""
+    bits = _BITS[version]
+    prefixes = []
+    while start <= end:
+        # Наибольший выровненный блок, начинающийся со start и не выходящий за end
+        size = (start & -start) if start else 1 << bits
+        while size > end - start + 1:
+            size >>= 1
+        prefixes.append((start, bits - size.bit_length() + 1))
+        start += size
+    return prefixes
+
+
+def format_prefix(version: int, address: int, length: int) -> str:
+    ip = ipaddress.IPv4Address(address) if version == 4 else ipaddress.IPv6Address(address)
+    return f"{ip}/{length}"
+
+
+def parse_ranges(lines: Iterable[str], stats: Optional[IpsetStats] = None) -> List[IpRange]:
+    ranges = []
+    for line in lines:
+        try:
+            parsed = parse_entry(line)
+        except ValueError:
+            if stats is not None:
+                stats.invalid_lines.append(line.strip())
+            continue
+        if parsed is None:
+            continue
+        if stats is not None:
+            stats.input_entries += 1
+        ranges.append(parsed)
+    return ranges
+
+
+def optimize_ipset(lines: Iterable[str]) -> Tuple[List[str], IpsetStats]:
+    """
+    Сворачивает пересекающиеся, вложенные и соседние префиксы IPv4/IPv6
+    в минимальный эквивалентный набор. Работает с целочисленными диапазонами.
+    Строки, которые не удалось разобрать, добавляются в конец без изменений.
+    """
+    stats = IpsetStats()
+    result = []
+    for version, start, end in merge_ranges(parse_ranges(lines, stats)):
+        result.extend(format_prefix(version, address, length)
+                      for address, length in range_to_prefixes(version, start, end))
+    stats.output_entries = len(result)
+    result.extend(stats.invalid_lines)
+    return result, stats
+
+
+def covered_ranges(lines: Iterable[str]) -> List[IpRange]:
+    """Множество покрытых адресов в виде отсортированных непересекающихся диапазонов."""
+    return merge_ranges(parse_ranges(lines))
+
+
+def _covered(intervals: List[Tuple[int, int]], starts: List[int], start: int, end: int) -> bool:
+    """Покрыт ли [start, end] отсортированными непересекающимися интервалами без пропусков."""
+    index = bisect.bisect_right(starts, start) - 1
+    while index >= 0 and index < len(intervals) and intervals[index][0] <= start <= intervals[index][1]:
+        if end <= intervals[index][1]:
+            return True
+        start = intervals[index][1] + 1
+        index += 1
+    return False
+
+
+def verify_equivalent(before: Iterable[str], after: Iterable[str]) -> bool:
+    """
+    Проверяет, что оптимизированный ipset after покрывает в точности те же
+    адреса, что и before. Не использует merge_ranges и range_to_prefixes:
+    каждая запись before ищется в префиксах after целиком (первый и последний
+    адрес и всё между ними), а равенство числа адресов исключает лишнее покрытие.
+    """
+    result: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+    for line in after:
+        try:
+            network = ipaddress.ip_network(line.strip())
+        except ValueError:
+            continue
+        start = int(network.network_address)
+        result[network.version].append((start, start + network.num_addresses - 1))
+
+    original: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+    for version, start, end in parse_ranges(before):
+        original[version].append((start, end))
+
+    for version in (4, 6):
+        intervals = sorted(result[version])
+        if any(current[0] <= previous[1] for previous, current in zip(intervals, intervals[1:])):
+            return False
+        starts = [start for start, _ in intervals]
+        if not all(_covered(intervals, starts, start, end) for start, end in original[version]):
+            return False
+
+        # Число адресов объединения before: проход по отсортированным записям
+        covered, reach = 0, -1
+        for start, end in sorted(original[version]):
+            if end > reach:
+                covered += end - max(start, reach + 1) + 1
+                reach = end
+        if covered != sum(end - start + 1 for start, end in intervals):
+            return False
+    return True
+
+
+def optimize_file(path: str, verify: bool = True) -> IpsetStats:
+    """
+    Оптимизирует ipset-файл на месте (временный файл + os.replace).
+    При verify=True файл заменяется только если покрытие адресов не изменилось.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        original = f.readlines()
+    optimized, stats = optimize_ipset(original)
+    if verify and not verify_equivalent(original, optimized):
+        raise ValueError(f"Оптимизация {path} изменила бы покрытие адресов")
+
+    with atomic_open(path, newline="\n") as f:
+        for prefix in optimized:
+            f.write(prefix + "\n")
+    return stats
+
+
+def address_counts(lines: Iterable[str]) -> Dict[int, int]:
+    """Число покрытых адресов по версиям IP."""
+    counts = {4: 0, 6: 0}
+    for version, start, end in covered_ranges(lines):
+        counts[version] += end - start + 1
+    return counts
+
+
+class IpsetTree:
+    """
+    Radix-дерево со сжатием путей (Patricia) для поиска самого длинного префикса.
+    Узел хранит свой префикс целиком (ключ и длину), поэтому цепочки узлов
+    с одним потомком не создаются: узлов не больше, чем 2 × число префиксов.
+    Поиск спускается только по узлам ветвления и узлам-префиксам на пути
+    адреса, сравнивая пропущенные биты одним XOR.
+    """
+
+    # Деревья последних загруженных файлов: (mtime_ns, размер) -> дерево
+    _cache: "OrderedDict[str, Tuple[Tuple[int, int], IpsetTree]]" = OrderedDict()
+    CACHE_SIZE = 8
+
+    def __init__(self):
+        self._key: List[int] = []
+        self._length = array('B')
+        self._left = array('i')
+        self._right = array('i')
+        self._prefix = array('i')
+        self._roots = {4: self._new_node(0, 0), 6: self._new_node(0, 0)}
+        self.prefixes: List[str] = []
+
+    def _new_node(self, key: int, length: int) -> int:
+        self._key.append(key)
+        self._length.append(length)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._prefix.append(-1)
+        return len(self._prefix) - 1
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._prefix)
+
+    def _set_prefix(self, node: int, version: int) -> None:
+        if self._prefix[node] < 0:
+            self._prefix[node] = len(self.prefixes)
+            self.prefixes.append(format_prefix(version, self._key[node], self._length[node]))
+
+    def insert(self, version: int, address: int, length: int) -> None:
+        """Добавляет префикс; address должен быть выровнен по длине префикса."""
+        bits = _BITS[version]
+        key, lengths = self._key, self._length
+        node = self._roots[version]
+        while True:
+            depth = lengths[node]
+            if depth == length:
+                self._set_prefix(node, version)
+                return
+            children = self._right if (address >> (bits - 1 - depth)) & 1 else self._left
+            child = children[node]
+            if child < 0:
+                children[node] = self._new_node(address, length)
+                self._set_prefix(children[node], version)
+                return
+
+            child_length = lengths[child]
+            limit = min(length, child_length)
+            diff = (address ^ key[child]) >> (bits - limit)
+            common = limit - diff.bit_length()
+            if common == child_length:
+                node = child
+                continue
+
+            # Префикс расходится с потомком внутри сжатого участка: вставляется узел ветвления
+            split = self._new_node(address >> (bits - common) << (bits - common), common)
+            children[node] = split
+            if (key[child] >> (bits - 1 - common)) & 1:
+                self._right[split] = child
+            else:
+                self._left[split] = child
+            if common == length:
+                self._set_prefix(split, version)
+                return
+            node = split
+
+    def _match(self, version: int, address: int) -> int:
+        bits = _BITS[version]
+        key, lengths, left, right, prefix = self._key, self._length, self._left, self._right, self._prefix
+        node = self._roots[version]
+        best = prefix[node]
+        while True:
+            depth = lengths[node]
+            if depth == bits:
+                break
+            child = right[node] if (address >> (bits - 1 - depth)) & 1 else left[node]
+            # Потомок не совпадает с адресом в пропущенных битах — глубже префиксов нет
+            if child < 0 or (address ^ key[child]) >> (bits - lengths[child]):
+                break
+            node = child
+            if prefix[node] >= 0:
+                best = prefix[node]
+        return best
+
+    def lookup(self, address: str) -> Optional[str]:
+        """Возвращает самый длинный префикс ipset, содержащий адрес, или None."""
+        ip = ipaddress.ip_address(address.strip())
+        best = self._match(ip.version, int(ip))
+        return self.prefixes[best] if best >= 0 else None
+
+    def contains(self, address: str) -> bool:
+        return self.lookup(address) is not None
+
+    def lookup_many(self, addresses: Iterable[str]) -> List[Optional[str]]:
+        """Пакетный поиск; некорректные адреса дают None."""
+        result: List[Optional[str]] = []
+        match, prefixes = self._match, self.prefixes
+        for address in addresses:
+            try:
+                ip = ipaddress.ip_address(address.strip())
+            except ValueError:
+                result.append(None)
+                continue
+            best = match(ip.version, int(ip))
+            result.append(prefixes[best] if best >= 0 else None)
+        return result
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "IpsetTree":
+        tree = cls()
+        for version, start, end in parse_ranges(lines):
+            for address, length in range_to_prefixes(version, start, end):
+                tree.insert(version, address, length)
+        return tree
+
+    @classmethod
+    def load(cls, path: str) -> "IpsetTree":
+        """
+        Дерево для файла; повторный вызов без изменений файла не перечитывает его.
+        Хранятся деревья CACHE_SIZE последних файлов.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = cls._cache.get(path)
+        if cached and cached[0] == stamp:
+            cls._cache.move_to_end(path)
+            return cached[1]
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            tree = cls.from_lines(f)
+        cls._cache[path] = (stamp, tree)
+        cls._cache.move_to_end(path)
+        while len(cls._cache) > cls.CACHE_SIZE:
+            cls._cache.popitem(last=False)
+        return tree
@@ -0,0 +1,120 @@
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# Диапазон портов (первый, последний), границы включительно
+PortRange = Tuple[int, int]
+
+MIN_PORT = 0
+MAX_PORT = 65535
+
+
+def _merge(ranges: Iterable[PortRange]) -> Tuple[PortRange, ...]:
+    merged: List[PortRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+class PortSet:
+    """
+    Неизменяемое множество портов в виде отсортированных непересекающихся
+    диапазонов. Строковое представление минимально: "80,443,1024-65535".
+    """
+
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges: Iterable[PortRange] = ()):
+        self.ranges: Tuple[PortRange, ...] = _merge(ranges)
+
+    @classmethod
+    def parse(cls, spec: Union[str, Iterable[str]]) -> "PortSet":
+        """
+        Разбирает "80,443,50000-50100" или последовательность таких строк.
+        Пустые элементы (",,", висящая запятая) пропускаются; некорректный
+        порт или диапазон — ValueError.
+        """
+        items = spec.split(",") if isinstance(spec, str) else (
+            item for part in spec for item in part.split(",")
+        )
+        ranges = []
+        for item in items:
+            item = item.strip()
+            if not item:
+                continue
+            first, sep, last = item.partition("-")
+            try:
+                start = int(first)
+                end = int(last) if sep else start
+            except ValueError:
+                raise ValueError(f"Некорректный порт: {item}") from None
+            if not MIN_PORT <= start <= end <= MAX_PORT:
+                raise ValueError(f"Некорректный диапазон портов: {item}")
+            ranges.append((start, end))
+        return cls(ranges)
+
+    @classmethod
+    def all(cls) -> "PortSet":
+        return cls([(1, MAX_PORT)])
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.ranges + other.ranges)
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        result = []
+        for start, end in self.ranges:
+            for other_start, other_end in other.ranges:
+                low, high = max(start, other_start), min(end, other_end)
+                if low <= high:
+                    result.append((low, high))
+        return PortSet(result)
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        result = []
+        for start, end in self.ranges:
+            for other_start, other_end in other.ranges:
+                if other_end < start or other_start > end:
+                    continue
+                if other_start > start:
+                    result.append((start, other_start - 1))
+                start = other_end + 1
+                if start > end:
+                    break
+            if start <= end:
+                result.append((start, end))
+        return PortSet(result)
+
+    def __contains__(self, port: int) -> bool:
+        return any(start <= port <= end for start, end in self.ranges)
+
+    def __iter__(self) -> Iterator[PortRange]:
+        return iter(self.ranges)
+
+    def __len__(self) -> int:
+        """Число портов в множестве."""
+        return sum(end - start + 1 for start, end in self.ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self.ranges)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PortSet) and self.ranges == other.ranges
+
+    def __hash__(self) -> int:
+        return hash(self.ranges)
+
+    def __str__(self) -> str:
+        return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in self.ranges)
+
+    def __repr__(self) -> str:
+        return f"PortSet({str(self)!r})"
+
+
+def normalize_ports(spec: str) -> str:
+    """Минимальная отсортированная запись портов; некорректная строка возвращается как есть."""
+    try:
+        return str(PortSet.parse(spec))
+    except ValueError:
+        return spec
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+import psutil
+
+from utils.file_utils import atomic_write
+
+logger = logging.getLogger("dpipenguin")
+
+REGISTRY_VERSION = 1
+# Допуск при сравнении времени создания процесса (секунды)
+CREATE_TIME_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class TrackedProcess:
+    """
+    Запущенный программой процесс. Время создания отличает его от
+    постороннего процесса, получившего тот же PID после перезапуска.
+    """
+    pid: int
+    create_time: float
+    name: str
+
+
+class ProcessRegistry:
+    """
+    Реестр дочерних процессов программы, сохраняемый в JSON, чтобы после
+    перезапуска завершить именно свои процессы, не перебирая таблицу процессов.
+    trusted = False означает, что прежнего реестра нет или он повреждён:
+    тогда своих процессов не отличить от чужих и нужен поиск по имени.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[int, TrackedProcess] = {}
+        self.trusted = self._load()
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != REGISTRY_VERSION:
+                return False
+            for item in data.get("processes", []):
+                entry = TrackedProcess(int(item["pid"]), float(item["create_time"]), str(item["name"]))
+                self._entries[entry.pid] = entry
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать реестр процессов: {e}")
+            return False
+
+    def _save(self) -> None:
+        data = {"version": REGISTRY_VERSION, "processes": [asdict(entry) for entry in self._entries.values()]}
+        try:
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=2))
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить реестр процессов: {e}")
+
+    def register(self, pid: int, name: str) -> Optional[TrackedProcess]:
+        """Запоминает только что запущенный процесс. None — процесс уже завершился."""
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except psutil.Error:
+            return None
+        entry = TrackedProcess(pid, create_time, name.lower())
+        with self._lock:
+            self._entries[pid] = entry
+            self._save()
+        logger.debug(f"Процесс {entry.name} (PID: {pid}) добавлен в реестр")
+        return entry
+
+    def unregister(self, pid: int) -> None:
+        with self._lock:
+            if self._entries.pop(pid, None) is not None:
+                self._save()
+
+    def alive(self, names: Optional[Iterable[str]] = None) -> List[psutil.Process]:
+        """
+        Живые процессы из реестра (при заданных names — только с этими именами).
+        Записи о завершившихся процессах и о PID, занятых чужими процессами, удаляются.
+        """
+        wanted = {name.lower() for name in names} if names is not None else None
+        processes: List[psutil.Process] = []
+        with self._lock:
+            stale = []
+            for entry in self._entries.values():
+                try:
+                    process = psutil.Process(entry.pid)
+                    if abs(process.create_time() - entry.create_time) > CREATE_TIME_TOLERANCE:
+                        stale.append(entry.pid)
+                        continue
+                except psutil.NoSuchProcess:
+                    stale.append(entry.pid)
+                    continue
+                except psutil.Error as e:
+                    logger.warning(f"Нет доступа к процессу {entry.name} (PID: {entry.pid}): {e}")
+                    continue
+                if wanted is None or entry.name in wanted:
+                    processes.append(process)
+            for pid in stale:
+                del self._entries[pid]
+            if stale or not self.trusted:
+                self._save()
+                self.trusted = True
+        return processes
+
+    def untracked(self, names: Iterable[str]) -> List[psutil.Process]:
+        """
+        Запасной путь для процессов, не попавших в реестр: полный перебор
+        таблицы процессов по имени, без своих и уже известных PID.
+        """
+        wanted = {name.lower() for name in names}
+        with self._lock:
+            known = set(self._entries)
+        current_pid = os.getpid()
+        found = []
+        for process in psutil.process_iter(["pid", "name"]):
+            name = process.info["name"]
+            pid = process.info["pid"]
+            if name and name.lower() in wanted and pid != current_pid and pid not in known:
+                found.append(process)
+        return found
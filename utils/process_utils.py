@@ -2,42 +2,115 @@ import locale
 import logging
 import os
 import subprocess
-from typing import List, Optional, Set
+import threading
+import time
+from typing import Iterable, List, Optional, Set, Tuple
 
 import psutil
 from PyQt6 import QtCore
+from utils.process_registry import ProcessRegistry
 from utils.service_utils import stop_service
-from utils.utils import tr
+from utils.utils import CACHE_FOLDER, tr
+from utils.winws_output import BATCH_MAX_LINES, LineFilter, OutputBatcher, WinwsOutputParser
 
 if os.name == 'nt':
     from win32con import CREATE_NO_WINDOW
 
 logger = logging.getLogger("dpipenguin")
 
+# PID и время создания всех процессов, запущенных через WorkerThread
+process_registry = ProcessRegistry(os.path.join(CACHE_FOLDER, "processes.json"))
+
+# Общий срок на штатное завершение всех процессов и дополнительный — после kill, сек
+STOP_TIMEOUT = 5.0
+KILL_TIMEOUT = 1.0
+
+
+def terminate_all(processes: Iterable[Tuple[psutil.Process, str]], timeout: float = STOP_TIMEOUT) -> bool:
+    """
+    Посылает terminate всем процессам сразу и ждёт их вместе до общего срока;
+    оставшиеся убиваются. Время остановки ограничено timeout + KILL_TIMEOUT
+    независимо от числа процессов. Возвращает True, если завершились все.
+    """
+    started = time.monotonic()
+    names = {}
+    for proc, name in processes:
+        try:
+            logger.info(tr("Завершение процесса {name} (PID: {pid})").format(name=name, pid=proc.pid))
+            proc.terminate()
+            names[proc] = name
+        except psutil.NoSuchProcess:
+            process_registry.unregister(proc.pid)
+        except psutil.AccessDenied as e:
+            logger.warning(tr("Ошибка завершения процесса {name}: {error}").format(name=name, error=e))
+    if not names:
+        return True
+
+    _gone, alive = psutil.wait_procs(list(names), timeout=timeout)
+    if alive:
+        for proc in alive:
+            logger.warning(tr("Тайм-аут при завершении {name}, принудительное завершение").format(name=names[proc]))
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied as e:
+                logger.warning(tr("Ошибка завершения процесса {name}: {error}").format(name=names[proc], error=e))
+        _gone, alive = psutil.wait_procs(alive, timeout=KILL_TIMEOUT)
+
+    for proc, name in names.items():
+        if proc in alive:
+            logger.error(f"Процесс {name} (PID: {proc.pid}) не завершился")
+        else:
+            process_registry.unregister(proc.pid)
+    logger.info(f"Завершено процессов: {len(names) - len(alive)} из {len(names)} "
+                f"за {(time.monotonic() - started) * 1000:.0f} мс")
+    return not alive
+
+
+def stop_workers(workers: Iterable["WorkerThread"], timeout: float = STOP_TIMEOUT) -> bool:
+    """
+    Останавливает процессы нескольких WorkerThread одновременно (terminate_all)
+    и дожидается самих потоков в пределах того же срока.
+    """
+    deadline = time.monotonic() + timeout + KILL_TIMEOUT
+    workers = [worker for worker in workers if worker is not None]
+    targets = []
+    for worker in workers:
+        process = worker.request_stop()
+        if process is not None:
+            try:
+                targets.append((psutil.Process(process.pid), worker.process_name))
+            except psutil.NoSuchProcess:
+                pass
+    stopped = terminate_all(targets, timeout)
+
+    for worker in workers:
+        worker.quit()
+        if not worker.wait(max(0, int((deadline - time.monotonic()) * 1000))):
+            logger.warning(f"Поток {worker.process_name} не завершился в срок, принудительное завершение")
+            worker.terminate()
+            worker.wait()
+    return stopped
+
+
 class ProcessUtils:
     """Утилиты для работы с процессами и службами."""
 
     @classmethod
     def terminate_process(cls, process_name: str) -> bool:
-        """Завершает процесс по имени. Возвращает True при успехе."""
-        process_name_lower = process_name.lower()
+        """
+        Завершает все процессы с этим именем, запущенные программой (по реестру).
+        Если в реестре их нет, ищет потерянные процессы перебором. Возвращает True при успехе.
+        """
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] and proc.info['name'].lower() == process_name_lower:
-                    pid = proc.info['pid']
-                    logger.info(tr("Завершение процесса {name} (PID: {pid})").format(name=process_name, pid=pid))
-                    proc.terminate()
-                    try:
-                        proc.wait(timeout=10)
-                        logger.info(tr("Процесс {name} успешно завершён").format(name=process_name))
-                    except psutil.TimeoutExpired:
-                        logger.warning(tr("Тайм-аут при завершении {name}, принудительное завершение").format(name=process_name))
-                        proc.kill()
-                        proc.wait(timeout=5)
-                        logger.info(tr("Процесс {name} принудительно завершён").format(name=process_name))
-                    return True
-            logger.warning(tr("Процесс {name} не найден").format(name=process_name))
-            return False
+            processes = process_registry.alive([process_name])
+            if not processes:
+                processes = process_registry.untracked([process_name])
+            if not processes:
+                logger.warning(tr("Процесс {name} не найден").format(name=process_name))
+                return False
+            return terminate_all([(process, process_name) for process in processes], timeout=10)
         except Exception as e:
             logger.exception(tr("Ошибка завершения процесса {name}: {error}").format(name=process_name, error=e))
             return False
@@ -57,37 +130,100 @@ class ProcessUtils:
 class WorkerThread(QtCore.QThread):
     """Поток для выполнения внешних процессов."""
     output_signal = QtCore.pyqtSignal(str)
+    # Строки вывода пачками (OutputBatcher): один сигнал на пачку, а не на строку
+    output_batch_signal = QtCore.pyqtSignal(list)
+    # События WinwsOutputParser: разбираются в потоке чтения, все строки, включая скрытые фильтром
+    event_signal = QtCore.pyqtSignal(object)
     finished_signal = QtCore.pyqtSignal(str)
     error_signal = QtCore.pyqtSignal(str)
+    # Процесс создан; нужен супервизору для замера задержки перезапуска
+    started_signal = QtCore.pyqtSignal(str)
 
     def __init__(
         self,
         command: List[str],
         process_name: str,
         encoding: Optional[str] = None,
-        capture_output: bool = True
+        capture_output: bool = True,
+        line_filter: Optional[LineFilter] = None,
+        max_batch_lines: int = BATCH_MAX_LINES,
+        output_parser: Optional[WinwsOutputParser] = None
     ):
         super().__init__()
         self.command = command
         self.process_name = process_name
         self.encoding = encoding or locale.getpreferredencoding()
         self.capture_output = capture_output
+        self.line_filter = line_filter
+        self.max_batch_lines = max_batch_lines
+        self.output_parser = output_parser
         self._process: Optional[subprocess.Popen] = None
         self._running = False
+        self._stop_requested = False
+        # Запуск процесса и запрос остановки не пересекаются: иначе остановка,
+        # пришедшая во время Popen, не увидела бы процесс и он остался бы работать
+        self._spawn_lock = threading.Lock()
+        # time.monotonic() запуска и завершения процесса, код возврата
+        self.started_at: Optional[float] = None
+        self.exited_at: Optional[float] = None
+        self.returncode: Optional[int] = None
+
+    @property
+    def stop_requested(self) -> bool:
+        """Процесс остановлен программой, а не завершился сам."""
+        return self._stop_requested
+
+    @property
+    def uptime(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.exited_at or time.monotonic()) - self.started_at
+
+    def request_stop(self) -> Optional[subprocess.Popen]:
+        """
+        Отмечает остановку и возвращает работающий процесс, если он уже создан.
+        После вызова run() новый процесс не запустит.
+        """
+        with self._spawn_lock:
+            self._running = False
+            self._stop_requested = True
+            process = self._process
+        if process is not None and process.poll() is None:
+            return process
+        return None
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        with self._spawn_lock:
+            if self._stop_requested:
+                return None
+            self._running = True
+            self._process = self._start_process()
+            return self._process
 
     def run(self) -> None:
         """Запуск процесса и обработка вывода."""
-        self._running = True
         logger.info(tr("Запуск процесса {name}: {cmd}").format(
             name=self.process_name, cmd=' '.join(self.command)
         ))
         try:
-            with self._start_process() as process:
-                self._process = process
-                if self.capture_output and process.stdout:
-                    self._handle_output(process.stdout)
-                else:
+            process = self._spawn()
+            if process is None:
+                logger.info(f"Запуск {self.process_name} отменён: остановка запрошена до создания процесса")
+                return
+            with process:
+                self.started_at = time.monotonic()
+                process_registry.register(process.pid, os.path.basename(self.command[0]))
+                self.started_signal.emit(self.process_name)
+                try:
+                    if self.capture_output and process.stdout:
+                        self._handle_output(process.stdout)
+                    else:
+                        process.wait()
+                finally:
                     process.wait()
+                    self.exited_at = time.monotonic()
+                    self.returncode = process.returncode
+                    process_registry.unregister(process.pid)
                 self._log_completion(process.returncode)
         except Exception as e:
             error_msg = tr("Ошибка в процессе {name}: {error}").format(name=self.process_name, error=str(e))
@@ -114,14 +250,26 @@ class WorkerThread(QtCore.QThread):
         return subprocess.Popen(**popen_kwargs)
 
     def _handle_output(self, stdout) -> None:
-        """Обработка вывода процесса."""
-        for line in iter(stdout.readline, ''):
-            if not self._running:
-                logger.info(tr("Обработка вывода прервана для {name}").format(name=self.process_name))
-                break
-            line = line.strip()
-            if line:
-                self.output_signal.emit(line)
+        """
+        Обработка вывода процесса: строки фильтруются в этом потоке и
+        отправляются в GUI пачками.
+        """
+        observer = None
+        if self.output_parser is not None:
+            self.output_parser.reset(self.started_at)
+            observer = self._parse_line
+        batcher = OutputBatcher(self.output_batch_signal.emit, self.line_filter,
+                                max_lines=self.max_batch_lines, observer=observer)
+        if not batcher.run(stdout, lambda: self._running):
+            logger.info(tr("Обработка вывода прервана для {name}").format(name=self.process_name))
+        if batcher.lines_dropped:
+            logger.debug(f"{self.process_name}: строк вывода {batcher.lines_read}, пачек {batcher.batches}, "
+                         f"не показано из-за переполнения пачки {batcher.lines_dropped}")
+
+    def _parse_line(self, line: str) -> None:
+        event = self.output_parser.feed(line)
+        if event is not None:
+            self.event_signal.emit(event)
 
     def _log_completion(self, returncode: int) -> None:
         if returncode == 0 or (self.process_name == "winws.exe" and returncode == 1):
@@ -134,15 +282,15 @@ class WorkerThread(QtCore.QThread):
 
     def terminate_process(self) -> None:
         """Принудительное завершение процесса."""
-        if self._process and self._process.poll() is None:
-            self._running = False
+        process = self.request_stop()
+        if process is not None:
             logger.info(tr("Попытка завершить процесс {name}").format(name=self.process_name))
-            self._process.terminate()
+            process.terminate()
             try:
-                self._process.wait(timeout=5)
+                process.wait(timeout=5)
                 logger.info(tr("Процесс {name} успешно завершён").format(name=self.process_name))
             except subprocess.TimeoutExpired:
-                self._process.kill()
+                process.kill()
                 logger.warning(tr("Процесс {name} принудительно убит после тайм-аута").format(name=self.process_name))
 
     def close_winws(self) -> None:
@@ -181,25 +329,19 @@ class InitializerThread(QtCore.QThread):
             self.error_signal.emit(error_msg)
 
     def _terminate_processes(self) -> None:
-        """Завершение указанных процессов."""
+        """
+        Завершение процессов, оставшихся от прошлого запуска программы (по реестру).
+        Перебор таблицы процессов по имени нужен, только если реестра ещё нет.
+        """
         logger.info(tr("Завершение процессов: {procs}").format(procs=', '.join(self.processes_to_terminate)))
-        current_pid = os.getpid()
-        for proc in psutil.process_iter(['pid', 'name']):
-            if proc.info['name'] and proc.info['pid'] != current_pid:
-                proc_name = proc.info['name'].lower()
-                if proc_name in self.processes_to_terminate:
-                    try:
-                        logger.info(tr("Завершение процесса {name} (PID: {pid})").format(
-                            name=proc_name, pid=proc.info['pid']
-                        ))
-                        proc.terminate()
-                        try:
-                            proc.wait(timeout=5)
-                            logger.info(tr("Процесс {name} успешно завершён").format(name=proc_name))
-                        except psutil.TimeoutExpired:
-                            proc.kill()
-                            logger.warning(tr("Процесс {name} принудительно убит после тайм-аута").format(name=proc_name))
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.warning(tr("Ошибка завершения процесса {name}: {error}").format(
-                            name=proc_name, error=e
-                        ))
\ No newline at end of file
+        scan = not process_registry.trusted
+        processes = process_registry.alive(self.processes_to_terminate)
+        if scan:
+            processes += process_registry.untracked(self.processes_to_terminate)
+        targets = []
+        for proc in processes:
+            try:
+                targets.append((proc, proc.name().lower()))
+            except psutil.Error:
+                continue
+        terminate_all(targets, timeout=STOP_TIMEOUT)
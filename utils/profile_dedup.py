@@ -0,0 +1,143 @@
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.port_set import PortSet
+from utils.winws_filter import profile_ports
+from utils.winws_profile import HOSTLIST_OPTIONS, IPSET_OPTIONS, WinwsCommand, WinwsOption, WinwsProfile
+
+LIST_OPTIONS = frozenset(HOSTLIST_OPTIONS) | frozenset(IPSET_OPTIONS)
+# Профили, отличающиеся только этими списками, можно слить в один: несколько
+# --hostlist (или несколько --ipset) внутри профиля winws объединяет по "или"
+MERGEABLE_LISTS = ("--hostlist", "--ipset")
+
+
+@dataclass
+class ProfileMerge:
+    """Профиль removed поглощён профилем kept (индексы в исходной команде)."""
+    kept: int
+    removed: int
+    reason: str
+
+
+@dataclass
+class DedupReport:
+    total: int = 0
+    merges: List[ProfileMerge] = field(default_factory=list)
+
+    @property
+    def merged(self) -> int:
+        return len(self.merges)
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.merged
+
+
+def _signature(profile: WinwsProfile) -> Tuple[str, ...]:
+    """Опции профиля без списков и глобальных опций, в исходном порядке: фильтры и параметры desync."""
+    return tuple(option.raw for option in profile.options if option.name not in LIST_OPTIONS and not option.is_global)
+
+
+def _lists(profile: WinwsProfile) -> Set[str]:
+    return {option.raw for option in profile.options if option.name in LIST_OPTIONS}
+
+
+def _list_kind(profile: WinwsProfile) -> Optional[str]:
+    """
+    Вид списков профиля, если он допускает слияние: только --hostlist или
+    только --ipset. "" — у профиля нет списков; None — слияние невозможно.
+    """
+    kinds = {option.name for option in profile.options if option.name in LIST_OPTIONS}
+    if not kinds:
+        return ""
+    if len(kinds) == 1:
+        kind = kinds.pop()
+        if kind in MERGEABLE_LISTS:
+            return kind
+    return None
+
+
+def _disjoint(first: Dict[str, PortSet], second: Dict[str, PortSet]) -> bool:
+    return all(not (first[protocol] & second[protocol]) for protocol in first)
+
+
+def dedup_profiles(command: WinwsCommand) -> Tuple[WinwsCommand, DedupReport]:
+    """
+    Объединяет эквивалентные профили, не меняя поведения winws (побеждает
+    первый совпавший профиль):
+    - профиль, совпадающий с более ранним профилем без списков или с теми же
+      списками, недостижим и удаляется;
+    - профили с одинаковыми фильтрами и параметрами desync, отличающиеся только
+      списками одного вида (--hostlist или --ipset), сливаются в первый, если
+      все профили между ними не пересекаются с поглощаемым по портам.
+    Профили с --hostlist и с --ipset не сливаются: внутри одного профиля
+    winws требует совпадения с обоими списками сразу.
+    """
+    report = DedupReport(total=len(command))
+    kept: List[WinwsProfile] = []
+    origins: List[int] = []
+    ports: List[Optional[Dict[str, PortSet]]] = []
+
+    for profile in command:
+        try:
+            current_ports: Optional[Dict[str, PortSet]] = profile_ports(profile)
+        except ValueError:
+            current_ports = None
+        target = None
+        if profile.index and not any(option.is_global for option in profile.options):
+            target = _find_merge_target(kept, ports, profile, current_ports)
+        if target is None:
+            kept.append(WinwsProfile(len(kept), list(profile.options)))
+            origins.append(profile.index)
+            ports.append(current_ports)
+            continue
+        position, reason = target
+        if reason != "shadowed":
+            _append_lists(kept[position], [option for option in profile.options if option.name == reason])
+        report.merges.append(ProfileMerge(origins[position], profile.index, reason))
+
+    return WinwsCommand(kept), report
+
+
+def _find_merge_target(kept: List[WinwsProfile], ports: List[Optional[Dict[str, PortSet]]],
+                       profile: WinwsProfile,
+                       current_ports: Optional[Dict[str, PortSet]]) -> Optional[Tuple[int, str]]:
+    """
+    Позиция профиля в kept, который поглощает profile, и причина:
+    "shadowed" — profile недостижим, иначе — вид сливаемых списков.
+    """
+    signature = _signature(profile)
+    kind = _list_kind(profile)
+    lists = _lists(profile)
+
+    for position, candidate in enumerate(kept):
+        if _signature(candidate) != signature:
+            continue
+        candidate_kind = _list_kind(candidate)
+        candidate_lists = _lists(candidate)
+        # Более ранний профиль без списков или с теми же (для одного вида — с более
+        # широким набором) списками принимает весь трафик этого профиля
+        if candidate_kind == "" or candidate_lists == lists or (
+            kind and candidate_kind == kind and lists <= candidate_lists
+        ):
+            return position, "shadowed"
+        if kind and candidate_kind == kind and current_ports is not None and all(
+            other is not None and _disjoint(other, current_ports) for other in ports[position + 1:]
+        ):
+            return position, kind
+    return None
+
+
+def _append_lists(profile: WinwsProfile, options: List[WinwsOption]) -> None:
+    """Добавляет списки после последнего списка того же вида, пропуская уже имеющиеся."""
+    existing = {option.raw for option in profile.options}
+    last = max(i for i, option in enumerate(profile.options) if option.name in LIST_OPTIONS)
+    new = [option for option in options if option.raw not in existing]
+    profile.options[last + 1:last + 1] = new
+
+
+def args_diff(before: List[str], after: List[str], name: str = "args") -> List[str]:
+    """Построчный unified diff аргументов до и после объединения профилей."""
+    return list(difflib.unified_diff(before, after, fromfile=f"{name} (исходные)",
+                                     tofile=f"{name} (после объединения)", lineterm=""))
@@ -17,13 +17,17 @@ _SERVICE_STATES = {
     win32service.SERVICE_STOP_PENDING: "STOP_PENDING",
 }
 
-def stop_service(service_name: str, timeout: int = 15) -> bool:
+# Интервал опроса состояния службы при остановке, сек
+_POLL_INTERVAL = 0.1
+
+def stop_service(service_name: str, timeout: float = 15) -> bool:
     """
     Останавливает указанную службу Windows.
 
     Args:
         service_name: Название службы для остановки
-        timeout: Максимальное время ожидания остановки в секундах (по умолчанию 15)
+        timeout: Максимальное время ожидания остановки в секундах (по умолчанию 15),
+            состояние опрашивается каждые 0.1 сек
 
     Returns:
         True, если служба успешно остановлена или не существует,
@@ -32,7 +36,7 @@ def stop_service(service_name: str, timeout: int = 15) -> bool:
     Raises:
         WinError: при непредвиденных ошибках работы со службой.
     """
-    logger.info(f"Попытка остановки службы '{service_name}' с таймаутом {timeout} сек")
+    logger.info(f"Попытка остановки службы '{service_name}' с таймаутом {timeout:.1f} сек")
 
     try:
         status = win32serviceutil.QueryServiceStatus(service_name)
@@ -46,18 +50,22 @@ def stop_service(service_name: str, timeout: int = 15) -> bool:
         win32serviceutil.StopService(service_name)
         logger.debug(f"Команда остановки службы '{service_name}' отправлена")
 
-        for second in range(timeout):
+        started = time.monotonic()
+        while True:
             status = win32serviceutil.QueryServiceStatus(service_name)
             state = status[1]
             state_name = _SERVICE_STATES.get(state, f"UNKNOWN ({state})")
 
+            elapsed = time.monotonic() - started
             if state == win32service.SERVICE_STOPPED:
-                logger.info(f"Служба '{service_name}' успешно остановлена за {second + 1} сек")
+                logger.info(f"Служба '{service_name}' успешно остановлена за {elapsed:.1f} сек")
                 return True
+            if elapsed >= timeout:
+                break
 
-            time.sleep(1)
+            time.sleep(_POLL_INTERVAL)
 
-        logger.warning(f"Служба '{service_name}' не остановилась за {timeout} сек (текущее состояние: {state_name})")
+        logger.warning(f"Служба '{service_name}' не остановилась за {timeout:.1f} сек (текущее состояние: {state_name})")
         return False
 
     except WinError as e:
@@ -0,0 +1,108 @@
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional
+
+logger = logging.getLogger("dpipenguin")
+
+
+@dataclass
+class RestartPolicy:
+    """
+    Параметры перезапуска: первый перезапуск сразу, дальше задержка растёт
+    от base_delay в factor раз до max_delay с разбросом ±jitter. Процесс,
+    проработавший stable_uptime, считается стабильным и сбрасывает рост задержки.
+    crash_limit падений за crash_window секунд — цикл падений, перезапуски прекращаются.
+    """
+    base_delay: float = 1.0
+    factor: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.2
+    stable_uptime: float = 60.0
+    crash_limit: int = 5
+    crash_window: float = 120.0
+
+
+@dataclass
+class RestartRecord:
+    """Одно аварийное завершение и перезапуск после него. time — time.time(), для отображения."""
+    time: float
+    exit_code: Optional[int]
+    uptime: float
+    delay: Optional[float]
+    # Время от завершения процесса до запуска нового за вычетом задержки, сек
+    latency: Optional[float] = None
+
+
+class Supervisor:
+    """
+    Решает, перезапускать ли упавший процесс и через какое время, и ведёт
+    историю перезапусков. Сам процессы не запускает: это делает вызывающий код.
+    """
+
+    def __init__(self, policy: Optional[RestartPolicy] = None,
+                 rng: Callable[[], float] = random.random, history_size: int = 50):
+        self.policy = policy or RestartPolicy()
+        self._rng = rng
+        self.history: Deque[RestartRecord] = deque(maxlen=history_size)
+        self.attempt = 0
+        self.crash_loop = False
+        # Времена падений (time.monotonic()) с последнего сброса: по ним ищется цикл падений
+        self._crashes: Deque[float] = deque()
+
+    def next_delay(self) -> float:
+        if self.attempt == 0:
+            return 0.0
+        policy = self.policy
+        delay = min(policy.max_delay, policy.base_delay * policy.factor ** (self.attempt - 1))
+        return max(0.0, delay * (1 + policy.jitter * (2 * self._rng() - 1)))
+
+    def on_exit(self, exit_code: Optional[int], uptime: float, now: Optional[float] = None) -> Optional[float]:
+        """
+        Регистрирует завершение процесса. Возвращает задержку перед
+        перезапуском или None, если обнаружен цикл падений. now — time.monotonic():
+        перевод системных часов не должен ломать окно подсчёта падений.
+        """
+        now = time.monotonic() if now is None else now
+        wall_time = time.time()
+        if uptime >= self.policy.stable_uptime:
+            self.attempt = 0
+
+        self._crashes.append(now)
+        while now - self._crashes[0] > self.policy.crash_window:
+            self._crashes.popleft()
+        if len(self._crashes) >= self.policy.crash_limit:
+            self.crash_loop = True
+            self.history.append(RestartRecord(wall_time, exit_code, uptime, None))
+            logger.error(f"Цикл падений: {len(self._crashes)} завершений за {self.policy.crash_window:.0f} сек, "
+                         f"перезапуски остановлены")
+            return None
+
+        delay = self.next_delay()
+        self.attempt += 1
+        self.history.append(RestartRecord(wall_time, exit_code, uptime, delay))
+        logger.warning(f"Процесс завершился с кодом {exit_code} после {uptime:.1f} сек работы, "
+                       f"перезапуск #{self.attempt} через {delay:.2f} сек")
+        return delay
+
+    def on_restarted(self, latency: float) -> None:
+        if self.history:
+            self.history[-1].latency = latency
+        logger.info(f"Перезапуск выполнен, задержка запуска {latency * 1000:.0f} мс")
+
+    def reset(self) -> None:
+        """Сбрасывает счётчики при ручном запуске или остановке."""
+        self.attempt = 0
+        self.crash_loop = False
+        self._crashes.clear()
+
+    def summary(self) -> List[str]:
+        return [
+            f"{time.strftime('%H:%M:%S', time.localtime(record.time))}: код {record.exit_code}, "
+            f"работал {record.uptime:.1f} сек, "
+            + (f"перезапуск через {record.delay:.2f} сек" if record.delay is not None else "без перезапуска")
+            + (f", задержка запуска {record.latency * 1000:.0f} мс" if record.latency is not None else "")
+            for record in self.history
+        ]
@@ -1,31 +1,108 @@
 import configparser
-import io
+import hashlib
+import json
 import logging
 import os
 import zipfile
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import requests
 from packaging.version import parse as parse_version
+from requests.adapters import HTTPAdapter
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from utils.file_utils import atomic_write, open_temp_near, remove_quietly
+from utils.hostlist_compact import compact_file
+from utils.hostlist_patch import PatchError, apply_patch, file_sha256
+from utils.ipset_utils import optimize_file as optimize_ipset_file
 from utils.process_utils import ProcessUtils
 from utils.utils import BASE_FOLDER, CURRENT_VERSION, tr
 
+VERSION_CONFIG_URL = "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini"
+PATCHES_URL = "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/patches"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class DownloadResult:
+    """Результат одной загрузки из DownloadEngine.run."""
+    name: str
+    ok: bool
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+
+class DownloadEngine:
+    """
+    Общая сессия с пулом соединений и параллельный запуск загрузок.
+    Пул потоков живёт только внутри run(); сессию закрывает close() или выход из with.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, timeout: float = 10, **kwargs) -> requests.Response:
+        """GET-запрос через общую сессию."""
+        return self.session.get(url, timeout=timeout, **kwargs)
+
+    def head(self, url: str, timeout: float = 10, **kwargs) -> requests.Response:
+        """HEAD-запрос через общую сессию."""
+        return self.session.head(url, timeout=timeout, allow_redirects=True, **kwargs)
+
+    def run(self, jobs: Dict[str, Callable[[], Any]]) -> Dict[str, DownloadResult]:
+        """
+        Выполняет задачи параллельно и собирает результаты по именам.
+        Исключение одной задачи не прерывает остальные.
+        """
+        if not jobs:
+            return {}
+
+        def execute(name: str, job: Callable[[], Any]) -> DownloadResult:
+            started = time.perf_counter()
+            try:
+                return DownloadResult(name, True, job(), elapsed=time.perf_counter() - started)
+            except Exception as e:
+                return DownloadResult(name, False, error=e, elapsed=time.perf_counter() - started)
+
+        workers = min(self.max_workers, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            futures = {name: pool.submit(execute, name, job) for name, job in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "DownloadEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 class UpdateChecker(QObject):
     config_updated_signal = pyqtSignal()
 
-    BLACKLISTS: List[Dict[str, str]] = [
+    BLACKLISTS: List[Dict[str, Any]] = [
         {
             "name": "russia-blacklist",
             "url": "https://p.thenewone.lol/domains-export.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "russia-blacklist.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "russia-blacklist.txt"),
+            "patch_url": f"{PATCHES_URL}/russia-blacklist/{{base}}.patch",
+            "timeout": 30
         },
         {
             "name": "discord-blacklist",
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/universal.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "universal.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "universal.txt"),
+            "patch_url": f"{PATCHES_URL}/universal/{{base}}.patch",
+            "timeout": 30
         },
         {
             "name": "disk-youtube-blacklist",
@@ -35,15 +112,19 @@ class UpdateChecker(QObject):
         {
             "name": "ipset-discord",
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/black/ipset-discord.txt",
-            "output_file": os.path.join(BASE_FOLDER, "black", "ipset-discord.txt")
+            "output_file": os.path.join(BASE_FOLDER, "black", "ipset-discord.txt"),
+            "kind": "ipset"
         }
     ]
 
-    COMPONENTS: Dict[str, Dict[str, Optional[str]]] = {
+    BLACKLISTS_META_FILE = os.path.join(BASE_FOLDER, "black", ".blacklists_meta.json")
+
+    COMPONENTS: Dict[str, Dict[str, Any]] = {
         "zapret": {
             "url": "https://github.com/zhivem/DPI-Penguin/raw/refs/heads/main/zapret/zapret.zip",
             "destination": os.path.join(BASE_FOLDER, "zapret", "zapret.zip"),
             "extract": True,
+            "timeout": 60,
             "pre_update": ["terminate_process", "stop_service"],
             "pre_update_args": {
                 "terminate_process": {"process_name": "winws.exe"},
@@ -54,6 +135,7 @@ class UpdateChecker(QObject):
             "url": "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/config/default.ini",
             "destination": os.path.join(BASE_FOLDER, "config", "default.ini"),
             "extract": False,
+            "timeout": 10,
             "post_update": "emit_config_updated"
         }
     }
@@ -63,6 +145,18 @@ class UpdateChecker(QObject):
         self.logger = logging.getLogger("dpipenguin")
         self.local_versions: Dict[str, str] = {}
         self.remote_versions: Dict[str, str] = {}
+        self.engine = DownloadEngine()
+        self._remote_version_text: Optional[str] = None
+
+    def close(self) -> None:
+        """Закрывает соединения общей сессии загрузок."""
+        self.engine.close()
+
+    def __enter__(self) -> "UpdateChecker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def get_local_versions(self) -> None:
         """Читает локальные версии из version_config.ini."""
@@ -85,11 +179,13 @@ class UpdateChecker(QObject):
 
     def get_remote_versions(self) -> None:
         """Получает версии с GitHub."""
-        url = f"https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini?t={int(time.time())}"
+        url = f"{VERSION_CONFIG_URL}?t={int(time.time())}"
         self.remote_versions = {}
+        self._remote_version_text = None
         try:
-            response = requests.get(url, timeout=10)
+            response = self.engine.get(url, timeout=10)
             response.raise_for_status()
+            self._remote_version_text = response.text
             config = configparser.ConfigParser()
             config.read_string(response.text)
             if 'VERSION' in config:
@@ -118,10 +214,45 @@ class UpdateChecker(QObject):
 
     def download_and_update(self, component: str, dialog=None) -> bool:
         """Скачивает и обновляет компонент."""
-        info = self.COMPONENTS.get(component)
-        if not info:
-            self.logger.error(f"Неизвестный компонент: '{component}'")
-            return False
+        return self.update_components([component], dialog=dialog).get(component, False)
+
+    def update_components(self, components: Iterable[str], dialog=None) -> Dict[str, bool]:
+        """
+        Скачивает компоненты параллельно, затем применяет их по очереди.
+        version_config.ini обновляется один раз в конце.
+        """
+        results: Dict[str, bool] = {}
+        jobs = {}
+        for component in components:
+            if component in self.COMPONENTS:
+                jobs[component] = lambda c=component: self._fetch_component(c)
+            else:
+                self.logger.error(f"Неизвестный компонент: '{component}'")
+                results[component] = False
+
+        for name, result in self.engine.run(jobs).items():
+            if not result.ok:
+                self.logger.error(f"Ошибка при скачивании {name}: {result.error}")
+                results[name] = False
+                continue
+            results[name] = self._apply_component(name, result.value, dialog)
+
+        if any(results.values()):
+            self.update_local_version_file()
+        return results
+
+    def _fetch_component(self, component: str) -> str:
+        """Скачивает компонент во временный файл рядом с назначением и возвращает его путь."""
+        info = self.COMPONENTS[component]
+        self.logger.info(f"Скачивание {component} с {info['url']}")
+        with self.engine.get(info['url'], timeout=info.get('timeout', 30), stream=True) as response:
+            response.raise_for_status()
+            tmp_path, _ = self._stream_to_temp(response, info['destination'])
+        return tmp_path
+
+    def _apply_component(self, component: str, tmp_path: str, dialog=None) -> bool:
+        """Выполняет pre/post-действия и атомарно подменяет скачанный компонент."""
+        info = self.COMPONENTS[component]
         try:
             # Pre-update actions
             for method_name in info.get('pre_update', []):
@@ -132,16 +263,9 @@ class UpdateChecker(QObject):
                 else:
                     self.logger.warning(f"Метод '{method_name}' не найден")
 
-            # Download
-            self.logger.info(f"Скачивание {component} с {info['url']}")
-            response = requests.get(info['url'], stream=True, timeout=30)
-            response.raise_for_status()
-            os.makedirs(os.path.dirname(info['destination']), exist_ok=True)
-
+            os.replace(tmp_path, info['destination'])
             if info.get('extract'):
-                self._extract_zip(response.content, os.path.dirname(info['destination']))
-            else:
-                self._write_file(info['destination'], response.text)
+                self._extract_zip(info['destination'], os.path.dirname(info['destination']))
 
             self.logger.info(f"{component} успешно обновлён")
 
@@ -151,36 +275,48 @@ class UpdateChecker(QObject):
                     dialog.config_updated_signal.emit()
                 self.emit_config_updated()
 
-            self.update_local_version_file()
             return True
         except Exception as e:
             self.logger.exception(f"Ошибка при обновлении {component}: {e}")
+            remove_quietly(tmp_path)
             return False
 
     def update_local_version_file(self) -> None:
         """Обновляет локальный version_config.ini."""
-        url = "https://raw.githubusercontent.com/zhivem/DPI-Penguin/main/setting_version/version_config.ini"
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            text = self._remote_version_text
+            if text is None:
+                response = self.engine.get(VERSION_CONFIG_URL, timeout=10)
+                response.raise_for_status()
+                text = response.text
             version_dir = os.path.join(BASE_FOLDER, "setting_version")
             os.makedirs(version_dir, exist_ok=True)
-            self._write_file(os.path.join(version_dir, "version_config.ini"), response.text)
+            atomic_write(os.path.join(version_dir, "version_config.ini"), text)
             self.logger.info("Локальный version_config.ini успешно обновлён")
         except Exception as e:
             self.logger.exception(f"Ошибка при обновлении version_config.ini: {e}")
 
     def update_blacklists(self) -> bool:
-        """Обновляет все чёрные списки."""
+        """Обновляет все чёрные списки, пропуская неизменившиеся (ETag / Last-Modified)."""
         self.logger.info("Обновление чёрных списков")
+        meta = self._load_blacklists_meta()
+        saved_meta = json.dumps(meta, sort_keys=True)
+        jobs = {
+            bl['name']: lambda bl=bl: self._refresh_blacklist(bl, meta.setdefault(bl['name'], {}))
+            for bl in self.BLACKLISTS
+        }
         success = True
-        for bl in self.BLACKLISTS:
-            try:
-                self._download_and_write(bl['url'], bl['output_file'])
-                self.logger.info(f"Чёрный список '{bl['name']}' успешно обновлён")
-            except Exception as e:
-                self.logger.exception(f"Ошибка при обновлении '{bl['name']}': {e}")
+        for name, result in self.engine.run(jobs).items():
+            if not result.ok:
+                self.logger.error(f"Ошибка при обновлении '{name}': {result.error}")
                 success = False
+            elif result.value:
+                self.logger.info(f"Чёрный список '{name}' успешно обновлён за {result.elapsed:.2f} сек")
+            else:
+                self.logger.info(f"Чёрный список '{name}' не изменился")
+        # Если все источники ответили 304, на диск ничего не пишется
+        if json.dumps(meta, sort_keys=True) != saved_meta:
+            self._save_blacklists_meta(meta)
         return success
 
     def terminate_process(self, process_name: str) -> None:
@@ -199,19 +335,128 @@ class UpdateChecker(QObject):
         self.config_updated_signal.emit()
 
     # --- Вспомогательные методы ---
-    def _extract_zip(self, content: bytes, target_dir: str) -> None:
+    def _extract_zip(self, zip_path: str, target_dir: str) -> None:
         """Распаковывает zip-архив в указанную директорию."""
-        with zipfile.ZipFile(io.BytesIO(content)) as zip_ref:
+        with zipfile.ZipFile(zip_path) as zip_ref:
             zip_ref.extractall(target_dir)
 
-    def _write_file(self, path: str, text: str) -> None:
-        """Записывает текст в файл."""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(text)
-
-    def _download_and_write(self, url: str, path: str) -> None:
-        """Скачивает содержимое url и записывает в файл."""
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        self._write_file(path, response.text)
\ No newline at end of file
+    def _stream_to_temp(self, response: requests.Response, path: str) -> Tuple[str, str]:
+        """
+        Потоково пишет тело ответа во временный файл в каталоге path,
+        считая SHA-256 на лету. Возвращает (путь к временному файлу, хеш).
+        """
+        digest = hashlib.sha256()
+        f, tmp_path = open_temp_near(path, "wb")
+        try:
+            with f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            remove_quietly(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest()
+
+    def _refresh_blacklist(self, bl: Dict[str, Any], entry: Dict[str, Any]) -> bool:
+        """
+        Условно скачивает чёрный список и обновляет запись метаданных.
+        Для списков с patch_url сначала пробует дельта-патч, при неудаче
+        скачивает список целиком. Возвращает True, если файл на диске был перезаписан.
+        """
+        path = bl['output_file']
+        headers = {}
+        if os.path.exists(path):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        if bl.get('patch_url') and os.path.exists(path):
+            head = self.engine.head(bl['url'], headers=headers, timeout=bl.get('timeout', 10))
+            if head.status_code == 304:
+                return False
+            if head.ok and self._try_patch(bl):
+                entry['etag'] = head.headers.get('ETag')
+                entry['last_modified'] = head.headers.get('Last-Modified')
+                entry.pop('sha256', None)
+                return True
+            headers = {}
+
+        with self.engine.get(bl['url'], headers=headers, timeout=bl.get('timeout', 10), stream=True) as response:
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+            tmp_path, digest = self._stream_to_temp(response, path)
+
+        entry['etag'] = response.headers.get('ETag')
+        entry['last_modified'] = response.headers.get('Last-Modified')
+        if digest == entry.get('sha256') and os.path.exists(path):
+            remove_quietly(tmp_path)
+            return False
+
+        try:
+            self._postprocess_list(bl, tmp_path, entry)
+        except BaseException:
+            remove_quietly(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        entry['sha256'] = digest
+        return True
+
+    def _postprocess_list(self, bl: Dict[str, Any], path: str, entry: Dict[str, Any]) -> None:
+        """Сжимает hostlist или оптимизирует ipset перед заменой файла на диске."""
+        kind = bl.get('kind', 'hostlist')
+        if kind == 'hostlist':
+            # Сжатый вид списка также служит базой для дельта-патчей
+            stats = compact_file(path)
+            self.logger.info(
+                f"Список '{bl['name']}' сжат: {stats.input_entries} -> {stats.output_entries} "
+                f"(дубликатов {stats.duplicates}, покрытых поддоменов {stats.covered})"
+            )
+        elif kind == 'ipset':
+            stats = optimize_ipset_file(path, verify=True)
+            self.logger.info(
+                f"ipset '{bl['name']}' оптимизирован: {stats.input_entries} -> {stats.output_entries} префиксов"
+                + (f", некорректных строк оставлено без изменений: {stats.invalid}" if stats.invalid else "")
+            )
+        else:
+            return
+        entry['saved_entries'] = stats.saved
+
+    def _try_patch(self, bl: Dict[str, Any]) -> bool:
+        """Скачивает и применяет дельта-патч к локальному списку. Возвращает True при успехе."""
+        path = bl['output_file']
+        try:
+            url = bl['patch_url'].format(base=file_sha256(path))
+            response = self.engine.get(url, timeout=bl.get('timeout', 10))
+            if response.status_code == 404:
+                self.logger.info(f"Патч для '{bl['name']}' не найден, скачивается полный список")
+                return False
+            response.raise_for_status()
+            apply_patch(path, response.text)
+            self.logger.info(f"К '{bl['name']}' применён патч ({len(response.content)} байт)")
+            return True
+        except PatchError as e:
+            self.logger.warning(f"Патч для '{bl['name']}' не подходит: {e}")
+        except Exception as e:
+            self.logger.warning(f"Не удалось применить патч для '{bl['name']}': {e}")
+        return False
+
+    def _load_blacklists_meta(self) -> Dict[str, Dict[str, Any]]:
+        """Читает метаданные чёрных списков (ETag, Last-Modified, хеш)."""
+        try:
+            with open(self.BLACKLISTS_META_FILE, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta if isinstance(meta, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать метаданные чёрных списков: {e}")
+            return {}
+
+    def _save_blacklists_meta(self, meta: Dict[str, Dict[str, Any]]) -> None:
+        """Сохраняет метаданные чёрных списков."""
+        try:
+            atomic_write(self.BLACKLISTS_META_FILE, json.dumps(meta, ensure_ascii=False, indent=2))
+        except Exception as e:
+            self.logger.warning(f"Не удалось сохранить метаданные чёрных списков: {e}")
\ No newline at end of file
@@ -9,6 +9,8 @@ from typing import Optional, List, Dict, Tuple
 
 from PyQt6.QtCore import QSettings
 from PyQt6.QtWidgets import QMessageBox
+from utils.config_loader import ConfigDocument, ConfigError, ScriptOptions, load_config
+from utils.port_set import normalize_ports
 from utils.translation_utils import TranslationManager
 
 # --- Глобальные константы и настройки ---
@@ -20,11 +22,15 @@ SETTING_VER = os.path.join(BASE_FOLDER, "setting_version", "version_config.ini")
 FIX_BAT_PATH = os.path.join(BASE_FOLDER, "resources", "fix-process", "fix.bat")
 BLACKLIST_FOLDER = os.path.join(BASE_FOLDER, "black")
 ICON_FOLDER = os.path.join(BASE_FOLDER, "resources", "icon")
+CACHE_FOLDER = os.path.join(BASE_FOLDER, "cache")
 BLACKLIST_FILES: List[str] = [
     os.path.join(BLACKLIST_FOLDER, "russia-blacklist.txt"),
     os.path.join(BLACKLIST_FOLDER, "disk-youtube-blacklist.txt"),
     os.path.join(BLACKLIST_FOLDER, "universal.txt")
 ]
+IPSET_FILES: List[str] = [
+    os.path.join(BLACKLIST_FOLDER, "ipset-discord.txt")
+]
 
 # --- Логгер ---
 logger = logging.getLogger("dpipenguin")
@@ -120,77 +126,51 @@ def disable_autostart() -> None:
         raise
 
 # --- Работа с конфигом скриптов ---
-def load_script_options(config_path: str) -> Tuple[Optional[Dict[str, Tuple[str, List[str]]]], Optional[str]]:
-    """Загружает опции скрипта из конфигурационного файла."""
-    config = configparser.ConfigParser()
-    config.optionxform = str
+def config_placeholders(game_filter_ports: str = "") -> Dict[str, str]:
+    """Значения плейсхолдеров, доступных в args и executable конфигураций."""
+    placeholders = {
+        "ZAPRET_FOLDER": ZAPRET_FOLDER,
+        "BLACKLIST_FOLDER": BLACKLIST_FOLDER,
+        "BASE_FOLDER": BASE_FOLDER,
+        "GAME_FILTER": game_filter_ports,
+    }
+    for index, path in enumerate(BLACKLIST_FILES):
+        placeholders[f"BLACKLIST_FILES_{index}"] = path
+    return placeholders
 
+def read_config(config_path: str) -> Tuple[Optional[ConfigDocument], Optional[str]]:
+    """Читает конфигурацию через кэширующий загрузчик. Возвращает (документ, ошибка)."""
     try:
-        config.read(config_path, encoding='utf-8')
-    except configparser.Error as e:
+        document = load_config(config_path)
+    except (ConfigError, UnicodeDecodeError) as e:
         msg = tr("Ошибка при чтении config.ini: {error}").format(error=e)
         logger.error(msg)
         return None, msg
-
-    section_counts = {}
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('[') and line.endswith(']'):
-                    section = line[1:-1]
-                    section_counts[section] = section_counts.get(section, 0) + 1
     except Exception as e:
         msg = tr("Ошибка при обработке config.ini: {error}").format(error=e)
         logger.error(msg)
         return None, msg
 
-    duplicates = [name for name, count in section_counts.items() if count > 1]
-    if duplicates:
+    if document.duplicates:
         msg = tr("Ошибка: Названия разделов конфигурации не должны повторяться: {duplicates}").format(
-            duplicates=", ".join(duplicates)
+            duplicates=", ".join(document.duplicates)
         )
         logger.error(msg)
         return None, msg
+    return document, None
+
+def load_script_options(config_path: str) -> Tuple[Optional[ScriptOptions], Optional[str]]:
+    """
+    Загружает опции скрипта из конфигурационного файла. Аргументы секции
+    рендерятся при первом обращении к ней.
+    """
+    document, error = read_config(config_path)
+    if error:
+        return None, error
 
-    script_options = {}
     game_filter_enabled = settings.value("game_filter_enabled", False, type=bool)
     game_filter_ports = settings.value("game_filter_ports", "1024-65535", type=str).strip() if game_filter_enabled else ""
-
-    for section in config.sections():
-        if section == "SCRIPT_OPTIONS":
-            continue
-
-        executable = config.get(section, 'executable', fallback=None)
-        args = config.get(section, 'args', fallback='')
-
-        args_list = []
-        if args:
-            args_split = ' '.join(args.splitlines()).split(';')
-            args_list = [arg.strip() for arg in args_split if arg.strip()]
-
-        args_list = [
-            arg.replace('{ZAPRET_FOLDER}', ZAPRET_FOLDER)
-               .replace('{BLACKLIST_FOLDER}', BLACKLIST_FOLDER)
-               .replace('{BLACKLIST_FILES_0}', BLACKLIST_FILES[0])
-               .replace('{BLACKLIST_FILES_1}', BLACKLIST_FILES[1])
-               .replace('{BLACKLIST_FILES_2}', BLACKLIST_FILES[2])
-               .replace('{BASE_FOLDER}', BASE_FOLDER)
-               .replace('{GAME_FILTER}', game_filter_ports)
-               .replace(',,', ',')
-               .rstrip(';,').lstrip(',')
-            for arg in args_list
-        ]
-
-        args_list = [arg for arg in args_list if arg and not arg.endswith('=')]
-
-        if executable:
-            executable = executable.replace('{ZAPRET_FOLDER}', ZAPRET_FOLDER).replace('{BASE_FOLDER}', BASE_FOLDER)
-            if not os.path.isabs(executable):
-                executable = os.path.join(BASE_FOLDER, executable)
-
-        script_options[section] = (executable, args_list)
-    return script_options, None
+    return document.script_options(config_placeholders(normalize_ports(game_filter_ports))), None
 
 # --- Работа со службой Windows ---
 def _run_sc_command(args: List[str], error_msg: str) -> str:
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.port_set import PortSet
+from utils.winws_profile import WinwsCommand, WinwsProfile
+
+PROTOCOLS = ("tcp", "udp")
+
+
+@dataclass
+class ProtocolFilter:
+    """Перехват WinDivert для одного протокола в сравнении с портами профилей."""
+    protocol: str
+    captured: PortSet
+    handled: PortSet
+
+    @property
+    def excess(self) -> PortSet:
+        """Порты, которые WinDivert перехватывает, но ни один профиль не обрабатывает."""
+        return self.captured - self.handled
+
+    @property
+    def narrowed(self) -> PortSet:
+        return self.captured & self.handled
+
+
+@dataclass
+class CaptureFilterPlan:
+    """Результат сравнения --wf-tcp/--wf-udp с фильтрами профилей."""
+    filters: Dict[str, ProtocolFilter] = field(default_factory=dict)
+    # Причина, по которой анализ невозможен (например, --wf-raw или некорректные порты)
+    skipped: Optional[str] = None
+
+    @property
+    def excess(self) -> Dict[str, PortSet]:
+        return {protocol: f.excess for protocol, f in self.filters.items() if f.excess}
+
+    def capture_size(self, narrowed: bool = False) -> Dict[str, int]:
+        """Число перехватываемых портов по протоколам (до или после сужения)."""
+        return {
+            protocol: len(self.filters[protocol].narrowed if narrowed else self.filters[protocol].captured)
+            if protocol in self.filters else 0
+            for protocol in PROTOCOLS
+        }
+
+    def narrow(self, command: WinwsCommand) -> List[str]:
+        """
+        Аргументы, в которых --wf-* сужены до портов профилей. Перехват
+        никогда не расширяется; опция без портов после сужения удаляется.
+        """
+        excess = self.excess
+        if self.skipped or not excess:
+            return command.to_args()
+        args: List[str] = []
+        for profile in command:
+            if profile.index:
+                args.append("--new")
+            for option in profile.options:
+                protocol = option.name[len("--wf-"):] if option.name in ("--wf-tcp", "--wf-udp") else None
+                if protocol is None or protocol not in excess:
+                    args.append(option.raw)
+                    continue
+                narrowed = self.filters[protocol].narrowed
+                if narrowed:
+                    args.append(f"{option.name}={narrowed}")
+        return args
+
+
+def handled_ports(command: WinwsCommand) -> Dict[str, PortSet]:
+    """
+    Объединение портов, которые могут совпасть хоть с одним профилем.
+    Профиль без --filter-tcp/--filter-udp совпадает с любыми портами обоих
+    протоколов; профиль с фильтром только одного протокола другой не принимает.
+    """
+    handled = {protocol: PortSet() for protocol in PROTOCOLS}
+    for profile in command:
+        for protocol, ports in profile_ports(profile).items():
+            handled[protocol] |= ports
+    return handled
+
+
+def profile_ports(profile: WinwsProfile) -> Dict[str, PortSet]:
+    """Порты TCP/UDP, с которыми может совпасть профиль; некорректные порты — ValueError."""
+    if not profile.has_port_filter:
+        return {protocol: PortSet.all() for protocol in PROTOCOLS}
+    return {"tcp": PortSet.parse(profile.tcp_ports), "udp": PortSet.parse(profile.udp_ports)}
+
+
+def compile_capture_filter(command: WinwsCommand) -> CaptureFilterPlan:
+    """Строит план перехвата для уже отрендеренных аргументов секции."""
+    plan = CaptureFilterPlan()
+    if command.global_values("--wf-raw"):
+        plan.skipped = "--wf-raw"
+        return plan
+    try:
+        handled = handled_ports(command)
+        for protocol in PROTOCOLS:
+            values = command.global_values(f"--wf-{protocol}")
+            if values:
+                plan.filters[protocol] = ProtocolFilter(protocol, PortSet.parse(values), handled[protocol])
+    except ValueError as e:
+        plan.skipped = str(e)
+    return plan
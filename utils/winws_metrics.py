@@ -0,0 +1,75 @@
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from utils.winws_output import (
+    CaptureStarted, ListLoaded, ProfilesCounted, VersionReported, WinwsError, WinwsEvent,
+)
+
+logger = logging.getLogger("dpipenguin")
+
+
+@dataclass
+class ListMetrics:
+    """Последняя загрузка списка winws: число записей и время загрузки в секундах."""
+    kind: str
+    path: str
+    entries: int
+    duration: Optional[float]
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path.replace("\\", "/")) or self.path
+
+
+class WinwsMetrics:
+    """
+    Значения из вывода winws для текущего запуска: версия, число профилей,
+    размер и время загрузки каждого списка, время до начала перехвата, ошибки.
+    Обновляется событиями WinwsOutputParser в GUI-потоке.
+    """
+
+    def __init__(self, errors_size: int = 20):
+        self.version: Optional[str] = None
+        self.profiles: Optional[int] = None
+        self.startup: Optional[float] = None
+        self.lists: Dict[str, ListMetrics] = {}
+        self.errors: Deque[str] = deque(maxlen=errors_size)
+
+    def begin_run(self) -> None:
+        """Сбрасывает значения перед запуском нового процесса winws."""
+        self.version = None
+        self.profiles = None
+        self.startup = None
+        self.lists.clear()
+        self.errors.clear()
+
+    @property
+    def total_entries(self) -> int:
+        return sum(item.entries for item in self.lists.values())
+
+    @property
+    def total_load_time(self) -> float:
+        return sum(item.duration or 0.0 for item in self.lists.values())
+
+    def record(self, event: WinwsEvent) -> None:
+        if isinstance(event, ListLoaded):
+            item = ListMetrics(event.kind, event.path, event.entries, event.duration)
+            self.lists[event.path] = item
+            duration = f", {event.duration * 1000:.0f} мс" if event.duration is not None else ""
+            logger.info(f"winws: {event.kind} {item.name} — записей {event.entries}{duration}")
+        elif isinstance(event, ProfilesCounted):
+            self.profiles = event.count
+            logger.info(f"winws: профилей desync {event.count}")
+        elif isinstance(event, CaptureStarted):
+            self.startup = event.startup
+            startup = f" через {event.startup:.2f} сек" if event.startup is not None else ""
+            logger.info(f"winws: перехват запущен{startup}, списков {len(self.lists)}, "
+                        f"записей {self.total_entries}, загрузка списков {self.total_load_time:.2f} сек")
+        elif isinstance(event, VersionReported):
+            self.version = event.version
+        elif isinstance(event, WinwsError):
+            self.errors.append(event.message)
+            logger.warning(f"winws: {event.message}")
@@ -0,0 +1,225 @@
+import queue
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+# Служебные строки winws, которые не выводятся в консоль программы
+IGNORED_KEYWORDS = (
+    "loading hostlist",
+    "we have",
+    "desync profile(s)",
+    "loaded hosts",
+    "loading plain text list",
+    "loaded",
+    "loading ipset",
+    "github version",
+)
+_IGNORED_RE = re.compile("|".join(re.escape(keyword) for keyword in IGNORED_KEYWORDS), re.IGNORECASE)
+_CAPTURE_STARTED_RE = re.compile(re.escape("windivert initialized. capture is started."), re.IGNORECASE)
+
+# Пачка строк отправляется не чаще раза в BATCH_INTERVAL секунд
+BATCH_INTERVAL = 0.05
+BATCH_MAX_LINES = 1000
+
+LineFilter = Callable[[str], Optional[str]]
+LineObserver = Callable[[str], None]
+
+# Строки winws, из которых извлекаются события (сопоставляются с начала строки)
+_EVENT_RE = re.compile(
+    r"(?:loading (?P<load_kind>hostlist|ipset) (?P<load_path>.+)"
+    r"|loaded (?P<entries>\d+) (?P<unit>hosts|ip/subnets) from (?P<loaded_path>.+)"
+    r"|we have (?P<profiles>\d+)"
+    r"|github version (?P<version>\S+)"
+    r"|(?P<started>windivert initialized\. capture is started\.))",
+    re.IGNORECASE,
+)
+_ERROR_RE = re.compile(r"\b(?:error|could not|cannot|can't|failed|invalid)\b", re.IGNORECASE)
+
+
+class ConsoleFilter:
+    """
+    Отбор строк вывода winws для консоли: одно скомпилированное выражение
+    вместо перебора ключевых слов. Строка о начале перехвата заменяется
+    сообщением started_text. Вызывается в потоке чтения, а не в GUI.
+    """
+
+    def __init__(self, started_text: str):
+        self.started_text = started_text
+
+    def __call__(self, line: str) -> Optional[str]:
+        if not line:
+            return None
+        if _CAPTURE_STARTED_RE.search(line):
+            return self.started_text
+        if _IGNORED_RE.search(line):
+            return None
+        return line
+
+
+@dataclass(frozen=True)
+class WinwsEvent:
+    """Событие из вывода winws. time — time.monotonic() получения строки."""
+    time: float
+
+
+@dataclass(frozen=True)
+class VersionReported(WinwsEvent):
+    version: str
+
+
+@dataclass(frozen=True)
+class ProfilesCounted(WinwsEvent):
+    """Число пользовательских профилей desync (без профиля 0 по умолчанию)."""
+    count: int
+
+
+@dataclass(frozen=True)
+class ListLoadStarted(WinwsEvent):
+    kind: str
+    path: str
+
+
+@dataclass(frozen=True)
+class ListLoaded(WinwsEvent):
+    """
+    Список загружен. kind — "hostlist" или "ipset"; duration — время от строки
+    "Loading ..." до "Loaded ..." в секундах, None, если начало загрузки не видно.
+    """
+    kind: str
+    path: str
+    entries: int
+    duration: Optional[float]
+
+
+@dataclass(frozen=True)
+class CaptureStarted(WinwsEvent):
+    """WinDivert открыт. startup — секунды от запуска процесса, если он известен."""
+    startup: Optional[float]
+
+
+@dataclass(frozen=True)
+class WinwsError(WinwsEvent):
+    message: str
+
+
+class WinwsOutputParser:
+    """
+    Разбирает вывод winws в типизированные события. Вызывается для каждой
+    строки в потоке чтения, поэтому строка без события стоит одного-двух
+    поисков по скомпилированным выражениям.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at
+        # Начатые загрузки: (вид списка, путь) -> время строки "Loading ..."
+        self._loading: Dict[Tuple[str, str], float] = {}
+
+    def reset(self, started_at: Optional[float] = None) -> None:
+        """Начинает разбор вывода нового процесса."""
+        self.started_at = started_at
+        self._loading.clear()
+
+    def feed(self, line: str, now: Optional[float] = None) -> Optional[WinwsEvent]:
+        line = line.strip()
+        if not line:
+            return None
+        now = time.monotonic() if now is None else now
+        match = _EVENT_RE.match(line)
+        if match is None:
+            if _ERROR_RE.search(line):
+                return WinwsError(now, line)
+            return None
+
+        if match["load_kind"]:
+            kind, path = match["load_kind"].lower(), match["load_path"]
+            self._loading[(kind, path)] = now
+            return ListLoadStarted(now, kind, path)
+        if match["entries"]:
+            kind = "hostlist" if match["unit"].lower() == "hosts" else "ipset"
+            path = match["loaded_path"]
+            started = self._loading.pop((kind, path), None)
+            return ListLoaded(now, kind, path, int(match["entries"]),
+                              now - started if started is not None else None)
+        if match["profiles"]:
+            return ProfilesCounted(now, int(match["profiles"]))
+        if match["version"]:
+            return VersionReported(now, match["version"])
+        return CaptureStarted(now, now - self.started_at if self.started_at is not None else None)
+
+
+class OutputBatcher:
+    """
+    Читает вывод процесса в отдельном потоке и передаёт строки пачками:
+    пачка отправляется через interval секунд после первой строки в ней.
+    Если за это время строк больше max_lines, в пачке остаются последние
+    max_lines — консоль всё равно показывает только хвост вывода.
+    observer получает каждую строку до фильтра, в том числе отброшенные.
+    """
+
+    def __init__(self, emit: Callable[[List[str]], None], line_filter: Optional[LineFilter] = None,
+                 interval: float = BATCH_INTERVAL, max_lines: int = BATCH_MAX_LINES,
+                 observer: Optional[LineObserver] = None):
+        self.emit = emit
+        self.line_filter = line_filter
+        self.observer = observer
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines_read = 0
+        self.lines_dropped = 0
+        self.batches = 0
+
+    @staticmethod
+    def _read(stream: TextIO, lines: "queue.SimpleQueue[Optional[str]]") -> None:
+        try:
+            for line in iter(stream.readline, ""):
+                lines.put(line.strip())
+        finally:
+            lines.put(None)
+
+    def run(self, stream: TextIO, should_continue: Callable[[], bool] = lambda: True) -> bool:
+        """
+        Обрабатывает вывод до конца потока. Возвращает False, если чтение
+        прервано из-за should_continue.
+        """
+        lines: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        threading.Thread(target=self._read, args=(stream, lines), daemon=True).start()
+
+        batch: Deque[str] = deque(maxlen=self.max_lines)
+        deadline = 0.0
+        completed = True
+        while True:
+            try:
+                line = lines.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                self._flush(batch)
+                continue
+            if line is None:
+                break
+            if not should_continue():
+                completed = False
+                break
+            self.lines_read += 1
+            if self.observer:
+                self.observer(line)
+            text = self.line_filter(line) if self.line_filter else line or None
+            if text is None:
+                continue
+            if not batch:
+                deadline = time.monotonic() + self.interval
+            elif len(batch) == self.max_lines:
+                self.lines_dropped += 1
+            batch.append(text)
+            # При непрерывном потоке очередь не пустеет, поэтому срок проверяется и здесь
+            if time.monotonic() >= deadline:
+                self._flush(batch)
+        self._flush(batch)
+        return completed
+
+    def _flush(self, batch: Deque[str]) -> None:
+        if batch:
+            self.batches += 1
+            self.emit(list(batch))
+            batch.clear()
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+PROFILE_SEPARATOR = "--new"
+
+# Опции, которые действуют на весь процесс winws, а не на отдельный профиль
+GLOBAL_OPTIONS = frozenset({
+    "--wf-tcp", "--wf-udp", "--wf-l3", "--wf-raw", "--wf-save", "--wf-dup-check",
+    "--debug", "--dry-run", "--version", "--comment", "--ipcache-lifetime", "--ipcache-hostname",
+    "--ctrack-timeouts", "--ctrack-disable", "--daemon", "--pidfile",
+})
+
+HOSTLIST_OPTIONS = ("--hostlist", "--hostlist-exclude", "--hostlist-auto")
+IPSET_OPTIONS = ("--ipset", "--ipset-exclude")
+PORT_FILTER_OPTIONS = ("--filter-tcp", "--filter-udp")
+# Опции со списком портов: при подстановке значений они нормализуются через PortSet
+PORT_LIST_OPTIONS = frozenset({"--wf-tcp", "--wf-udp", *PORT_FILTER_OPTIONS})
+
+
+@dataclass(slots=True)
+class WinwsOption:
+    """
+    Один аргумент winws. raw — исходный текст, по нему собирается командная
+    строка, поэтому разбор и обратная сборка совпадают байт в байт.
+    """
+    name: str
+    value: Optional[str]
+    raw: str
+
+    @classmethod
+    def parse(cls, arg: str) -> "WinwsOption":
+        if arg.startswith("--"):
+            name, sep, value = arg.partition("=")
+            return cls(name, value if sep else None, arg)
+        return cls("", arg, arg)
+
+    @property
+    def is_global(self) -> bool:
+        return self.name in GLOBAL_OPTIONS
+
+    @property
+    def items(self) -> List[str]:
+        """Значение, разбитое по запятым (порты, режимы desync, L7-протоколы)."""
+        if not self.value:
+            return []
+        return [item for item in self.value.split(",") if item]
+
+
+@dataclass(slots=True)
+class WinwsProfile:
+    """Профиль winws — аргументы между разделителями --new, в исходном порядке."""
+    index: int
+    options: List[WinwsOption] = field(default_factory=list)
+
+    def values(self, *names: str) -> List[str]:
+        return [option.value for option in self.options if option.name in names and option.value is not None]
+
+    def items(self, *names: str) -> List[str]:
+        return [item for option in self.options if option.name in names for item in option.items]
+
+    def has(self, name: str) -> bool:
+        return any(option.name == name for option in self.options)
+
+    @property
+    def profile_options(self) -> List[WinwsOption]:
+        """Опции профиля без глобальных (--wf-*, --debug и т.п.)."""
+        return [option for option in self.options if not option.is_global]
+
+    @property
+    def tcp_ports(self) -> List[str]:
+        return self.items("--filter-tcp")
+
+    @property
+    def udp_ports(self) -> List[str]:
+        return self.items("--filter-udp")
+
+    @property
+    def l7(self) -> List[str]:
+        return self.items("--filter-l7")
+
+    @property
+    def hostlists(self) -> List[str]:
+        return self.values("--hostlist")
+
+    @property
+    def ipsets(self) -> List[str]:
+        return self.values("--ipset")
+
+    @property
+    def lists(self) -> List[str]:
+        """Все файлы списков, на которые ссылается профиль, включая исключения."""
+        return self.values(*HOSTLIST_OPTIONS, *IPSET_OPTIONS)
+
+    @property
+    def desync(self) -> List[WinwsOption]:
+        return [option for option in self.options if option.name.startswith("--dpi-desync")]
+
+    @property
+    def has_port_filter(self) -> bool:
+        return any(option.name in PORT_FILTER_OPTIONS for option in self.options)
+
+    def to_args(self) -> List[str]:
+        return [option.raw for option in self.options]
+
+
+@dataclass(slots=True)
+class WinwsCommand:
+    """Аргументы секции конфигурации, разобранные на профили."""
+    profiles: List[WinwsProfile] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, args: Iterable[str]) -> "WinwsCommand":
+        profiles = [WinwsProfile(0)]
+        for arg in args:
+            if arg == PROFILE_SEPARATOR:
+                profiles.append(WinwsProfile(len(profiles)))
+            else:
+                profiles[-1].options.append(WinwsOption.parse(arg))
+        return cls(profiles)
+
+    def __iter__(self) -> Iterator[WinwsProfile]:
+        return iter(self.profiles)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    @property
+    def global_options(self) -> List[WinwsOption]:
+        return [option for profile in self.profiles for option in profile.options if option.is_global]
+
+    def global_values(self, name: str) -> List[str]:
+        return [option.value for option in self.global_options if option.name == name and option.value is not None]
+
+    @property
+    def lists(self) -> List[str]:
+        """Уникальные файлы списков всех профилей в порядке первого упоминания."""
+        return list(dict.fromkeys(path for profile in self.profiles for path in profile.lists))
+
+    def to_args(self) -> List[str]:
+        args: List[str] = []
+        for profile in self.profiles:
+            if profile.index:
+                args.append(PROFILE_SEPARATOR)
+            args.extend(profile.to_args())
+        return args
+